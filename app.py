@@ -89,6 +89,10 @@ class HieroExport(Application):
     def init_app(self):
         # let the shot exporter know when the first shot is being run
         self.first_shot = False
+
+        # the state of the current export. see ExportSession.
+        self.export_session = None
+
         self._register_exporter()
 
     @property
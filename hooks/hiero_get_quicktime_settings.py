@@ -26,6 +26,9 @@ class HieroGetQuicktimeSettings(Hook):
 
         :param bool for_shotgun: Whether the settings are being gathered for
             Quicktime output intended for use within the Shotgun web app.
+        :param int preview_width: When gathering settings for the web app, the
+            width the frames have been scaled down to before encoding, or 0
+            if they're at full resolution. Passed as a keyword argument.
 
         :returns: A tuple, where the first item is the file_type of a Nuke
             write node, and the second item is a dictionary of knob names and
@@ -51,4 +54,10 @@ class HieroGetQuicktimeSettings(Hook):
                 "keyframerate": 1,
             }
 
+            # scaled down previews are only meant for the web player, so a
+            # lighter profile will do
+            if for_shotgun and kwargs.get("preview_width"):
+                properties["quality"] = 2
+                properties["settingsString"] = "H.264, Medium Quality"
+
         return (file_type, properties)
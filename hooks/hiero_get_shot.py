@@ -30,38 +30,58 @@ class HieroGetShot(Hook):
         :rtype: dict
         """
         # get the parent entity for the Shot
-        parent = self.get_shot_parent(item.parentSequence(), data)
+        parent = self.get_shot_parent(
+            item.parentSequence(), data, session=kwargs.get("session")
+        )
 
         # shot parent field
         parent_field = "sg_sequence"
 
-        # grab shot from Shotgun
-        sg = self.parent.shotgun
-        filter = [
-            ["project", "is", self.parent.context.project],
-            [parent_field, "is", parent],
-            ["code", "is", item.name()],
-        ]
-
         # default the return fields to None to use the python-api default
         fields = kwargs.get("fields", None)
-        shots = sg.find("Shot", filter, fields=fields)
-        if len(shots) > 1:
-            # can not handle multiple shots with the same name
-            raise Exception("Multiple shots named '%s' found", item.name())
-        if len(shots) == 0:
-            # create shot in shotgun
-            shot_data = {
-                "code": item.name(),
-                parent_field: parent,
-                "project": self.parent.context.project,
-            }
-            shot = sg.create("Shot", shot_data, return_fields=fields)
-            self.parent.log_info(
-                "Created Shot in Flow Production Tracking: %s" % shot_data
-            )
-        else:
-            shot = shots[0]
+
+        # the shot may already have been resolved during this export, either
+        # by the processor's bulk pre-flight or by a previous call to this hook
+        shot_registry = data.get("shot_registry")
+        shot = None
+        if shot_registry is not None:
+            shot = shot_registry.get(parent, item.name(), fields)
+
+        if shot is None:
+            # grab shot from Shotgun. query all of the fields used during the
+            # export so that the shot is only fetched once.
+            query_fields = fields
+            if shot_registry is not None and data.get("shot_fields"):
+                query_fields = list(set((fields or []) + data["shot_fields"]))
+
+            sg = self.parent.shotgun
+            filter = [
+                ["project", "is", self.parent.context.project],
+                [parent_field, "is", parent],
+                ["code", "is", item.name()],
+            ]
+
+            shots = sg.find("Shot", filter, fields=query_fields)
+            if len(shots) > 1:
+                # can not handle multiple shots with the same name
+                raise Exception("Multiple shots named '%s' found", item.name())
+            if len(shots) == 0:
+                # create shot in shotgun
+                shot_data = {
+                    "code": item.name(),
+                    parent_field: parent,
+                    "project": self.parent.context.project,
+                }
+                shot = sg.create("Shot", shot_data, return_fields=query_fields)
+                self.parent.log_info(
+                    "Created Shot in Flow Production Tracking: %s" % shot_data
+                )
+            else:
+                shot = shots[0]
+
+            if shot_registry is not None:
+                shot_registry.add(parent, item.name(), shot)
+                shot = shot_registry.get(parent, item.name(), fields)
 
         # update the thumbnail for the shot
         upload_thumbnail = kwargs.get("upload_thumbnail", True)
@@ -72,17 +92,145 @@ class HieroGetShot(Hook):
                 source=item.source(),
                 item=item,
                 task=kwargs.get("task"),
+                session=kwargs.get("session"),
             )
 
         return shot
 
+    def get_shots(self, items, data, **kwargs):
+        """
+        Takes a list of hiero.core.TrackItems and returns the Shots for all of
+        them, resolving existing Shots with a single query per parent and
+        creating any missing Shots in a single batch request.
+
+        The resolved Shots are stored in the export's shot registry, if one
+        is available in the data dictionary, so that subsequent calls to
+        :meth:`execute` for the same items don't need to query for them.
+
+        :param list items: The hiero.core.TrackItems being processed.
+        :param dict data: A dictionary with cached parent data.
+
+        :returns: A list of Shot entities, in the same order as the items.
+        :rtype: list
+        """
+        # if the single shot lookup has been customized, let the app call it
+        # for each item rather than bypassing the customization here.
+        if type(self).execute is not HieroGetShot.execute:
+            raise NotImplementedError
+
+        sg = self.parent.shotgun
+        project = self.parent.context.project
+
+        # shot parent field
+        parent_field = "sg_sequence"
+
+        # default the return fields to None to use the python-api default
+        fields = kwargs.get("fields", None)
+
+        shot_registry = data.get("shot_registry")
+
+        # group the items by the sequence they come from since that is what
+        # determines the parent of the shot
+        sequences = {}
+        items_by_sequence = {}
+        for item in items:
+            hiero_sequence = item.parentSequence()
+            sequences[hiero_sequence.guid()] = hiero_sequence
+            items_by_sequence.setdefault(hiero_sequence.guid(), []).append(item)
+
+        # shots are keyed by their lower case code, since shot codes are
+        # matched case insensitively by Flow Production Tracking
+        shots_by_key = {}
+        for sequence_guid, sequence_items in items_by_sequence.items():
+            parent = self.get_shot_parent(
+                sequences[sequence_guid], data, session=kwargs.get("session")
+            )
+            parent_key = sequence_guid
+
+            codes = []
+            for item in sequence_items:
+                if item.name().lower() not in [code.lower() for code in codes]:
+                    codes.append(item.name())
+
+            # only query for the shots we don't already know about
+            if shot_registry is not None:
+                for code in codes:
+                    shot = shot_registry.get(parent, code, fields)
+                    if shot is not None:
+                        shots_by_key[(parent_key, code.lower())] = shot
+                codes = [
+                    code
+                    for code in codes
+                    if (parent_key, code.lower()) not in shots_by_key
+                ]
+
+            if not codes:
+                continue
+
+            filter = [
+                ["project", "is", project],
+                [parent_field, "is", parent],
+                ["code", "in", codes],
+            ]
+            found_fields = list(
+                set((fields or []) + data.get("shot_fields", []) + ["code"])
+            )
+            for shot in sg.find("Shot", filter, fields=found_fields):
+                key = (parent_key, shot["code"].lower())
+                if key in shots_by_key:
+                    # can not handle multiple shots with the same name
+                    raise Exception("Multiple shots named '%s' found", shot["code"])
+                shots_by_key[key] = shot
+
+            # create all of the missing shots in one go
+            missing_codes = [
+                code for code in codes if (parent_key, code.lower()) not in shots_by_key
+            ]
+            if missing_codes:
+                requests = [
+                    {
+                        "request_type": "create",
+                        "entity_type": "Shot",
+                        "data": {
+                            "code": code,
+                            parent_field: parent,
+                            "project": project,
+                        },
+                        "return_fields": found_fields,
+                    }
+                    for code in missing_codes
+                ]
+                for code, shot in zip(missing_codes, sg.batch(requests)):
+                    shots_by_key[(parent_key, code.lower())] = shot
+                self.parent.log_info(
+                    "Created %s Shots in Flow Production Tracking: %s"
+                    % (len(missing_codes), ", ".join(missing_codes))
+                )
+
+            if shot_registry is not None:
+                for code in codes:
+                    shot_registry.add(
+                        parent, code, shots_by_key[(parent_key, code.lower())]
+                    )
+
+        # return the shots in item order
+        shots = []
+        for item in items:
+            shot = shots_by_key[(item.parentSequence().guid(), item.name().lower())]
+            shots.append(
+                dict((field, shot[field]) for field in ["type", "id"] + (fields or []))
+            )
+
+        return shots
+
     def get_shot_parent(self, hiero_sequence, data, **kwargs):
         """
         Given a Hiero sequence and data cache, return the corresponding entity
         in Shotgun to serve as the parent for contained Shots.
 
-        .. note:: The data dict is typically the app's `preprocess_data` which
-            maintains the cache across invocations of this hook.
+        .. note:: The data dict is typically the data of the app's current
+            export session, which maintains the cache across invocations of
+            this hook for the duration of the export.
 
         :param hiero_sequence: A Hiero sequence object
         :param dict data: A dictionary with cached parent data.
@@ -133,7 +281,11 @@ class HieroGetShot(Hook):
         upload_thumbnail = kwargs.get("upload_thumbnail", True)
         if upload_thumbnail:
             self.parent.execute_hook(
-                "hook_upload_thumbnail", entity=parent, source=hiero_sequence, item=None
+                "hook_upload_thumbnail",
+                entity=parent,
+                source=hiero_sequence,
+                item=None,
+                session=kwargs.get("session"),
             )
 
         # cache the results
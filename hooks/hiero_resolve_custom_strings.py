@@ -17,9 +17,6 @@ class HieroResolveCustomStrings(Hook):
     their concrete value when paths are being processed during the export.
     """
 
-    # Cache of shots that have already been pulled from shotgun
-    _sg_lookup_cache = {}
-
     def execute(self, task, keyword, **kwargs):
         """
         The default implementation of the custom resolver simply looks up
@@ -29,30 +26,38 @@ class HieroResolveCustomStrings(Hook):
 
         :param task: The export task being processed.
         :param str keyword: The keyword token that needs to be resolved.
+        :param session: The export session to look the Shot up in.
 
         :returns: The resolved keyword value to be replaced into the
             associated string.
         :rtype: str
         """
         shot_code = task._item.name()
+        session = kwargs.get("session")
+        if session is None:
+            session = self.parent.export_session
 
-        # grab the shot from the cache, or the get_shot hook if not cached
-        sg_shot = self._sg_lookup_cache.get(shot_code)
-        if sg_shot is None:
-            fields = [
-                ctf["keyword"]
-                for ctf in self.parent.get_setting("custom_template_fields")
-            ]
-            sg_shot = self.parent.execute_hook(
+        # grab the shot from the export session's cache, or the get_shot hook
+        # if not cached. the shot is fetched with every field used during the
+        # export so the hook can serve the other tasks from the same query.
+        project = self.parent.context.project
+        key = (
+            project["id"] if project else None,
+            task._item.parentSequence().guid(),
+            shot_code,
+        )
+        sg_shot = session.resolved_shots.get_or_create(
+            key,
+            lambda: self.parent.execute_hook(
                 "hook_get_shot",
                 task=task,
                 item=task._item,
-                data=self.parent.preprocess_data,
-                fields=fields,
+                data=session.data,
+                fields=session.shot_fields,
                 upload_thumbnail=False,
-            )
-
-            self._sg_lookup_cache[shot_code] = sg_shot
+                session=session,
+            ),
+        )
 
         if sg_shot is None:
             raise RuntimeError("Could not find shot for custom resolver: %s" % keyword)
@@ -59,7 +59,39 @@ class HieroUpdateCuts(HookBaseClass):
         )
         return cut_item
 
-    def get_cut_thumbnail(self, cut, task_item, preset_properties):
+    def create_cut_items(self, cut_item_data_list, preset_properties):
+        """
+        Handles the creation of a list of CutItem entities in Shotgun with a
+        single batch request.
+
+        :param list cut_item_data_list: A list of dictionaries of field/value
+            pairs, one per CutItem entity to create in Shotgun.
+        :param dict preset_properties: The export preset's properties
+            dictionary.
+
+        :returns: A list of the created CutItem entity dictionaries.
+        :rtype: list
+        """
+        # if the single CutItem creation has been customized, let the app call
+        # it for each CutItem rather than bypassing the customization here.
+        if type(self).create_cut_item is not HieroUpdateCuts.create_cut_item:
+            raise NotImplementedError
+
+        requests = [
+            {
+                "request_type": "create",
+                "entity_type": "CutItem",
+                "data": cut_item_data,
+            }
+            for cut_item_data in cut_item_data_list
+        ]
+        cut_items = self.parent.sgtk.shotgun.batch(requests)
+        self.parent.logger.info(
+            "Created %s CutItems in Flow Production Tracking." % len(cut_items)
+        )
+        return cut_items
+
+    def get_cut_thumbnail(self, cut, task_item, preset_properties, session=None):
         """
         Gets the path to a thumbnail image to use when updating the
         export's associated Cut's thumbnail image. If None is returned
@@ -71,6 +103,8 @@ class HieroUpdateCuts(HookBaseClass):
             task.
         :param dict preset_properties: The export preset's properties
             dictionary.
+        :param session: The export session of the task, to decode the
+            thumbnail in.
 
         :returns: The path to the thumbnail image, or None if no thumbnail
             is to be uploaded to Shotgun.
@@ -87,7 +121,11 @@ class HieroUpdateCuts(HookBaseClass):
         try:
             # See if we can find a poster frame for the sequence and
             # turn that into a usable thumbnail.
-            thumbnail = hiero_sequence.thumbnail(hiero_sequence.posterFrame())
+            if session is None:
+                session = self.parent.export_session
+            thumbnail = session.get_thumbnail(
+                hiero_sequence, hiero_sequence.posterFrame()
+            )
         except Exception:
             self.parent.logger.debug(
                 "Unable to generate a thumbnail from the sequence's posterFrame."
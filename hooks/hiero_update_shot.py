@@ -61,3 +61,41 @@ class HieroUpdateShot(HookBaseClass):
             "Updating info for %s %s: %s" % (entity_type, entity_id, entity_data)
         )
         self.parent.sgtk.shotgun.update(entity_type, entity_id, entity_data)
+
+    def update_shot_entities(self, entity_type, entity_updates, preset_properties):
+        """
+        Handles updating a list of Shot entities in Shotgun with a single
+        batch request.
+
+        :param str entity_type: The entity type to update.
+        :param list entity_updates: A list of ``(entity_id, entity_data)``
+            tuples, one per entity to update.
+        :param dict preset_properties: The export preset's properties
+            dictionary.
+
+        :returns: A list of the updated entities.
+        :rtype: list
+        """
+        # if the single entity update has been customized, let the app call it
+        # for each entity rather than bypassing the customization here.
+        if (
+            type(self).update_shotgun_shot_entity
+            is not HieroUpdateShot.update_shotgun_shot_entity
+        ):
+            raise NotImplementedError
+
+        requests = []
+        for entity_id, entity_data in entity_updates:
+            self.parent.logger.debug(
+                "Updating info for %s %s: %s" % (entity_type, entity_id, entity_data)
+            )
+            requests.append(
+                {
+                    "request_type": "update",
+                    "entity_type": entity_type,
+                    "entity_id": entity_id,
+                    "data": entity_data,
+                }
+            )
+
+        return self.parent.sgtk.shotgun.batch(requests)
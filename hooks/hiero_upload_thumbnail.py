@@ -8,15 +8,10 @@
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
-import os
 import sys
 import math
-import shutil
-import tempfile
 import traceback
-import time
 
-from tank.platform.qt import QtCore
 from tank import Hook
 import tank.templatekey
 
@@ -36,16 +31,28 @@ class HieroUploadThumbnail(Hook):
         :param source: The Hiero source sequence object being exported.
         :param item: The Hiero task item being processed.
         :param task: The Hiero task being processed.
+        :param session: The export session of the task, to decode the frames
+            and queue the upload in.
+
+        :returns: A handle to wait on the upload with, or None if the
+            thumbnail couldn't be generated.
         """
-        thumbdir = tempfile.mkdtemp(prefix="hiero_process_shot")
         try:
-            path = "%s.png" % os.path.join(thumbdir, source.name())
             task = kwargs.get("task", None)
 
+            # frames are decoded once per export and cached in the session of
+            # the export being run. the app's current session may belong to
+            # another export.
+            session = kwargs.get("session")
+            if session is None:
+                session = getattr(task, "session", None)
+            if session is None:
+                session = self.parent.export_session
+
             if item is None:
                 # No timeline info, use the poster frame of the source item
                 frame = source.posterFrame()
-                thumb_qimage = source.thumbnail(frame)
+                thumb_qimage = session.get_thumbnail(source, frame)
             else:
                 if (task is not None) and task.isCollated():
                     # collated shot, use middle frame from task sequence (all collated items)
@@ -56,21 +63,19 @@ class HieroUploadThumbnail(Hook):
                             min_frame = min(i.timelineIn(), min_frame)
                             max_frame = max(i.timelineOut(), max_frame)
                     frame = int(math.ceil((min_frame + max_frame) / 2.0))
-                    thumb_qimage = task._sequence.thumbnail(frame)
+                    thumb_qimage = session.get_thumbnail(task._sequence, frame)
                 else:
                     # Simple item, just use middle frame
                     frame = int(math.ceil((item.sourceIn() + item.sourceOut()) / 2.0))
-                    thumb_qimage = source.thumbnail(frame)
-            # scale it down to 600px wide
-            thumb_qimage_scaled = thumb_qimage.scaledToWidth(
-                600, QtCore.Qt.SmoothTransformation
-            )
-            # scale thumbnail here...
-            thumb_qimage_scaled.save(path)
+                    thumb_qimage = session.get_thumbnail(source, frame)
+
+            # the thumbnail is encoded right away and uploaded in the
+            # background by the export session
             self.parent.log_debug(
-                "Uploading thumbnail for %s %s..." % (entity["type"], entity["id"])
+                "Queueing thumbnail upload for %s %s..."
+                % (entity["type"], entity["id"])
             )
-            self.parent.shotgun.upload_thumbnail(entity["type"], entity["id"], path)
+            return session.thumbnail_uploader.upload(entity, thumb_qimage)
         except:
             self.parent.log_info(
                 "Thumbnail for %s was not refreshed in Flow Production Tracking."
@@ -79,15 +84,3 @@ class HieroUploadThumbnail(Hook):
 
             tb = traceback.format_exc()
             self.parent.log_debug(tb)
-        finally:
-            # Sometimes Windows holds on to the temporary thumbnail file longer than expected which
-            # can cause an exception here. If we wait a second and try again, this usually solves
-            # the issue.
-            try:
-                shutil.rmtree(thumbdir)
-            except Exception:
-                self.parent.log_error(
-                    "Error removing temporary thumbnail file, trying again."
-                )
-                time.sleep(1.0)
-                shutil.rmtree(thumbdir)
@@ -25,6 +25,9 @@ class HieroGetQuicktimeSettings(HookBaseClass):
 
         :param bool for_shotgun: Whether the settings are being gathered for
             Quicktime output intended for use within the Shotgun web app.
+        :param int preview_width: When gathering settings for the web app, the
+            width the frames have been scaled down to before encoding, or 0
+            if they're at full resolution. Passed as a keyword argument.
 
         :returns: A tuple, where the first item is the file_type of a Nuke
             write node, and the second item is a dictionary of knob names and
@@ -29,23 +29,69 @@ class HieroGetShot(HookBaseClass):
         :param item: The Hiero track item being processed. Hiero API docs
             are available `here. <https://learn.foundry.com/hiero/developers/1.8/hieropythondevguide/api/api_core.html#hiero.core.TrackItem>`__
         :param dict data: A dictionary with cached parent data.
+        :param session: The export session to upload thumbnails in.
 
         :returns: A Shot entity.
         :rtype: dict
         """
         pass
 
+    def get_shots(self, items, data, **kwargs):
+        """
+        Batch variant of :meth:`execute`. Takes a list of Hiero track items and
+        returns the Shot entities for all of them.
+
+        This is called by the shot processor before any of the export tasks
+        are run, which allows all of the Shots to be looked up and created
+        with a handful of requests rather than one request per task. The
+        default implementation stores the resolved Shots in the shot registry
+        found in the data dictionary, which :meth:`execute` checks before
+        querying Flow Production Tracking.
+
+        Raising ``NotImplementedError`` causes the app to fall back to calling
+        :meth:`execute` once per item. The default implementation does so when
+        :meth:`execute` has been overridden, so that customizations made there
+        are always honored.
+
+        Example Implementation:
+
+        .. code-block:: python
+
+            sg = self.parent.shotgun
+            shots = sg.find(
+                "Shot",
+                [
+                    ["project", "is", self.parent.context.project],
+                    ["code", "in", [item.name() for item in items]],
+                ],
+                fields=["code"] + (kwargs.get("fields") or []),
+            )
+            shots_by_code = dict((shot["code"], shot) for shot in shots)
+            return [shots_by_code[item.name()] for item in items]
+
+        :param list items: The Hiero track items being processed. Hiero API docs
+            are available `here. <https://learn.foundry.com/hiero/developers/1.8/hieropythondevguide/api/api_core.html#hiero.core.TrackItem>`__
+        :param dict data: A dictionary with cached parent data.
+        :param session: The export session to upload thumbnails in.
+
+        :returns: A list of Shot entities, in the same order as the items.
+        :rtype: list
+        """
+        raise NotImplementedError
+
     def get_shot_parent(self, hiero_sequence, data, **kwargs):
         """
         Given a Hiero sequence and data cache, return the corresponding entity
         in Shotgun to serve as the parent for contained Shots.
 
-        .. note:: The data dict is typically the app's `preprocess_data` which
-            maintains the cache across invocations of this hook.
+        .. note:: The data dict is typically the data of the app's current
+            export session, which maintains the cache across invocations of
+            this hook for the duration of the export.
 
         :param hiero_sequence: A Hiero sequence object. Hiero API docs are
             available `here. <https://learn.foundry.com/hiero/developers/1.8/hieropythondevguide/api/api_core.html#hiero.core.Sequence>`__
         :param dict data: A dictionary with cached parent data.
+        :param session: The export session to upload thumbnails in.
 
         :returns: A Shotgun entity.
         :rtype: dict
@@ -29,6 +29,8 @@ class HieroResolveCustomStrings(HookBaseClass):
         :param task: The export task being processed. Hiero API docs are
             available `here. <https://learn.foundry.com/hiero/developers/1.8/hieropythondevguide/api/api_core.html#hiero.core.TaskBase>`__
         :param str keyword: The keyword token that needs to be resolved.
+        :param session: The export session the token is resolved for. The
+            task may not be a Toolkit task, so it can't always provide it.
 
         :returns: The resolved keyword value to be replaced into the
             associated string.
@@ -63,7 +63,43 @@ class HieroUpdateCuts(HookBaseClass):
         """
         raise NotImplementedError
 
-    def get_cut_thumbnail(self, cut, task_item, preset_properties):
+    def create_cut_items(self, cut_item_data_list, preset_properties):
+        """
+        Batch variant of :meth:`create_cut_item`. Handles the creation of a
+        list of CutItem entities in Shotgun.
+
+        Raising ``NotImplementedError`` causes the app to fall back to calling
+        :meth:`create_cut_item` once per CutItem. The default implementation
+        does so when :meth:`create_cut_item` has been overridden, so that
+        customizations made there are always honored.
+
+        Example Implementation:
+
+        .. code-block:: python
+
+            requests = [
+                {
+                    "request_type": "create",
+                    "entity_type": "CutItem",
+                    "data": cut_item_data,
+                }
+                for cut_item_data in cut_item_data_list
+            ]
+            return self.parent.sgtk.shotgun.batch(requests)
+
+        :param list cut_item_data_list: A list of dictionaries of field/value
+            pairs, one per CutItem entity to create in Shotgun.
+        :param dict preset_properties: The export preset's properties
+            dictionary.
+
+        :returns: A list containing the created CutItem entity dictionary,
+            or None if no CutItem entity was created, for each item of
+            ``cut_item_data_list``.
+        :rtype: list
+        """
+        raise NotImplementedError
+
+    def get_cut_thumbnail(self, cut, task_item, preset_properties, session=None):
         """
         Gets the path to a thumbnail image to use when updating the
         export's associated Cut's thumbnail image. If None is returned
@@ -75,6 +111,8 @@ class HieroUpdateCuts(HookBaseClass):
             task. Hiero API docs are available `here. <https://learn.foundry.com/hiero/developers/1.8/hieropythondevguide/api/api_core.html#hiero.core.TrackItem>`__
         :param dict preset_properties: The export preset's properties
             dictionary.
+        :param session: The export session of the task, to decode the
+            thumbnail in.
 
         :returns: The path to the thumbnail image, or None if no thumbnail
             is to be uploaded to Shotgun.
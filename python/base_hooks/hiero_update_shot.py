@@ -80,3 +80,48 @@ class HieroUpdateShot(HookBaseClass):
             dictionary.
         """
         raise NotImplementedError
+
+    def update_shot_entities(self, entity_type, entity_updates, preset_properties):
+        """
+        Batch variant of :meth:`update_shotgun_shot_entity`. Handles updating
+        a list of Shot entities in Shotgun with the data produced during the
+        export.
+
+        Raising ``NotImplementedError`` causes the app to fall back to calling
+        :meth:`update_shotgun_shot_entity` once per entity. The default
+        implementation does so when :meth:`update_shotgun_shot_entity` has been
+        overridden, so that customizations made there are always honored.
+
+        Example Implementation:
+
+        .. code-block:: python
+
+            requests = []
+            for entity_id, entity_data in entity_updates:
+                # If the custom bool property is False, we don't update the
+                # sg_cut_in field on the Shot entity.
+                if not preset_properties.get("custom_update_cut_in_property", True):
+                    del entity_data["sg_cut_in"]
+
+                requests.append(
+                    {
+                        "request_type": "update",
+                        "entity_type": entity_type,
+                        "entity_id": entity_id,
+                        "data": entity_data,
+                    }
+                )
+
+            return self.parent.sgtk.shotgun.batch(requests)
+
+        :param str entity_type: The entity type to update.
+        :param list entity_updates: A list of ``(entity_id, entity_data)``
+            tuples, one per entity to update.
+        :param dict preset_properties: The export preset's properties
+            dictionary.
+
+        :returns: A list of the updated entities, in the same order as the
+            updates.
+        :rtype: list
+        """
+        raise NotImplementedError
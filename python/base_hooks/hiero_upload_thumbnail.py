@@ -28,5 +28,7 @@ class HieroUploadThumbnail(HookBaseClass):
         :param source: The Hiero source sequence object being exported.
         :param item: The Hiero task item being processed.
         :param task: The Hiero task being processed.
+        :param session: The export session of the task, to decode the frames
+            and queue the upload in.
         """
         pass
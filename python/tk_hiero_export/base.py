@@ -10,8 +10,6 @@
 
 import os
 import sys
-import shutil
-import time
 import collections
 
 import hiero.core
@@ -23,13 +21,28 @@ from hiero.ui.FnUIProperty import UIPropertyFactory
 import tank
 from tank.platform.qt import QtGui, QtCore
 
-from . import HieroCustomizeExportUI
+from . import (
+    HieroCustomizeExportUI,
+    HieroGetShot,
+    HieroUpdateCuts,
+)
+from .batch_hooks import execute_batch_hook_method, update_shot_entities
 
 
 class ShotgunHieroObjectBase(object):
     """Base class to make the Hiero classes app aware."""
 
     _app = None
+    _session = None
+    _holds_session = False
+
+    # the key of the task's item in the export manifest, and whether the
+    # task was skipped because its item hasn't changed since the last export
+    _manifest_key = None
+    _export_skipped = False
+
+    # the key of the task's work in the export journal
+    _journal_key = None
 
     @classmethod
     def setApp(cls, app):
@@ -39,6 +52,115 @@ class ShotgunHieroObjectBase(object):
     def app(self):
         return self._app
 
+    @property
+    def session(self):
+        """
+        The export session this object belongs to. This is the session the
+        task was handed by the shot processor, or the app's current session
+        for objects that were never handed one.
+        """
+        if self._session is not None:
+            return self._session
+        return getattr(self.app, "export_session", None)
+
+    def acquireSession(self, session):
+        """
+        Hands the export session to this task.
+
+        This is called by the shot processor before the task is queued. The
+        session is closed, flushing its pending writes, once all of the tasks
+        it was handed to have released it.
+
+        :param session: The :class:`ExportSession` of the export.
+        """
+        self._session = session
+        self._holds_session = True
+        session.acquire()
+
+    def releaseSession(self):
+        """
+        Releases the export session, if this task was handed one. This should
+        be called once the task won't queue any more writes.
+        """
+        if self._holds_session:
+            self._holds_session = False
+            self._session.release()
+
+    def skipExport(self):
+        """
+        Marks the task as having nothing to do, either because its item hasn't
+        changed since it was last exported or because the export being resumed
+        already did the task's work. Must be called before the task starts.
+        """
+        self._export_skipped = True
+
+    def _update_manifest(self, failed=False):
+        """
+        Drops the item of this task from the export manifest if the task
+        failed, so that the item is exported again by the next incremental
+        export. The export is marked as failed as well, so that its journal is
+        kept for it to be resumed.
+
+        :param bool failed: Whether the task failed without reporting an error,
+            by raising an exception.
+        """
+        if not (failed or self.error()) or self.session is None:
+            return
+
+        self.session.failed = True
+        manifest = getattr(self.session, "manifest", None)
+        if manifest is not None and self._manifest_key is not None:
+            manifest.discard(self._manifest_key)
+
+    def _get_journaled_entity(self, name):
+        """
+        Returns the entity the export being resumed already created for this
+        task, so that it isn't created again.
+
+        :param str name: The name the entity was recorded with.
+
+        :returns: The entity, or None if it hasn't been created.
+        :rtype: dict
+        """
+        journal = getattr(self.session, "journal", None)
+        if journal is None or self._journal_key is None:
+            return None
+        return journal.get_entity(self._journal_key, name)
+
+    def _journal_entity(self, name, entity):
+        """
+        Records an entity created for this task in the export journal.
+
+        :param str name: The name to record the entity with.
+        :param dict entity: The entity that was created.
+        """
+        journal = getattr(self.session, "journal", None)
+        if journal is not None and self._journal_key is not None:
+            journal.record_entity(self._journal_key, name, entity)
+
+    def _journal_done(self, **data):
+        """
+        Records in the export journal that this task's work is done, unless the
+        task failed.
+
+        :param data: Anything else worth recording.
+        """
+        journal = getattr(self.session, "journal", None)
+        if journal is not None and self._journal_key is not None and not self.error():
+            journal.record_done(self._journal_key, **data)
+
+    def _journal_done_deferred(self, entity, **data):
+        """
+        Records in the export journal that this task's work is done once the
+        update it queued for an entity has been written.
+
+        :param dict entity: The entity the task queued an update for.
+        :param data: Anything else worth recording.
+        """
+        journal = getattr(self.session, "journal", None)
+        if journal is not None and self._journal_key is not None:
+            journal.record_done_deferred(self._journal_key, entity, **data)
+
     def _get_custom_properties(self, get_method):
         """
         Gets a list of custom property descriptions from the customize_export_ui
@@ -162,41 +284,163 @@ class ShotgunHieroObjectBase(object):
 
     def _upload_thumbnail_to_sg(self, sg_entity, thumb_qimage):
         """
-        Updates the thumbnail for an entity in Shotgun
-        """
-        import tempfile
-        import uuid
+        Updates the thumbnail for an entity in Shotgun.
+
+        The thumbnail is encoded right away and uploaded in the background.
+        The export session waits for the upload once the export has finished.
 
-        thumbdir = tempfile.mkdtemp(prefix="hiero_process_thumbnail_")
+        :param dict sg_entity: The entity to upload the thumbnail for.
+        :param thumb_qimage: The thumbnail as a QImage.
+
+        :returns: A handle to wait on the upload with, or None if the
+            thumbnail couldn't be encoded.
+        :rtype: :class:`UploadHandle`
+        """
         try:
-            path = "%s.png" % os.path.join(thumbdir, sg_entity.get("name", "thumbnail"))
-            # scale it down to 600px wide
-            thumb_qimage_scaled = thumb_qimage.scaledToWidth(
-                600, QtCore.Qt.SmoothTransformation
-            )
-            thumb_qimage_scaled.save(path)
             self.app.log_debug(
-                "Uploading thumbnail for %s %s..."
+                "Queueing thumbnail upload for %s %s..."
                 % (sg_entity["type"], sg_entity["id"])
             )
-            self.app.shotgun.upload_thumbnail(sg_entity["type"], sg_entity["id"], path)
+            return self.session.thumbnail_uploader.upload(sg_entity, thumb_qimage)
         except Exception as e:
             self.app.log_info(
                 "Thumbnail for %s %s (#%s) was not refreshed in Flow Production Tracking: %s"
                 % (sg_entity["type"], sg_entity.get("name"), sg_entity["id"], e)
             )
-        finally:
-            # Sometimes Windows holds on to the temporary thumbnail file longer than expected which
-            # can cause an exception here. If we wait a second and try again, this usually solves
-            # the issue.
-            try:
-                shutil.rmtree(thumbdir)
-            except Exception:
-                self.parent.log_error(
-                    "Error removing temporary thumbnail file, trying again."
-                )
-                time.sleep(1.0)
-                shutil.rmtree(thumbdir)
+
+    def _execute_batch_hook_method(self, hook_name, method_name, base_class, **kwargs):
+        """
+        Executes a batch variant hook method.
+
+        Batch hook methods may raise ``NotImplementedError`` to signal that the
+        caller should fall back to the equivalent per-item hook method. This is
+        also the case when the configured hook predates the batch method.
+
+        :param str hook_name: The name of the hook setting.
+        :param str method_name: The name of the batch hook method to call.
+        :param base_class: The base class of the hook.
+
+        :returns: A tuple of ``(True, result)`` if the batch method handled the
+            call, ``(False, None)`` if the caller needs to fall back.
+        :rtype: tuple
+        """
+        return execute_batch_hook_method(
+            self.app, hook_name, method_name, base_class, **kwargs
+        )
+
+    def _get_shots(self, tasks, items, data, **kwargs):
+        """
+        Gets the Shots for the supplied track items from the get_shot hook,
+        using its batch method when available.
+
+        :param list tasks: The tasks the items are being processed for.
+        :param list items: The hiero.core.TrackItems to get Shots for.
+        :param dict data: The export's data cache.
+
+        :returns: A list of Shot entities, in the same order as the items.
+        :rtype: list
+        """
+        kwargs.setdefault("session", self.session)
+        handled, shots = self._execute_batch_hook_method(
+            "hook_get_shot",
+            "get_shots",
+            HieroGetShot,
+            items=items,
+            data=data,
+            tasks=tasks,
+            **kwargs
+        )
+        if handled:
+            return shots
+
+        return [
+            self.app.execute_hook(
+                "hook_get_shot",
+                task=task,
+                item=item,
+                data=data,
+                base_class=HieroGetShot,
+                **kwargs
+            )
+            for (task, item) in zip(tasks, items)
+        ]
+
+    def _update_shot_entities(self, entity_type, entity_updates, preset_properties):
+        """
+        Updates the supplied Shot entities via the update_shot hook, using its
+        batch method when available.
+
+        :param str entity_type: The entity type to update.
+        :param list entity_updates: A list of ``(entity_id, entity_data)``
+            tuples, one per entity to update.
+        :param dict preset_properties: The export preset's properties.
+        """
+        update_shot_entities(self.app, entity_type, entity_updates, preset_properties)
+
+    def _create_cut_items(self, cut_item_data_list, preset_properties):
+        """
+        Creates CutItems via the update_cuts hook, using its batch method when
+        available.
+
+        :param list cut_item_data_list: A list of CutItem data dictionaries.
+        :param dict preset_properties: The export preset's properties.
+
+        :returns: A list containing the created CutItem, or None if the hook
+            didn't create one, for each item of ``cut_item_data_list``.
+        :rtype: list
+        """
+        handled, cut_items = self._execute_batch_hook_method(
+            "hook_update_cuts",
+            "create_cut_items",
+            HieroUpdateCuts,
+            cut_item_data_list=cut_item_data_list,
+            preset_properties=preset_properties,
+        )
+        if handled:
+            return cut_items
+
+        return [
+            self.app.execute_hook_method(
+                "hook_update_cuts",
+                "create_cut_item",
+                cut_item_data=cut_item_data,
+                preset_properties=preset_properties,
+                base_class=HieroUpdateCuts,
+            )
+            for cut_item_data in cut_item_data_list
+        ]
+
+    def _register_publish(self, args, extra_data=None, callback=None):
+        """
+        Registers a publish for this task. If the task was handed an export
+        session, the publish is queued and created along with the other
+        publishes of the export. Otherwise it is registered right away.
+
+        :param dict args: The arguments to call ``register_publish`` with.
+        :param dict extra_data: Additional fields to set on the publish, as
+            returned by the get_extra_publish_data hook. May be None.
+        :param callback: An optional callable taking the publish entity,
+            called once the publish has been created.
+        """
+        from .publish_queue import PublishQueue
+
+        if self._holds_session:
+            publishes = self.session.publishes
+        else:
+            publishes = PublishQueue(self.app, 0)
+        publishes.register(args, extra_data, callback)
+
+    def _get_default_task(self, entity):
+        """
+        Returns the Task matching the ``default_task_filter`` setting for the
+        supplied entity, using the export session's shared task resolver.
+
+        :param dict entity: The entity dictionary.
+
+        :returns: The Task entity, or None.
+        :rtype: dict
+        """
+        return self.session.task_resolver.get_task(entity)
 
     def _cutsSupported(self):
         """Returns True if the site has Cut support, False otherwise."""
@@ -0,0 +1,79 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from tank.errors import TankHookMethodDoesNotExistError
+
+from . import HieroUpdateShot
+
+
+def execute_batch_hook_method(app, hook_name, method_name, base_class, **kwargs):
+    """
+    Executes a batch variant hook method.
+
+    Batch hook methods may raise ``NotImplementedError`` to signal that the
+    caller should fall back to the equivalent per-item hook method. This is
+    also the case when the configured hook predates the batch method.
+
+    :param app: The app instance.
+    :param str hook_name: The name of the hook setting.
+    :param str method_name: The name of the batch hook method to call.
+    :param base_class: The base class of the hook.
+
+    :returns: A tuple of ``(True, result)`` if the batch method handled the
+        call, ``(False, None)`` if the caller needs to fall back.
+    :rtype: tuple
+    """
+    try:
+        result = app.execute_hook_method(
+            hook_name, method_name, base_class=base_class, **kwargs
+        )
+    except (NotImplementedError, TankHookMethodDoesNotExistError):
+        app.log_debug(
+            "The '%s' hook doesn't implement '%s'. Falling back to the "
+            "per-item hook method." % (hook_name, method_name)
+        )
+        return (False, None)
+
+    return (True, result)
+
+
+def update_shot_entities(app, entity_type, entity_updates, preset_properties):
+    """
+    Updates the supplied Shot entities via the update_shot hook, using its
+    batch method when available.
+
+    :param app: The app instance.
+    :param str entity_type: The entity type to update.
+    :param list entity_updates: A list of ``(entity_id, entity_data)``
+        tuples, one per entity to update.
+    :param dict preset_properties: The export preset's properties.
+    """
+    handled, _ = execute_batch_hook_method(
+        app,
+        "hook_update_shot",
+        "update_shot_entities",
+        HieroUpdateShot,
+        entity_type=entity_type,
+        entity_updates=entity_updates,
+        preset_properties=preset_properties,
+    )
+    if handled:
+        return
+
+    for entity_id, entity_data in entity_updates:
+        app.execute_hook_method(
+            "hook_update_shot",
+            "update_shotgun_shot_entity",
+            entity_type=entity_type,
+            entity_id=entity_id,
+            entity_data=entity_data,
+            preset_properties=preset_properties,
+            base_class=HieroUpdateShot,
+        )
@@ -0,0 +1,147 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import collections
+
+
+class BoundedCache(object):
+    """
+    A least recently used cache holding at most a fixed number of entries.
+    The cache can also be bounded by the total cost, typically the memory
+    footprint, of its entries.
+
+    The cache keeps track of its hits and misses so that its effectiveness
+    can be reported at the end of an export.
+    """
+
+    def __init__(self, name, max_size, max_cost=None):
+        """
+        :param str name: The name of the cache, used when reporting.
+        :param int max_size: The maximum number of entries to hold.
+        :param int max_cost: The maximum total cost of the entries to hold.
+            The cost is unbounded if None.
+        """
+        self._name = name
+        self._max_size = max(1, max_size)
+        self._max_cost = max_cost
+        self._entries = collections.OrderedDict()
+
+        # key -> cost, for the entries that have one
+        self._costs = {}
+        self.cost = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def name(self):
+        """The name of the cache."""
+        return self._name
+
+    def get(self, key, default=None):
+        """
+        Returns the value cached for the key, or the default if there is none.
+
+        :param key: The key to look up.
+        :param default: The value to return if the key is not cached.
+        """
+        if key not in self._entries:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        value = self._entries.pop(key)
+        self._entries[key] = value
+        return value
+
+    def peek(self, key, default=None):
+        """
+        Returns the value cached for the key, or the default if there is none,
+        without counting the lookup or refreshing the entry.
+
+        :param key: The key to look up.
+        :param default: The value to return if the key is not cached.
+        """
+        return self._entries.get(key, default)
+
+    def get_or_create(self, key, create):
+        """
+        Returns the value cached for the key. If there is none, the value is
+        created by calling ``create`` and cached.
+
+        :param key: The key to look up.
+        :param create: A callable taking no arguments that returns the value
+            for the key.
+        """
+        if key in self._entries:
+            return self.get(key)
+
+        self.misses += 1
+        value = create()
+        self.set(key, value)
+        return value
+
+    def set(self, key, value, cost=0):
+        """
+        Caches a value for the key, evicting the least recently used entries
+        if the cache is full.
+
+        :param key: The key to cache the value for.
+        :param value: The value to cache.
+        :param int cost: The cost of the entry.
+        """
+        self.pop(key)
+        self._entries[key] = value
+        if cost:
+            self._costs[key] = cost
+            self.cost += cost
+
+        # always keep the newest entry, even if it alone exceeds the cost
+        while len(self._entries) > 1 and (
+            len(self._entries) > self._max_size
+            or (self._max_cost is not None and self.cost > self._max_cost)
+        ):
+            evicted_key, _ = self._entries.popitem(last=False)
+            self.cost -= self._costs.pop(evicted_key, 0)
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        """
+        Removes the key from the cache and returns its value, or the default
+        if the key is not cached.
+        """
+        self.cost -= self._costs.pop(key, 0)
+        return self._entries.pop(key, default)
+
+    def keys(self):
+        """Returns a list of the cached keys."""
+        return list(self._entries.keys())
+
+    def clear(self):
+        """Removes all entries from the cache."""
+        self._entries.clear()
+        self._costs.clear()
+        self.cost = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __str__(self):
+        return "%s: %s entries, %s hits, %s misses, %s evictions" % (
+            self._name,
+            len(self._entries),
+            self.hits,
+            self.misses,
+            self.evictions,
+        )
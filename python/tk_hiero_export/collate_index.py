@@ -0,0 +1,107 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from .track_index import TrackIndex
+
+
+class CollateIndex(object):
+    """
+    Index of the video track items of a sequence, used to work out the items
+    that collate with an item.
+
+    The index is built once per sequence and export. Items are indexed by
+    name and, per track, by timeline range, so that finding the items that
+    collate with an item doesn't require walking every item of the sequence.
+    The collated items of each item are memoized, so the tasks of the same
+    item share a single lookup.
+    """
+
+    def __init__(self, sequence):
+        """
+        :param sequence: The hiero.core.Sequence to index.
+        """
+        self._all_items = []
+        self._tracks = []
+
+        # item guid -> (track order, position in track)
+        self._positions = {}
+
+        # name -> list of items, in sequence order
+        self._names = {}
+
+        for track_order, track in enumerate(sequence.videoTracks()):
+            items = list(track)
+            for position, item in enumerate(items):
+                self._all_items.append(item)
+                self._positions[item.guid()] = (track_order, position)
+                self._names.setdefault(item.name(), []).append(item)
+            self._tracks.append(TrackIndex(track_order, items))
+
+        # (item guid, collate time, collate name) -> collated items
+        self._groups = {}
+
+    def all_items(self):
+        """
+        Returns every video track item of the sequence, in sequence order.
+
+        :rtype: list
+        """
+        return list(self._all_items)
+
+    def collated_items(self, item, collate_time, collate_name):
+        """
+        Returns the items that collate with the supplied item, in sequence
+        order.
+
+        :param item: The hiero.core.TrackItem to collate.
+        :param bool collate_time: Whether items overlapping the item, or the
+            items sharing its name, are collated.
+        :param bool collate_name: Whether items sharing the item's name are
+            collated.
+
+        :rtype: list
+        """
+        key = (item.guid(), bool(collate_time), bool(collate_name))
+        if key not in self._groups:
+            self._groups[key] = self._find_collated_items(
+                item, collate_time, collate_name
+            )
+        return list(self._groups[key])
+
+    def _find_collated_items(self, item, collate_time, collate_name):
+        """
+        Works out the items that collate with the supplied item.
+        """
+        if not (collate_time or collate_name):
+            return []
+
+        name_matches = [item]
+        if collate_name:
+            name_matches.extend(
+                [
+                    match
+                    for match in self._names.get(item.name(), [])
+                    if match.guid() != item.guid()
+                ]
+            )
+
+        # (track order, position in track) -> item
+        collated = {}
+        for match in name_matches:
+            if collate_time:
+                match_in = match.timelineIn()
+                match_out = match.timelineOut()
+                for track in self._tracks:
+                    for position, trackitem in track.overlapping(match_in, match_out):
+                        collated[(track.track_order, position)] = trackitem
+            elif match.guid() in self._positions:
+                collated[self._positions[match.guid()]] = match
+
+        return [collated[key] for key in sorted(collated)]
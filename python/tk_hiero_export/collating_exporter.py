@@ -14,7 +14,68 @@ import math
 import hiero
 
 
+class _LazyAttribute(object):
+    """
+    An attribute of a :class:`CollatingExporter` whose value is only worked
+    out when it is first read. Reading the attribute calls the supplied
+    method of the exporter first, which sets the value if it is still
+    pending.
+    """
+
+    def __init__(self, name, ensure):
+        """
+        :param str name: The name of the attribute.
+        :param str ensure: The name of the exporter method setting the value.
+        """
+        self._name = name
+        self._key = "_lazy%s" % name
+        self._ensure = ensure
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        getattr(instance, self._ensure)()
+        try:
+            return instance.__dict__[self._key]
+        except KeyError:
+            raise AttributeError(self._name)
+
+    def __set__(self, instance, value):
+        instance.__dict__[self._key] = value
+
+
 class CollatingExporter(object):
+    # Building the collated sequence sets these, so reading any of them
+    # builds it first
+    _sequence = _LazyAttribute("_sequence", "_ensureCollatedSequence")
+    _parentSequence = _LazyAttribute("_parentSequence", "_ensureCollatedSequence")
+    _startFrame = _LazyAttribute("_startFrame", "_ensureCollatedSequence")
+    _collatedItemsMap = _LazyAttribute("_collatedItemsMap", "_ensureCollatedSequence")
+    _collatedSequenceOutputFormat = _LazyAttribute(
+        "_collatedSequenceOutputFormat", "_ensureCollatedSequence"
+    )
+    _collatedSequenceHandles = _LazyAttribute(
+        "_collatedSequenceHandles", "_ensureCollatedSequence"
+    )
+    _masterTrackItemCopy = _LazyAttribute(
+        "_masterTrackItemCopy", "_ensureCollatedSequence"
+    )
+    _collatedItemCopies = _LazyAttribute(
+        "_collatedItemCopies", "_ensureCollatedSequence"
+    )
+    _collateErrors = _LazyAttribute("_collateErrors", "_ensureCollatedSequence")
+    _collatedSequenceOffset = _LazyAttribute(
+        "_collatedSequenceOffset", "_ensureCollatedSequence"
+    )
+    _collateFrameOffset = _LazyAttribute(
+        "_collateFrameOffset", "_ensureCollatedSequence"
+    )
+
+    # The effects and annotations applying to the collated items
+    _effects = _LazyAttribute("_effects", "_ensureCollatedEffects")
+    _annotations = _LazyAttribute("_annotations", "_ensureCollatedEffects")
+
     def __init__(self, properties=None):
         # When building a collated sequence, everything is offset by 1000
         # This gives head room for shots which may go negative when transposed to a
@@ -27,6 +88,10 @@ class CollatingExporter(object):
         self._heroItem = None
         self._collatedItemsMap = {}
 
+        # What is left to build, when the task first needs it
+        self._pendingCollateProperties = None
+        self._pendingEffectItems = None
+
         self._effects = []
         self._annotations = []
         self._collatedSequenceOutputFormat = None
@@ -37,6 +102,29 @@ class CollatingExporter(object):
         # Need to keep track of the master track item for disconnected sequence export
         self._masterTrackItemCopy = None
 
+        # The copies of the collated items when collating the whole sequence,
+        # keyed by the guid of the original item
+        self._collatedItemCopies = {}
+
+        # The collate group of this task, and whether it's the whole sequence
+        self._collateGroup = None
+        self._collateWholeSequence = False
+
+        # Errors raised while building the collated sequence, replayed on the
+        # tasks sharing it
+        self._collateErrors = []
+
+        # The key of the shared collated sequence held by this task, if any
+        self._collatedSequenceKey = None
+
+        # The number of frames the collated items were moved by when building
+        # the collated sequence, and the number of frames the output of this
+        # task is moved by on top of that. The latter is only set when
+        # collating the whole sequence, whose collated sequence is offset for
+        # the hero item rather than for the item of each task.
+        self._collatedSequenceOffset = 0
+        self._collateFrameOffset = 0
+
         # Default this to True.  If the following tests fail and return early, we want it in that state.
         # Maybe it would be better to raise an exception or something?
         self._nothingToDo = True
@@ -64,31 +152,53 @@ class CollatingExporter(object):
             # Only build sequence if there are multiple shots
             if len(self._collatedItems) > 1:
                 self._collate = True
+                self._collateWholeSequence = bool(properties["collateSequence"])
+                self._collateGroup = self._collateGroupKey()
+
+                # The hero is needed up front to tell whether the task has
+                # anything to do
+                self._heroItem = _collateHero(
+                    self.session, self._collatedItems, self._collateGroup
+                )
+                self._hero = self._heroItem.guid() == self._item.guid()
 
                 if self._has_nuke_backend():
                     # Find all the effects which apply to collated items
-                    from hiero.exporters import FnEffectHelpers
-
-                    (
-                        self._effects,
-                        self._annotations,
-                    ) = FnEffectHelpers.findEffectsAnnotationsForTrackItems(
-                        self._collatedItems
-                    )
+                    self._pendingEffectItems = self._collatedItems
 
-                # Build the sequence of collated shots
-                self._buildCollatedSequence(properties)
+                # The sequence of collated shots is built the first time the
+                # task uses it, so tasks which bail out early, or only exist
+                # for a preview, never build it
+                self._pendingCollateProperties = properties
             else:
                 if self._has_nuke_backend():
                     # Find the effects which apply to this item.  Note this function expects a list.
-                    from hiero.exporters import FnEffectHelpers
+                    self._pendingEffectItems = [self._item]
 
-                    (
-                        self._effects,
-                        self._annotations,
-                    ) = FnEffectHelpers.findEffectsAnnotationsForTrackItems(
-                        [self._item]
-                    )
+    def _ensureCollatedSequence(self):
+        """
+        Builds the collated sequence of this task if it hasn't been built yet.
+        """
+        properties = getattr(self, "_pendingCollateProperties", None)
+        if properties is not None:
+            self._pendingCollateProperties = None
+            self._buildCollatedSequence(properties)
+
+    def _ensureCollatedEffects(self):
+        """
+        Finds the effects and annotations which apply to the collated items
+        if they haven't been found yet.
+        """
+        items = getattr(self, "_pendingEffectItems", None)
+        if items is not None:
+            self._pendingEffectItems = None
+
+            # the effect index of the sequence is shared by all of the tasks
+            # of the export
+            effectIndex = self.session.get_effect_index(items[0].parentSequence())
+            self._effects, self._annotations = effectIndex.effects_and_annotations(
+                items
+            )
 
     def _offsetTimelineLinked(self, trackItem, offset):
         """
@@ -125,69 +235,141 @@ class CollatingExporter(object):
         Build and return list of collated shots, the CollateTracks option includes overlapping and identically named shots.
         CollateSequence Option includes all shots in parent sequence.
         """
-        collatedItems = []
-
         collateTime = properties["collateTracks"]
         collateName = properties["collateShotNames"]
 
+        # the index of the sequence is shared by all of the tasks of the
+        # export, so each lookup only considers the items that can match.
+        collateIndex = self.session.get_collate_index(self._sequence)
+
         if properties["collateSequence"]:
             # Add all trackitems to collate list
-            for track in self._sequence.videoTracks():
-                for trackitem in track:
-                    collatedItems.append(trackitem)
-
-        elif collateName or collateTime:
-            nameMatches = [self._item]
-            orderedMatches = []
-
-            if collateName:
-                # The collate tracks option will detect any trackitems on other tracks which overlap
-                # so they can be included in the nuke script.
-                for track in self._sequence.videoTracks():
-                    for trackitem in track:
-                        if trackitem is not self._item:
-                            # Collate if shot name matches.
-                            if trackitem.name() == self._item.name():
-                                nameMatches.append(trackitem)
-                                continue
-            for track in self._sequence.videoTracks():
-                for trackitem in track:
-                    for nameMatchTrackItem in nameMatches:
-                        if collateTime:
-                            # Starts before or at same time
-                            if (
-                                trackitem.timelineIn()
-                                <= nameMatchTrackItem.timelineIn()
-                            ):
-                                # finishes after start
-                                if (
-                                    trackitem.timelineOut()
-                                    >= nameMatchTrackItem.timelineIn()
-                                ):
-                                    orderedMatches.append(trackitem)
-                                    break
-                            elif (
-                                trackitem.timelineIn() > nameMatchTrackItem.timelineIn()
-                            ):
-                                # Starts before end
-                                if (
-                                    trackitem.timelineIn()
-                                    < nameMatchTrackItem.timelineOut()
-                                ):
-                                    orderedMatches.append(trackitem)
-                                    break
-                        elif trackitem == nameMatchTrackItem:
-                            orderedMatches.append(trackitem)
-                            break
-            collatedItems = orderedMatches
-        return collatedItems
+            return collateIndex.all_items()
+
+        return collateIndex.collated_items(self._item, collateTime, collateName)
+
+    def _collateGroupKey(self):
+        """
+        Returns the key identifying the collate group of this task. When
+        collating the whole sequence, every task shares the same group, which
+        is identified by the sequence alone.
+        """
+        if self._collateWholeSequence:
+            return ("sequence", self._sequence.guid())
+        return tuple(item.guid() for item in self._collatedItems)
+
+    def _collateOffset(self, properties, item):
+        """
+        Returns the number of frames the collated items are moved by on a
+        collated sequence offset for the supplied item.
+        """
+        # If outputting sequence time, we want the items to remain where they
+        # are on the sequence
+        if self._has_nuke_backend() and self.outputSequenceTime():
+            return 0
+
+        if self._startFrame is None:
+            return item.sourceIn() - item.timelineIn()
+
+        # To make sure that when the shot is expanded to include handles the
+        # custom start frame is still the first frame, the start frame is
+        # offset by the in-handle size
+        startFrame = self._startFrame
+        if properties["collateCustomStart"] and self._cutHandles is not None:
+            startFrame += self._cutHandles
+
+        # The offset required to shift the timeline position to the custom
+        # start frame.
+        return startFrame - item.timelineIn()
 
     def _buildCollatedSequence(self, properties):
         """
         Build a sequence form a list of collated items.
 
+        The collated sequence is shared by all of the tasks exporting the same
+        shot with the same collate settings, so it is only built by the first
+        of them. The others reuse it read-only, and it is released once the
+        last of them has finished.
+
+        When collating the whole sequence, the collated sequence is built once
+        for the whole collate group, offset for the hero item, and shared by
+        all of the tasks of the sequence. Each task keeps the offset of its own
+        item relative to the hero's, which its output range and frames are
+        moved by. See :meth:`collatedFrameOffset`.
+        """
+        key = self._collatedSequenceCacheKey(properties)
+        state = self.session.acquire_collated_sequence(
+            key, lambda: self._buildCollatedSequenceState(properties)
+        )
+        self._collatedSequenceKey = key
+
+        if state["_sequence"] is not self._sequence:
+            # built by another task, adopt its results
+            for attribute, value in state.items():
+                setattr(self, attribute, value)
+            for error in self._collateErrors:
+                self.setError(error)
+
+            if self._collateWholeSequence:
+                # The sequence may have been built for another item, so pick
+                # the copy of this task's own item out of it
+                self._masterTrackItemCopy = self._collatedItemCopies.get(
+                    self._item.guid()
+                )
+
+        if self._collateWholeSequence:
+            self._collateFrameOffset = (
+                self._collateOffset(properties, self._item)
+                - self._collatedSequenceOffset
+            )
+
+        # This flag indicates that an explicit start frame has been specified
+        # To make sure that when the shot is expanded to include handles this is still the first
+        # frame, here we offset the start frame by the in-handle size
+        if (
+            self._startFrame is not None
+            and properties["collateCustomStart"]
+            and self._cutHandles is not None
+            and not (self._has_nuke_backend() and self.outputSequenceTime())
+        ):
+            self._startFrame += self._cutHandles
+
+    def _collatedSequenceCacheKey(self, properties):
+        """
+        Returns the key the collated sequence of this task is shared by. This
+        covers everything the collated sequence built for the task depends on.
+        When collating the whole sequence, this leaves out the item and the
+        start frame of the task, since the collated sequence is built for the
+        hero item.
+        """
+        outputSequenceTime = False
+        if self._has_nuke_backend():
+            outputSequenceTime = bool(self.outputSequenceTime())
+
+        if self._collateWholeSequence:
+            item, startFrame = None, None
+        else:
+            item, startFrame = self._item.guid(), self._startFrame
+
+        return (
+            self._sequence.guid(),
+            item,
+            self._collateGroup,
+            startFrame,
+            self._cutHandles,
+            bool(properties["collateCustomStart"]),
+            outputSequenceTime,
+        )
+
+    def _buildCollatedSequenceState(self, properties):
+        """
+        Builds the collated sequence for this task.
+
         Delegates to the appropriate logic based on the current version of
         Hiero.
+
+        :returns: A dictionary of the attributes set by the build, to be
+            shared with the other tasks of the shot.
         """
 
         if self._has_nuke_backend():
@@ -197,6 +379,20 @@ class CollatingExporter(object):
             # pre-nuke Hiero
             self._buildCollatedSequence_legacy(properties)
 
+        return dict(
+            (attribute, getattr(self, attribute))
+            for attribute in _SHARED_COLLATE_ATTRIBUTES
+        )
+
+    def releaseCollatedSequence(self):
+        """
+        Releases the collated sequence shared with the other tasks of the
+        shot, if this task holds one.
+        """
+        if self._collatedSequenceKey is not None:
+            self.session.release_collated_sequence(self._collatedSequenceKey)
+            self._collatedSequenceKey = None
+
     def _buildCollatedSequence_legacy(self, properties):
         """
         From the list of collated Items build a sequence, extend edge shots for
@@ -207,15 +403,8 @@ class CollatingExporter(object):
         if not self._collate or not self._collatedItems:
             return
 
-        # Hero item for a collated sequence is the first one on the highest track
-        def keyFunc(item):
-            return (
-                (sys.maxsize - item.timelineIn()) * 1000
-            ) + item.parent().trackIndex()
-
-        heroItem = max(self._collatedItems, key=keyFunc)
-        self._hero = heroItem.guid() == self._item.guid()
-        self._heroItem = heroItem
+        heroItem = self._heroItem
+        offsetItem = heroItem if self._collateWholeSequence else self._item
 
         # Build a new sequence from the collated items
         newSequence = hiero.core.Sequence(self._item.name())
@@ -231,16 +420,8 @@ class CollatingExporter(object):
         # Note: Without correct framerate, audio comes out silent when manually exporting the sequence.
         newSequence.setFramerate(self._clip.framerate())
 
-        offset = self._item.sourceIn() - self._item.timelineIn()
-        if self._startFrame is not None:
-            # This flag indicates that an explicit start frame has been specified
-            # To make sure that when the shot is expanded to include handles this is still the first
-            # frame, here we offset the start frame by the in-handle size
-            if properties["collateCustomStart"] and self._cutHandles is not None:
-                self._startFrame += self._cutHandles
-
-            # The offset required to shift the timeline position to the custom start frame.
-            offset = self._startFrame - self._item.timelineIn()
+        offset = self._collateOffset(properties, offsetItem)
+        self._collatedSequenceOffset = offset
 
         sequenceIn, sequenceOut = sys.maxsize, 0
         for trackitem in self._collatedItems:
@@ -340,6 +521,7 @@ class CollatingExporter(object):
                     )
                 )
                 self.setError(error)
+                self._collateErrors.append(error)
                 hiero.core.log.error(error)
                 hiero.core.log.error(str(e))
 
@@ -392,15 +574,8 @@ class CollatingExporter(object):
         from hiero.exporters.FnNukeShotExporter import NukeShotExporter
         import hiero.core.nuke as nuke
 
-        # Hero item for a collated sequence is the first one on the highest track
-        def keyFunc(item):
-            return (
-                (sys.maxsize - item.timelineIn()) * 1000
-            ) + item.parent().trackIndex()
-
-        heroItem = max(self._collatedItems, key=keyFunc)
-        self._hero = heroItem.guid() == self._item.guid()
-        self._heroItem = heroItem
+        heroItem = self._heroItem
+        offsetItem = heroItem if self._collateWholeSequence else self._item
 
         # When building a collated sequence, everything is offset by 1000
         # This gives head room for shots which may go negative when transposed to a
@@ -414,21 +589,8 @@ class CollatingExporter(object):
         for tag in self._sequence.tags():
             newSequence.addTag(hiero.core.Tag(tag))
 
-        # If outputting sequence time, we want the items to remain where they are on the sequence, offset should be 0
-        if self.outputSequenceTime():
-            offset = 0
-        else:
-            offset = self._item.sourceIn() - self._item.timelineIn()
-            if self._startFrame is not None:
-                # This flag indicates that an explicit start frame has been specified
-                # To make sure that when the shot is expanded to include handles this is still the first
-                # frame, here we offset the start frame by the in-handle size
-                if properties["collateCustomStart"] and self._cutHandles is not None:
-                    # if  self._preset.properties()["collateCustomStart"]:
-                    self._startFrame += self._cutHandles
-
-                # The offset required to shift the timeline position to the custom start frame.
-                offset = self._startFrame - self._item.timelineIn()
+        offset = self._collateOffset(properties, offsetItem)
+        self._collatedSequenceOffset = offset
 
         # Copy the sequence properties.  Timecode start is offset so that track items have
         # the same timecode at their shifted timeline in.
@@ -475,6 +637,7 @@ class CollatingExporter(object):
         handleOutAdjustments = {}
 
         linkedEffects = []
+        effectIndex = self.session.get_effect_index(self._sequence)
 
         for trackitem in self._collatedItems:
             parentTrack = trackitem.parentTrack()
@@ -501,6 +664,8 @@ class CollatingExporter(object):
             # Need to keep track of the master track item for disconnected sequence exports
             if trackitem == self._item:
                 self._masterTrackItemCopy = trackItemCopy
+            if self._collateWholeSequence:
+                self._collatedItemCopies[trackitem.guid()] = trackItemCopy
 
             # When writing a collated sequence, if any track items have their reformat state set to disabled,
             # use the largest source media format as the output format for the sequence.
@@ -584,6 +749,7 @@ class CollatingExporter(object):
                     )
                 )
                 self.setError(error)
+                self._collateErrors.append(error)
                 hiero.core.log.error(error)
                 hiero.core.log.error(str(e))
 
@@ -609,7 +775,7 @@ class CollatingExporter(object):
             newTrack = newTracks[parentTrack.guid()]
             unusedNewTracks.discard(newTrack)
 
-            subTrackIndex = _subTrackIndex(subTrackItem)
+            subTrackIndex = effectIndex.subtrack_index(subTrackItem)
 
             subTrackItemCopy = subTrackItem.copy()
             inAdjustment = handleInAdjustments.get(subTrackItem, 0)
@@ -673,8 +839,26 @@ class CollatingExporter(object):
     def heroItem(self):
         return self._heroItem
 
+    def collatedFrameOffset(self):
+        """
+        Returns the number of frames the output of this task is moved by
+        relative to the collated sequence it shares. This is only ever set when
+        collating the whole sequence, where the shared collated sequence is
+        offset for the hero item. Moving the frames read from it by this offset
+        numbers them as if it had been offset for the item of the task.
+
+        :rtype: int
+        """
+        if not self._collate:
+            return 0
+        return self._collateFrameOffset
+
     def finishTask(self):
+        # Nothing will use the collated sequence anymore
+        self._pendingCollateProperties = None
+        self._pendingEffectItems = None
         self._parentSequence = None
+        self.releaseCollatedSequence()
 
     def collatedOutputRange(
         self,
@@ -695,13 +879,13 @@ class CollatingExporter(object):
                 end += self._startFrame
 
             try:
-                start = self._sequence.inTime()
+                start = self._sequence.inTime() + self.collatedFrameOffset()
             except RuntimeError:
                 # This is fine, no in time set
                 pass
 
             try:
-                end = self._sequence.outTime()
+                end = self._sequence.outTime() + self.collatedFrameOffset()
             except RuntimeError:
                 # This is fine, no out time set
                 pass
@@ -765,6 +949,42 @@ class CollatingExporter(object):
         return self._has_nuke
 
 
+# The attributes set by building a collated sequence, shared by the tasks of
+# the same shot
+_SHARED_COLLATE_ATTRIBUTES = (
+    "_collatedItemsMap",
+    "_collatedSequenceOutputFormat",
+    "_collatedSequenceHandles",
+    "_masterTrackItemCopy",
+    "_collatedItemCopies",
+    "_collateErrors",
+    "_collatedSequenceOffset",
+    "_parentSequence",
+    "_sequence",
+)
+
+
+def _heroKey(item):
+    """
+    Sort key of the items of a collate group. The hero item of a collated
+    sequence is the first one on the highest track.
+    """
+    return ((sys.maxsize - item.timelineIn()) * 1000) + item.parent().trackIndex()
+
+
+def _collateHero(session, items, group=None):
+    """
+    Returns the hero item of a collate group. The hero is worked out once per
+    group and export, and shared by all of the tasks collating the group.
+
+    :param session: The :class:`ExportSession` of the export.
+    :param list items: The items of the collate group.
+    :param group: The key identifying the group. Defaults to the guids of the
+        items.
+    """
+    return session.get_collate_hero(items, _heroKey, group)
+
+
 def _clone_item(item):
     """
     Older versions of hiero use clone() but it's deprecated in nukestudio in
@@ -779,17 +999,6 @@ def _clone_item(item):
         return item.clone()
 
 
-def _subTrackIndex(subTrackItem):
-    """
-    Helper function to get the subtrack index for a subtrack item.
-    TODO Should this go in the API?
-    """
-    track = subTrackItem.parentTrack()
-    for index, subTrackItems in enumerate(track.subTrackItems()):
-        if subTrackItem in subTrackItems:
-            return index
-
-
 class CollatedShotPreset(object):
     def __init__(self, properties):
         properties["collateTracks"] = False
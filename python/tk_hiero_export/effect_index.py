@@ -0,0 +1,110 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import hiero
+
+from .track_index import TrackIndex
+
+
+class EffectIndex(object):
+    """
+    Index of the soft effects and annotations of a sequence.
+
+    The index is built once per sequence and export. The effects and
+    annotations of each video track are indexed by timeline range, so finding
+    the ones that apply to an item doesn't require walking every sub-track
+    item of the sequence. The sub-track index of every sub-track item is
+    worked out up front as well.
+
+    The lookup replaces ``FnEffectHelpers.findEffectsAnnotationsForTrackItems``
+    from Hiero's exporters, which walks every sub-track item of the sequence
+    for each item. An effect or annotation applies to an item when it sits on
+    the item's track or a track above it, and its timeline range overlaps the
+    item's, both ends included. Effects linked to a track item are left out,
+    since they're copied along with the item they're linked to. The results
+    differ from Hiero's in that:
+
+    - Each effect and annotation is returned once, ordered by track and then
+      by sub-track, rather than in the order it's found for each item.
+    - The index is a snapshot of the sequence when it was built, so effects
+      added to the sequence during the export aren't picked up.
+    """
+
+    def __init__(self, sequence):
+        """
+        :param sequence: The hiero.core.Sequence to index.
+        """
+        self._tracks = []
+
+        # sub-track item -> index of its sub-track
+        self._subtrack_indexes = {}
+
+        for track_order, track in enumerate(sequence.videoTracks()):
+            items = []
+            for subtrack_index, subtrack_items in enumerate(track.subTrackItems()):
+                for item in subtrack_items:
+                    self._subtrack_indexes[item] = subtrack_index
+
+                    # effects linked to a track item are copied along with the
+                    # item they're linked to
+                    if item.linkedItems():
+                        continue
+                    items.append(item)
+            self._tracks.append(TrackIndex(track_order, items))
+
+    def effects_and_annotations(self, items):
+        """
+        Returns the effects and annotations which apply to the supplied track
+        items. These are the ones on the same track as an item, or on a track
+        above it, that overlap the item's timeline range.
+
+        :param list items: The hiero.core.TrackItems to find the effects and
+            annotations of.
+
+        :returns: A tuple of the list of effects and the list of annotations,
+            each in sequence order.
+        :rtype: tuple
+        """
+        # (track order, position in track) -> sub-track item
+        found = {}
+        for item in items:
+            track_index = item.parentTrack().trackIndex()
+
+            # timeline out points are inclusive
+            timeline_in = item.timelineIn()
+            timeline_out = item.timelineOut() + 1
+
+            for track in self._tracks[track_index:]:
+                for position, subtrack_item in track.overlapping(
+                    timeline_in, timeline_out
+                ):
+                    found[(track.track_order, position)] = subtrack_item
+
+        effects = []
+        annotations = []
+        for key in sorted(found):
+            subtrack_item = found[key]
+            if isinstance(subtrack_item, hiero.core.EffectTrackItem):
+                effects.append(subtrack_item)
+            elif isinstance(subtrack_item, hiero.core.Annotation):
+                annotations.append(subtrack_item)
+        return (effects, annotations)
+
+    def subtrack_index(self, subtrack_item):
+        """
+        Returns the index of the sub-track holding a sub-track item.
+
+        :param subtrack_item: The effect or annotation to look up.
+
+        :returns: The sub-track index, or None if the item isn't part of the
+            sequence.
+        :rtype: int
+        """
+        return self._subtrack_indexes.get(subtrack_item)
@@ -0,0 +1,282 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import json
+import os
+import threading
+
+
+class ExportJournal(object):
+    """
+    Append-only record of the work done by an export, so that an export
+    interrupted by a crash can be resumed rather than started over.
+
+    The journal is a file of JSON lines, each written to disk as soon as it is
+    recorded. It holds an entry for every entity created in Flow Production
+    Tracking, keyed by the work it was created for, and an entry for every
+    task whose work is done. When an export is resumed, the journal of the
+    interrupted export is replayed: tasks whose work is done are skipped and
+    the entities already created are reused instead of being created again.
+
+    The journal of an export which finished without errors is deleted, so
+    only the journal of an export which was interrupted, or which failed, is
+    left to resume.
+
+    Entries are flushed as they are recorded, so they survive the application
+    crashing. They're only synced to disk at task boundaries though, when work
+    is recorded as done.
+    """
+
+    def __init__(self, app, path):
+        """
+        :param app: The app instance.
+        :param str path: The path of the journal file.
+        """
+        self._app = app
+        self._path = path
+        self._lock = threading.Lock()
+        self._fh = None
+
+        # (key, entity name) -> entity, for the entities already created
+        self._entities = {}
+
+        # key -> done entry, for the work already done
+        self._done = {}
+
+        # (key, entity, data) of work that is done once the pending updates of
+        # the export have been written
+        self._deferred = []
+
+    def interrupted(self, export_key):
+        """
+        Returns whether an export with the supplied key was interrupted, or
+        failed, and left its journal behind.
+
+        :param str export_key: The key identifying the export.
+
+        :rtype: bool
+        """
+        journaled = self._read(limit=1)
+        return bool(journaled) and journaled[0].get("export") == export_key
+
+    def begin(self, export_key, resume=False):
+        """
+        Starts journaling an export.
+
+        :param str export_key: The key identifying the export. An export can
+            only be resumed from the journal of an export with the same key.
+        :param bool resume: Whether to replay the journal of an interrupted
+            export. If False, or if the journal belongs to another export, the
+            journal is started over.
+
+        :returns: Whether the export is resumed.
+        :rtype: bool
+        """
+        entries = [{"kind": "export", "export": export_key}]
+        resumed = False
+        if resume:
+            journaled = self._read()
+            if journaled and journaled[0].get("export") == export_key:
+                for entry in journaled[1:]:
+                    self._replay(entry)
+                entries = journaled
+                resumed = True
+            else:
+                self._app.log_warning(
+                    "There is no interrupted export to resume. Exporting everything."
+                )
+
+        try:
+            directory = os.path.dirname(self._path)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            self._fh = open(self._path, "w")
+        except Exception as e:
+            self._app.log_warning(
+                "Unable to write the export journal %s. The export can't be "
+                "resumed if it is interrupted: %s" % (self._path, e)
+            )
+            return resumed
+
+        # a resumed journal is written back rather than appended to, since the
+        # crash may have left its last line cut short
+        with self._lock:
+            self._write(*entries, sync=True)
+        return resumed
+
+    def is_done(self, key):
+        """
+        Returns whether the work with the supplied key is done.
+
+        :param str key: The key of the work.
+
+        :rtype: bool
+        """
+        return key in self._done
+
+    def get_entity(self, key, name):
+        """
+        Returns an entity already created for some work.
+
+        :param str key: The key of the work.
+        :param str name: The name the entity was recorded with.
+
+        :returns: The entity, or None if it hasn't been created.
+        :rtype: dict
+        """
+        with self._lock:
+            return self._entities.get((key, name))
+
+    def record_entity(self, key, name, entity):
+        """
+        Records an entity created for some work.
+
+        :param str key: The key of the work.
+        :param str name: The name to record the entity with.
+        :param dict entity: The entity that was created.
+        """
+        entity = {"type": entity["type"], "id": entity["id"]}
+        with self._lock:
+            self._entities[(key, name)] = entity
+            self._write({"kind": "entity", "key": key, "name": name, "entity": entity})
+
+    def record_done(self, key, **data):
+        """
+        Records that some work is done.
+
+        :param str key: The key of the work.
+        :param data: Anything else worth recording, such as the path the work
+            was rendered to.
+        """
+        with self._lock:
+            self._done[key] = data
+            self._write(dict(data, kind="done", key=key), sync=True)
+
+    def record_done_deferred(self, key, entity, **data):
+        """
+        Records that some work is done once the pending update of an entity
+        has been written. See :meth:`commit_deferred`.
+
+        :param str key: The key of the work.
+        :param dict entity: The entity with a pending update.
+        :param data: Anything else worth recording.
+        """
+        with self._lock:
+            self._deferred.append((key, (entity["type"], entity["id"]), data))
+
+    def commit_deferred(self, failures):
+        """
+        Records the deferred work as done, now that the pending updates of the
+        export have been written.
+
+        :param list failures: The ``(entity_type, entity_id, error)`` tuples of
+            the updates that failed. The work these were for isn't done.
+        """
+        failed = set(
+            (entity_type, entity_id) for (entity_type, entity_id, _) in failures
+        )
+        with self._lock:
+            deferred = self._deferred
+            self._deferred = []
+
+            entries = []
+            for key, entity, data in deferred:
+                if entity not in failed:
+                    self._done[key] = data
+                    entries.append(dict(data, kind="done", key=key))
+            if entries:
+                self._write(*entries, sync=True)
+
+    def close(self, complete=False):
+        """
+        Closes the journal file.
+
+        :param bool complete: Whether the export finished without errors. Its
+            journal is deleted, since there's nothing left to resume. Otherwise
+            the journal is kept until the next export starts over, so the work
+            of an export which finished with errors can be resumed as well.
+        """
+        with self._lock:
+            if self._fh is None:
+                return
+            self._fh.close()
+            self._fh = None
+
+            if complete:
+                try:
+                    os.remove(self._path)
+                except OSError as e:
+                    self._app.log_debug(
+                        "Unable to remove the export journal %s: %s" % (self._path, e)
+                    )
+
+    def _write(self, *entries, sync=False):
+        """
+        Appends entries to the journal file. Must be called with the lock held.
+
+        :param bool sync: Whether to make sure the entries, and the ones
+            written before them, have hit the disk.
+        """
+        if self._fh is None:
+            return
+
+        try:
+            for entry in entries:
+                self._fh.write(json.dumps(entry, default=str) + "\n")
+            self._fh.flush()
+            if sync:
+                os.fsync(self._fh.fileno())
+        except Exception as e:
+            self._app.log_debug(
+                "Unable to write to the export journal %s: %s" % (self._path, e)
+            )
+
+    def _read(self, limit=None):
+        """
+        Reads the entries of the journal file.
+
+        :param int limit: The number of entries to read at most. All of them
+            are read if None.
+
+        :returns: A list of entries, the first of which identifies the export.
+        """
+        entries = []
+        if not os.path.exists(self._path):
+            return entries
+
+        try:
+            with open(self._path, "r") as fh:
+                for line in fh:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # the last line may have been cut short by the crash
+                        break
+                    if limit is not None and len(entries) >= limit:
+                        break
+        except Exception as e:
+            self._app.log_debug(
+                "Unable to read the export journal %s: %s" % (self._path, e)
+            )
+        return entries
+
+    def _replay(self, entry):
+        """
+        Replays an entry of the journal of an interrupted export.
+        """
+        kind = entry.get("kind")
+        if kind == "entity":
+            self._entities[(entry["key"], entry["name"])] = entry["entity"]
+        elif kind == "done":
+            self._done[entry["key"]] = dict(
+                (field, value)
+                for (field, value) in entry.items()
+                if field not in ("kind", "key")
+            )
@@ -0,0 +1,172 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import hashlib
+import json
+import os
+import threading
+
+
+class ExportManifest(object):
+    """
+    Remembers what the track items looked like when they were last exported,
+    so that an incremental export can skip the ones that haven't changed.
+
+    Each exported item is recorded with a fingerprint of everything its
+    export depends on, the files its export wrote and the Version created for
+    it. An item is only unchanged while those files are still on disk. The
+    fingerprints of the items exported by the current export are only
+    committed when the manifest is saved, and are dropped for items whose
+    export failed.
+    """
+
+    def __init__(self, app, path):
+        """
+        :param app: The app instance.
+        :param str path: The path of the manifest file.
+        """
+        self._app = app
+        self._path = path
+        self._lock = threading.Lock()
+
+        # item key -> {"fingerprint": ..., "version": ...}
+        self._entries = self._load()
+
+        # the entries of the items exported by the current export
+        self._pending = {}
+
+        self.skipped = 0
+
+    @staticmethod
+    def fingerprint(data):
+        """
+        Returns the fingerprint of the supplied data.
+
+        :param data: The data to fingerprint. It must only hold plain values
+            that serialize to JSON the same way in every session.
+
+        :raises TypeError: If the data holds anything else.
+        :rtype: str
+        """
+        serialized = json.dumps(data, sort_keys=True)
+        return hashlib.sha1(serialized.encode("utf-8")).hexdigest()
+
+    def unchanged(self, key, fingerprint):
+        """
+        Returns whether an item was last exported with the same fingerprint,
+        and the files that export wrote are all still on disk.
+
+        :param str key: The key of the item.
+        :param str fingerprint: The current fingerprint of the item.
+
+        :rtype: bool
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry["fingerprint"] != fingerprint:
+            return False
+
+        # entries written before the outputs were recorded can't be verified
+        outputs = entry.get("outputs")
+        if outputs is None:
+            return False
+        return all(os.path.exists(path) for path in outputs)
+
+    def get_version(self, key):
+        """
+        Returns the Version created when an item was last exported.
+
+        :param str key: The key of the item.
+
+        :returns: The Version entity, or None if there isn't one.
+        :rtype: dict
+        """
+        with self._lock:
+            entry = self._pending.get(key) or self._entries.get(key) or {}
+        return entry.get("version")
+
+    def update(self, key, fingerprint, outputs):
+        """
+        Records the fingerprint an item is being exported with. The entry is
+        committed when the manifest is saved.
+
+        :param str key: The key of the item.
+        :param str fingerprint: The fingerprint of the item.
+        :param list outputs: The paths of the files the export of the item
+            writes, or None if they aren't known. For image sequences, the
+            paths of the first and last frames.
+        """
+        with self._lock:
+            self._pending[key] = {
+                "fingerprint": fingerprint,
+                "outputs": outputs,
+                "version": None,
+            }
+
+    def set_version(self, key, version):
+        """
+        Records the Version created for an item exported by this export.
+
+        :param str key: The key of the item.
+        :param dict version: The Version entity.
+        """
+        with self._lock:
+            if key in self._pending:
+                self._pending[key]["version"] = {
+                    "type": version["type"],
+                    "id": version["id"],
+                }
+
+    def discard(self, key):
+        """
+        Drops an item whose export failed, so that it is exported again by
+        the next incremental export.
+
+        :param str key: The key of the item.
+        """
+        with self._lock:
+            self._pending.pop(key, None)
+            self._entries.pop(key, None)
+
+    def save(self):
+        """
+        Commits the entries of the items exported by this export and writes
+        the manifest to disk.
+        """
+        with self._lock:
+            self._entries.update(self._pending)
+            self._pending = {}
+            entries = dict(self._entries)
+
+        try:
+            directory = os.path.dirname(self._path)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            with open(self._path, "w") as fh:
+                json.dump(entries, fh)
+        except Exception as e:
+            self._app.log_debug(
+                "Unable to write the export manifest %s: %s" % (self._path, e)
+            )
+
+    def _load(self):
+        """
+        Loads the manifest from disk.
+
+        :returns: A dictionary of item keys to entries.
+        """
+        if os.path.exists(self._path):
+            try:
+                with open(self._path, "r") as fh:
+                    return dict(json.load(fh))
+            except Exception as e:
+                self._app.log_debug(
+                    "Unable to read the export manifest %s: %s" % (self._path, e)
+                )
+        return {}
@@ -0,0 +1,167 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import sgtk
+
+
+class PublishQueue(object):
+    """
+    Export-wide queue of pending publishes.
+
+    Registering a publish as each task finishes costs a request to create the
+    publish and another to update it with the extra publish data. Instead,
+    the queue works out the data of each publish with a dry run of
+    ``register_publish``, merges the extra publish data into it and creates
+    the queued publishes together in batch requests. The queue is flushed
+    whenever it holds a full batch, and when the export session owning it is
+    closed.
+    """
+
+    def __init__(self, app, batch_size):
+        """
+        :param app: The app instance.
+        :param int batch_size: The number of publishes to queue before
+            creating them. Publishes are registered right away if 0.
+        """
+        self._app = app
+        self._batch_size = max(0, batch_size)
+
+        # (entity type, publish data, callback) for each queued publish
+        self._pending = []
+
+        # (publish data, error) for every publish that failed
+        self._failures = []
+
+    def register(self, args, extra_data=None, callback=None):
+        """
+        Registers a publish, either right away or as part of a batch once
+        enough publishes have been queued.
+
+        :param dict args: The arguments to call ``register_publish`` with.
+        :param dict extra_data: Additional fields to set on the publish, as
+            returned by the get_extra_publish_data hook. May be None.
+        :param callback: An optional callable taking the publish entity,
+            called once the publish has been created.
+        """
+        if not self._batch_size:
+            self._register(args, extra_data, callback)
+            return
+
+        data = sgtk.util.register_publish(dry_run=True, **args)
+        if "id" in data:
+            # this version of core doesn't do dry runs, so the publish was
+            # just registered
+            self._finish(data, extra_data, callback)
+            return
+
+        data = dict(data)
+        entity_type = data.pop(
+            "type", sgtk.util.get_published_file_entity_type(self._app.sgtk)
+        )
+        if extra_data:
+            data.update(extra_data)
+        self._pending.append((entity_type, data, callback))
+
+        if len(self._pending) >= self._batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Creates all of the queued publishes in Flow Production Tracking.
+
+        Publishes are created in chunks of at most the queue's batch size. If
+        a chunk fails, its publishes are retried individually so that
+        failures can be reported for the publishes they apply to.
+        """
+        pending = self._pending
+        self._pending = []
+
+        sg = self._app.shotgun
+        for i in range(0, len(pending), self._batch_size or 1):
+            chunk = pending[i : i + (self._batch_size or 1)]
+            self._app.log_debug(
+                "Creating %s pending publishes in Flow Production Tracking..."
+                % len(chunk)
+            )
+            try:
+                publishes = sg.batch(
+                    [
+                        {
+                            "request_type": "create",
+                            "entity_type": entity_type,
+                            "data": data,
+                        }
+                        for (entity_type, data, _) in chunk
+                    ]
+                )
+            except Exception:
+                self._app.log_debug("Batched create failed. Retrying individually...")
+                publishes = [
+                    self._retry(entity_type, data) for (entity_type, data, _) in chunk
+                ]
+
+            for (_, _, callback), publish in zip(chunk, publishes):
+                if publish is not None:
+                    self._finish(publish, None, callback)
+
+    @property
+    def failures(self):
+        """
+        A list of ``(publish_data, error)`` tuples, one for each publish that
+        could not be created.
+        """
+        return list(self._failures)
+
+    def _register(self, args, extra_data, callback):
+        """
+        Registers a publish right away.
+        """
+        self._app.log_debug(
+            "Register publish in Flow Production Tracking: %s" % str(args)
+        )
+        self._finish(sgtk.util.register_publish(**args), extra_data, callback)
+
+    def _retry(self, entity_type, data):
+        """
+        Creates a single publish.
+
+        :returns: The publish entity, or None if it couldn't be created.
+        """
+        try:
+            return self._app.shotgun.create(entity_type, data)
+        except Exception as e:
+            self._app.log_error(
+                "Unable to create %s %s in Flow Production Tracking: %s"
+                % (entity_type, data.get("code"), e)
+            )
+            self._failures.append((data, e))
+            return None
+
+    def _finish(self, publish, extra_data, callback):
+        """
+        Writes the extra publish data of a publish that was registered on its
+        own, and hands the publish to its callback.
+        """
+        if extra_data:
+            self._app.log_debug(
+                "Updating PTR %s %s" % (publish["type"], str(extra_data))
+            )
+            self._app.shotgun.update(publish["type"], publish["id"], extra_data)
+
+        if callback is None:
+            return
+
+        try:
+            callback(publish)
+        except Exception as e:
+            self._app.log_error(
+                "Unable to finish publishing %s %s: %s"
+                % (publish["type"], publish["id"], e)
+            )
@@ -0,0 +1,358 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+
+from .bounded_cache import BoundedCache
+from .collate_index import CollateIndex
+from .effect_index import EffectIndex
+from .publish_queue import PublishQueue
+from .shot_registry import ShotRegistry
+from .task_resolver import TaskResolver
+from .thumbnail_uploader import ThumbnailUploader
+from .upload_scheduler import UploadScheduler
+from .write_buffer import ShotgunWriteBuffer
+
+
+class ExportSession(object):
+    """
+    The state of a single export.
+
+    A session is created by the shot processor when an export starts and is
+    handed to each of the export's tasks before they're queued. It owns all of
+    the caches used during the export, so their contents never outlive the
+    export they were gathered for, as well as the publish queue and write
+    buffer holding the export's deferred publishes and updates.
+
+    The session is closed once the last task holding on to it has finished.
+    Closing creates the queued publishes, flushes the write buffer, waits for
+    the uploads still in flight and reports how effective the caches were.
+    """
+
+    def __init__(self, app):
+        """
+        :param app: The app instance.
+        """
+        self._app = app
+
+        cache_size = app.get_setting("cache_size")
+
+        # the caches owned by the session
+        self.entities = BoundedCache("entities", cache_size)
+        self.tasks = BoundedCache("tasks", cache_size)
+        self.templates = BoundedCache("templates", cache_size)
+
+        # the scaled thumbnails of source frames, keyed by source guid, frame
+        # and width. bounded by their memory footprint as well.
+        self.thumbnails = BoundedCache(
+            "thumbnails",
+            cache_size,
+            max_cost=app.get_setting("thumbnail_cache_size") * 1024 * 1024,
+        )
+
+        # the shots used to resolve custom strings, keyed by project id,
+        # sequence guid and shot code
+        self.resolved_shots = BoundedCache("resolved shots", cache_size)
+
+        # the values of the custom resolver tokens, keyed by item guid, token
+        # and version string
+        self.resolved_values = BoundedCache("resolved values", cache_size)
+
+        # the collate indexes of the exported sequences, keyed by sequence guid
+        self.collate_indexes = BoundedCache("collate indexes", cache_size)
+
+        # the effect indexes of the exported sequences, keyed by sequence guid
+        self.effect_indexes = BoundedCache("effect indexes", cache_size)
+
+        # the collated sequences built for the export, shared by the tasks of
+        # the same shot. keyed by the tasks' collate settings.
+        self.collated_sequences = BoundedCache("collated sequences", cache_size)
+
+        # the hero items of the collate groups, keyed by the guids of the items
+        # of the group or the sequence they collate
+        self.collate_heroes = BoundedCache("collate heroes", cache_size)
+
+        # collated sequence key -> the number of tasks holding on to it
+        self._collated_sequence_refs = {}
+
+        # every Shot field used during the export: the cut info read by the
+        # transcodes and the fields resolved into paths. the shots are fetched
+        # with all of these fields so that each is queried only once.
+        self.shot_fields = ["code", "sg_head_in", "sg_tail_out", "task_template"]
+        for ctf in app.get_setting("custom_template_fields"):
+            if ctf["keyword"] not in self.shot_fields:
+                self.shot_fields.append(ctf["keyword"])
+
+        self.shot_registry = ShotRegistry(self.entities)
+        self.task_resolver = TaskResolver(app, self.tasks)
+        self.write_buffer = ShotgunWriteBuffer(app, app.get_setting("batch_size"))
+        self.publishes = PublishQueue(
+            app,
+            min(app.get_setting("publish_batch_size"), app.get_setting("batch_size")),
+        )
+        self.uploads = UploadScheduler(
+            app,
+            app.get_setting("upload_threads"),
+            max_rate=app.get_setting("upload_rate_limit") * 1024,
+            max_retries=app.get_setting("upload_retries"),
+        )
+        self.thumbnail_uploader = ThumbnailUploader(
+            app,
+            self.uploads,
+            index_path=os.path.join(app.cache_location, "thumbnail_index.json"),
+        )
+
+        # the fingerprints of the exported items, set up by the shot
+        # processor. saved once the export is done.
+        self.manifest = None
+
+        # the record of the work done by the export, set up by the shot
+        # processor. lets an interrupted export be resumed.
+        self.journal = None
+
+        # whether any of the tasks of the export failed
+        self.failed = False
+
+        # the number of shots processed so far. used to determine the cut
+        # order of the shots.
+        self.shot_count = 0
+
+        # the dictionary handed to the hooks as their ``data`` argument.
+        # hooks are free to cache their own data in here.
+        self.data = {
+            "shot_registry": self.shot_registry,
+            "shot_fields": self.shot_fields,
+        }
+
+        # the number of tasks holding on to the session
+        self._task_count = 0
+        self._closed = False
+
+    @property
+    def caches(self):
+        """A list of all of the caches owned by the session."""
+        return [
+            self.entities,
+            self.tasks,
+            self.templates,
+            self.thumbnails,
+            self.resolved_shots,
+            self.resolved_values,
+            self.collate_indexes,
+            self.effect_indexes,
+            self.collated_sequences,
+            self.collate_heroes,
+        ]
+
+    @property
+    def closed(self):
+        """Whether the export of the session has finished."""
+        return self._closed
+
+    def get_collate_index(self, sequence):
+        """
+        Returns the collate index of a sequence, building it the first time
+        it is asked for during the export.
+
+        :param sequence: The hiero.core.Sequence being exported.
+
+        :rtype: :class:`CollateIndex`
+        """
+        return self.collate_indexes.get_or_create(
+            sequence.guid(), lambda: CollateIndex(sequence)
+        )
+
+    def get_effect_index(self, sequence):
+        """
+        Returns the effect index of a sequence, building it the first time it
+        is asked for during the export.
+
+        :param sequence: The hiero.core.Sequence being exported.
+
+        :rtype: :class:`EffectIndex`
+        """
+        return self.effect_indexes.get_or_create(
+            sequence.guid(), lambda: EffectIndex(sequence)
+        )
+
+    def get_collate_hero(self, items, key, group=None):
+        """
+        Returns the hero item of a collate group, working it out the first
+        time the group is asked for during the export.
+
+        :param list items: The items of the collate group.
+        :param key: A callable returning the sort key of an item. The item
+            with the greatest key is the hero.
+        :param group: The key identifying the group. Defaults to the guids of
+            the items.
+        """
+        if group is None:
+            group = tuple(item.guid() for item in items)
+        return self.collate_heroes.get_or_create(group, lambda: max(items, key=key))
+
+    def acquire_collated_sequence(self, key, build):
+        """
+        Returns the collated sequence shared by the tasks with the supplied
+        key, building it if no other task has. The caller should release it
+        with :meth:`release_collated_sequence` once it has finished.
+
+        :param key: The key identifying the collated sequence.
+        :param build: A callable taking no arguments that builds the collated
+            sequence.
+        """
+        state = self.collated_sequences.get_or_create(key, build)
+        self._collated_sequence_refs[key] = self._collated_sequence_refs.get(key, 0) + 1
+        return state
+
+    def release_collated_sequence(self, key):
+        """
+        Releases a collated sequence acquired with
+        :meth:`acquire_collated_sequence`. The sequence is dropped once the
+        last task holding on to it has released it.
+
+        :param key: The key identifying the collated sequence.
+        """
+        count = self._collated_sequence_refs.pop(key, 0) - 1
+        if count > 0:
+            self._collated_sequence_refs[key] = count
+        else:
+            self.collated_sequences.pop(key)
+
+    def get_thumbnail(self, source, frame):
+        """
+        Returns the thumbnail of a frame of a source, scaled down for upload.
+
+        Thumbnails are cached for the export, so each frame is only decoded
+        once no matter how many exporters ask for it.
+
+        :param source: The Hiero object to get the thumbnail from, such as a
+            clip or a sequence.
+        :param int frame: The frame to get the thumbnail of.
+
+        :returns: The thumbnail as a QImage.
+        """
+        width = self.thumbnail_uploader.width
+        key = (source.guid(), frame, width)
+
+        thumbnail = self.thumbnails.get(key)
+        if thumbnail is None:
+            thumbnail = self.thumbnail_uploader.scale(source.thumbnail(frame))
+
+            # qt 5.10 deprecated byteCount in favour of sizeInBytes
+            if hasattr(thumbnail, "sizeInBytes"):
+                cost = thumbnail.sizeInBytes()
+            else:
+                cost = thumbnail.byteCount()
+            self.thumbnails.set(key, thumbnail, cost=cost)
+
+        return thumbnail
+
+    def acquire(self):
+        """
+        Registers a task using the session. The session is closed once every
+        registered task has released it.
+        """
+        self._task_count += 1
+
+    def release(self):
+        """
+        Releases the session from a task that has finished. Closes the session
+        if this was the last task.
+        """
+        self._task_count = max(0, self._task_count - 1)
+        if self._task_count == 0:
+            self.close()
+
+    def flush(self):
+        """
+        Creates any queued publishes and writes any pending updates to Flow
+        Production Tracking.
+        """
+        # publishes first, since finishing them may queue more updates
+        self.publishes.flush()
+        self.write_buffer.flush()
+
+        # the work waiting on the updates that were just written is done
+        if self.journal is not None:
+            self.journal.commit_deferred(self.write_buffer.failures)
+
+    def close(self):
+        """
+        Creates the queued publishes, flushes any pending updates, waits for
+        the pending uploads and reports the cache statistics. The caches are
+        left intact for anything still referencing the session.
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        self.flush()
+        self._wait_for_uploads()
+        self.thumbnail_uploader.cleanup()
+        if self.manifest is not None:
+            self.manifest.save()
+        if self.journal is not None:
+            # the journal of an export that finished without errors has
+            # nothing left to resume
+            self.journal.close(
+                complete=not (
+                    self.failed or self.write_buffer.failures or self.publishes.failures
+                )
+            )
+
+        thumbnails = self.thumbnail_uploader
+        if thumbnails.uploaded or thumbnails.shared or thumbnails.unchanged:
+            self._app.log_info(
+                "Thumbnails: %s uploaded (%s KB), %s shared, %s unchanged."
+                % (
+                    thumbnails.uploaded,
+                    thumbnails.uploaded_bytes // 1024,
+                    thumbnails.shared,
+                    thumbnails.unchanged,
+                )
+            )
+
+        self._app.log_debug(
+            "Export session cache statistics: %s"
+            % "; ".join(str(cache) for cache in self.caches)
+        )
+
+        # nothing is resolved against the session of a finished export
+        if getattr(self._app, "export_session", None) is self:
+            self._app.export_session = None
+
+    def _wait_for_uploads(self):
+        """
+        Waits for the uploads still in flight, reporting their progress.
+        """
+        if not self.uploads.pending:
+            return
+
+        def report_progress(finished, total):
+            self._app.engine.show_busy(
+                "Uploading to PTR",
+                "Finished %s of %s uploads ..." % (finished, total),
+            )
+
+        message = (
+            "Waiting for %s uploads to Flow Production Tracking to finish ..."
+            % self.uploads.pending
+        )
+        self._app.log_info(message)
+        self._app.engine.show_busy("Uploading to PTR", message)
+        try:
+            self.uploads.wait(report_progress)
+        finally:
+            self._app.engine.clear_busy()
+
+        self._app.log_debug(
+            "Uploaded %s bytes to Flow Production Tracking. %s uploads failed."
+            % (self.uploads.bytes_uploaded, len(self.uploads.failures))
+        )
@@ -11,12 +11,10 @@
 import re
 import os
 import sys
-import ast
 
 from hiero.exporters import FnAudioExportTask
 from hiero.exporters import FnAudioExportUI
 
-import sgtk
 from sgtk.platform.qt import QtGui, QtCore
 
 from .base import ShotgunHieroObjectBase
@@ -95,6 +93,9 @@ class ShotgunAudioExporter(
 
     def startTask(self):
         """Run Task"""
+        if self._export_skipped:
+            return
+
         if self._resolved_export_path is None:
             self._resolved_export_path = self.resolvedExportPath()
             self._tk_version = self._formatTkVersionString(self.versionString())
@@ -107,9 +108,6 @@ class ShotgunAudioExporter(
 
         # call the get_shot hook
         ########################
-        if self.app.shot_count == 0:
-            self.app.preprocess_data = {}
-
         # associate publishes with correct shot, which will be the hero item
         # if we are collating
         if self.isCollated() and not self.isHero():
@@ -122,30 +120,20 @@ class ShotgunAudioExporter(
             "hook_get_shot",
             task=self,
             item=item,
-            data=self.app.preprocess_data,
+            data=self.session.data,
+            session=self.session,
             base_class=HieroGetShot,
         )
 
         ##############################
         # see if we get a task to use
-        self._sg_task = None
-        try:
-            task_filter = self.app.get_setting("default_task_filter", "[]")
-            task_filter = ast.literal_eval(task_filter)
-            task_filter.append(["entity", "is", self._sg_shot])
-            tasks = self.app.shotgun.find("Task", task_filter)
-            if len(tasks) == 1:
-                self._sg_task = tasks[0]
-        except ValueError:
-            # continue without task
-            setting = self.app.get_setting("default_task_filter", "[]")
-            self.app.log_error("Invalid value for 'default_task_filter': %s" % setting)
+        self._sg_task = self._get_default_task(self._sg_shot)
 
         # figure out the thumbnail frame
         ##########################
         source = self._item.source()
         try:
-            self._thumbnail = source.thumbnail(source.posterFrame())
+            self._thumbnail = self.session.get_thumbnail(source, source.posterFrame())
         except RuntimeError:
             # Nuke 16.0 issues a RuntimeError when trying to get the thumbnail
             # RuntimeError: Layer does not exist
@@ -157,6 +145,9 @@ class ShotgunAudioExporter(
         """
         Overridden method to allow proper timings for audio export
         """
+        if self._export_skipped:
+            return False
+
         item = self._item
         if item.guid() in self._collatedItemsMap:
             item = self._collatedItemsMap[item.guid()]
@@ -262,20 +253,44 @@ class ShotgunAudioExporter(
 
         return False
 
+    def progress(self):
+        """Report the progress of the task"""
+        if self._export_skipped:
+            return 1.0
+        return FnAudioExportTask.AudioExportTask.progress(self)
+
     def finishTask(self):
         """Finish Task"""
-        # run base class implementation
-        FnAudioExportTask.AudioExportTask.finishTask(self)
-
-        if self._do_publish:
-            self._publish()
-
-        # Log usage metrics
+        # the session is released even if finishing fails, so that it is still
+        # closed once the export is done
         try:
-            self.app.log_metric("Audio Export", log_version=True)
-        except:
-            # ingore any errors. ex: metrics logging not supported
-            pass
+            if self._export_skipped:
+                return
+
+            # run base class implementation
+            FnAudioExportTask.AudioExportTask.finishTask(self)
+            self._update_manifest()
+
+            if self._do_publish:
+                self._publish()
+
+            # Log usage metrics
+            try:
+                self.app.log_metric("Audio Export", log_version=True)
+            except:
+                # ingore any errors. ex: metrics logging not supported
+                pass
+
+            # when publishing, the work is done once the publish has been created
+            if not self._do_publish:
+                self._journal_done(path=self._resolved_export_path)
+        except Exception:
+            # export the item again in the next incremental export
+            self._update_manifest(failed=True)
+            raise
+        finally:
+            CollatingExporter.finishTask(self)
+            self.releaseSession()
 
     def _publish(self):
         """
@@ -298,15 +313,27 @@ class ShotgunAudioExporter(
         if self._sg_task is not None:
             args["task"] = self._sg_task
 
-        # register publish
-        self.app.log_debug(
-            "Register publish in Flow Production Tracking: %s" % str(args)
-        )
-        pub_data = sgtk.util.register_publish(**args)
+        # register publish, unless the export being resumed already did
+        pub_data = self._get_journaled_entity("PublishedFile")
+        if pub_data is not None:
+            self._finish_publish(pub_data)
+        else:
+            self._register_publish(args, callback=self._finish_publish)
+
+    def _finish_publish(self, pub_data):
+        """
+        Finishes publishing once the publish of this task has been created:
+        uploads its thumbnail and records that the task's work is done.
+
+        :param dict pub_data: The publish entity.
+        """
+        self._journal_entity("PublishedFile", pub_data)
 
         # upload thumbnail for publish
         self._upload_thumbnail_to_sg(pub_data, self._thumbnail)
 
+        self._journal_done(path=self._resolved_export_path)
+
 
 class ShotgunAudioPreset(
     ShotgunHieroObjectBase, CollatedShotPreset, FnAudioExportTask.AudioExportPreset
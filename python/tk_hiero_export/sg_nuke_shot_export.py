@@ -10,15 +10,12 @@
 
 import re
 import os
-import sys
-import ast
 
 from hiero.core import nuke
 from hiero.exporters import FnNukeShotExporter
 from hiero.exporters import FnNukeShotExporterUI
-from .collating_exporter import CollatedShotPreset
+from .collating_exporter import CollatedShotPreset, _collateHero
 
-import sgtk
 from sgtk.platform.qt import QtGui, QtCore
 
 from .base import ShotgunHieroObjectBase
@@ -128,13 +125,7 @@ class ShotgunNukeShotExporter(
         self._heroItem = None
 
         if self._collate:
-
-            def keyFunc(item):
-                return (
-                    (sys.maxsize - item.timelineIn()) * 1000
-                ) + item.parent().trackIndex()
-
-            heroItem = max(self._collatedItems, key=keyFunc)
+            heroItem = _collateHero(self.session, self._collatedItems)
             self._hero = heroItem.guid() == self._item.guid()
             self._heroItem = heroItem
 
@@ -148,6 +139,9 @@ class ShotgunNukeShotExporter(
         """
         Run Task
         """
+        if self._export_skipped:
+            return False
+
         if self._resolved_export_path is None:
             self._resolved_export_path = self.resolvedExportPath()
             self._tk_version_number = self._formatTkVersionString(self.versionString())
@@ -159,7 +153,7 @@ class ShotgunNukeShotExporter(
 
         source = self._item.source()
         try:
-            self._thumbnail = source.thumbnail(source.posterFrame())
+            self._thumbnail = self.session.get_thumbnail(source, source.posterFrame())
         except RuntimeError:
             # Nuke 16.0 issues a RuntimeError when trying to get the thumbnail
             # RuntimeError: Layer does not exist
@@ -169,6 +163,9 @@ class ShotgunNukeShotExporter(
 
     def startTask(self):
         """Run Task"""
+        if self._export_skipped:
+            return
+
         # call the publish data hook to allow for publish customization while _item is valid (unlike finishTask)
         self._extra_publish_data = self.app.execute_hook(
             "hook_get_extra_publish_data",
@@ -178,81 +175,97 @@ class ShotgunNukeShotExporter(
 
         return FnNukeShotExporter.NukeShotExporter.startTask(self)
 
+    def progress(self):
+        """Report the progress of the task"""
+        if self._export_skipped:
+            return 1.0
+        return FnNukeShotExporter.NukeShotExporter.progress(self)
+
     def finishTask(self):
         """
         Finish Task
         """
-        # run base class implementation
-        FnNukeShotExporter.NukeShotExporter.finishTask(self)
-        # Don't create PublishedFiles for non-hero collated items
-        if self._collate and not self._hero:
-            return
+        # the session is released even if finishing fails, so that it is still
+        # closed once the export is done
+        try:
+            if self._export_skipped:
+                return
+
+            # run base class implementation
+            FnNukeShotExporter.NukeShotExporter.finishTask(self)
+            self._update_manifest()
+            # Don't create PublishedFiles for non-hero collated items
+            if self._collate and not self._hero:
+                self._journal_done(path=self._resolved_export_path)
+                return
+
+            # register publish
+            # get context we're publishing to
+            ctx = self.app.tank.context_from_path(self._resolved_export_path)
+            published_file_type = self.app.get_setting(
+                "nuke_script_published_file_type"
+            )
 
-        # register publish
-        # get context we're publishing to
-        ctx = self.app.tank.context_from_path(self._resolved_export_path)
-        published_file_type = self.app.get_setting("nuke_script_published_file_type")
-
-        args = {
-            "tk": self.app.tank,
-            "context": ctx,
-            "path": self._resolved_export_path,
-            "name": os.path.basename(self._resolved_export_path),
-            "version_number": int(self._tk_version_number),
-            "published_file_type": published_file_type,
-        }
-
-        # see if we get a task to use
-        if (ctx.entity is not None) and (ctx.entity.get("type", "") == "Shot"):
+            args = {
+                "tk": self.app.tank,
+                "context": ctx,
+                "path": self._resolved_export_path,
+                "name": os.path.basename(self._resolved_export_path),
+                "version_number": int(self._tk_version_number),
+                "published_file_type": published_file_type,
+            }
+
+            # see if we get a task to use
+            if (ctx.entity is not None) and (ctx.entity.get("type", "") == "Shot"):
+                task = self._get_default_task(ctx.entity)
+                if task is not None:
+                    args["task"] = task
+
+            # register the publish, unless the export being resumed already did
+            sg_publish = self._get_journaled_entity("PublishedFile")
+            if sg_publish is not None:
+                self._finish_publish(sg_publish)
+            else:
+                # call the publish data hook to allow for publish customization.
+                # the data returned now is written along with the data returned
+                # when the task started.
+                extra_publish_data = self.app.execute_hook(
+                    "hook_get_extra_publish_data",
+                    task=self,
+                    base_class=HieroGetExtraPublishData,
+                )
+                if self._extra_publish_data is not None:
+                    extra_publish_data = dict(
+                        self._extra_publish_data, **(extra_publish_data or {})
+                    )
+                self._register_publish(args, extra_publish_data, self._finish_publish)
+
+            # Log usage metrics
             try:
-                task_filter = self.app.get_setting("default_task_filter", "[]")
-                task_filter = ast.literal_eval(task_filter)
-                task_filter.append(["entity", "is", ctx.entity])
-                tasks = self.app.shotgun.find("Task", task_filter)
-                if len(tasks) == 1:
-                    args["task"] = tasks[0]
-            except ValueError:
-                # continue without task
-                self.app.log_error("Invalid value for 'default_task_filter'")
-
-        publish_entity_type = sgtk.util.get_published_file_entity_type(self.app.sgtk)
-
-        self.app.log_debug(
-            "Register publish in Flow Production Tracking: %s" % str(args)
-        )
-        sg_publish = sgtk.util.register_publish(**args)
-        if self._extra_publish_data is not None:
-            self.app.log_debug(
-                "Updating PTR %s %s"
-                % (publish_entity_type, str(self._extra_publish_data))
-            )
-            self.app.shotgun.update(
-                sg_publish["type"], sg_publish["id"], self._extra_publish_data
-            )
+                self.app.log_metric("Shot Export", log_version=True)
+            except:
+                # ingore any errors. ex: metrics logging not supported
+                pass
+        except Exception:
+            # export the item again in the next incremental export
+            self._update_manifest(failed=True)
+            raise
+        finally:
+            self.releaseSession()
 
-        # call the publish data hook to allow for publish customization.
-        extra_publish_data = self.app.execute_hook(
-            "hook_get_extra_publish_data",
-            task=self,
-            base_class=HieroGetExtraPublishData,
-        )
-        if extra_publish_data is not None:
-            self.app.log_debug(
-                "Updating PTR %s %s" % (publish_entity_type, str(extra_publish_data))
-            )
-            self.app.shotgun.update(
-                sg_publish["type"], sg_publish["id"], extra_publish_data
-            )
+    def _finish_publish(self, sg_publish):
+        """
+        Finishes publishing once the publish of this task has been created:
+        uploads its thumbnail and records that the task's work is done.
+
+        :param dict sg_publish: The publish entity.
+        """
+        self._journal_entity("PublishedFile", sg_publish)
 
         # upload thumbnail for sequence
         self._upload_thumbnail_to_sg(sg_publish, self._thumbnail)
 
-        # Log usage metrics
-        try:
-            self.app.log_metric("Shot Export", log_version=True)
-        except:
-            # ingore any errors. ex: metrics logging not supported
-            pass
+        self._journal_done(path=self._resolved_export_path)
 
     def isExportingItem(self, item):
         """
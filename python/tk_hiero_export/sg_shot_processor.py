@@ -9,6 +9,8 @@
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
 import itertools
+import os
+import re
 
 import sgtk
 from sgtk.platform.qt import QtGui
@@ -34,10 +36,15 @@ except ImportError:
 
 from .base import ShotgunHieroObjectBase
 from .version_creator import ShotgunTranscodeExporter
+from .sg_nuke_shot_export import ShotgunNukeShotExporter
+from .sg_audio_export import ShotgunAudioExporter
 from .shot_updater import ShotgunShotUpdaterPreset
 from .shot_updater import ShotgunShotUpdater
 from .collating_exporter import CollatedShotPreset
 from .collating_exporter_ui import CollatingExporterUI
+from .session import ExportSession
+from .export_manifest import ExportManifest
+from .export_journal import ExportJournal
 
 from . import (
     HieroPreExport,
@@ -132,6 +139,8 @@ class ShotgunShotProcessorUI(
             cut_type_layout = self._build_cut_type_layout(properties)
             shotgun_layout.addLayout(cut_type_layout)
 
+        shotgun_layout.addWidget(self._build_incremental_export_widget(properties))
+
         shotgun_layout.addStretch()
 
         # add default settings from baseclass below
@@ -210,6 +219,29 @@ class ShotgunShotProcessorUI(
 
         return cut_type_layout
 
+    def _build_incremental_export_widget(self, properties):
+        """
+        Returns a checkbox toggling incremental exports.
+
+        :param properties: A dict containing the 'incremental_export' preset
+        :return: QtGui.QCheckBox - for the incremental export setting
+        """
+        checkbox = QtGui.QCheckBox("Only export shots that changed")
+        checkbox.setToolTip(
+            "Skip the transcodes, nuke scripts, audio and publishes of shots\n"
+            "that haven't changed since they were last exported. Shots and\n"
+            "Cuts are still updated."
+        )
+        checkbox.setChecked(properties.get("incremental_export", False))
+
+        # a callback to update the property dict when the value changes
+        def value_changed(state):
+            properties["incremental_export"] = checkbox.isChecked()
+
+        checkbox.stateChanged.connect(value_changed)
+
+        return checkbox
+
     def _build_tag_selector_widget(self, items, properties):
         """
         Returns a QT widget which contains the tag.
@@ -340,6 +372,9 @@ class ShotgunShotProcessor(ShotgunHieroObjectBase, FnShotProcessor.ShotProcessor
     def __init__(self, preset, submission=None, synchronous=False):
         FnShotProcessor.ShotProcessor.__init__(self, preset, submission, synchronous)
 
+        # set while resuming an interrupted export. see resumeExport()
+        self._resume = False
+
         # Call pre processor hook here to make sure it happens pior to any 'hook_resolve_custom_strings'.
         # The order if execution is basically [init processor, resolve user entries, startProcessing].
         self.app.execute_hook(
@@ -357,6 +392,7 @@ class ShotgunShotProcessor(ShotgunHieroObjectBase, FnShotProcessor.ShotProcessor
         # dialog just needs a list of all the tasks that will run. Since we're
         # not adding tasks here, simply return the base class list.
         if self.app.get_nuke_version_tuple() >= (10, 5, 1) and preview:
+            self._ensureResolveSession()
             return FnShotProcessor.ShotProcessor.startProcessing(
                 self, exportItems, preview
             )
@@ -403,27 +439,54 @@ class ShotgunShotProcessor(ShotgunHieroObjectBase, FnShotProcessor.ShotProcessor
         )
         self._exportTemplate.restore(exportTemplate)
 
-        # tag app as first shot
-        self.app.shot_count = 0
-
-        # need to temporarily monkey patch the internal hiero check so that our
-        # preview quicktime is generated. See the notes in the method being
-        # called for more info.
-        self._override_frame_server_check()
-
-        # startProcessing()'s signature changed in NukeStudio/Hiero 10.5v1.
-        if self.app.get_nuke_version_tuple() >= (10, 5, 1):
-            FnShotProcessor.ShotProcessor.startProcessing(self, exportItems, preview)
-        else:
-            FnShotProcessor.ShotProcessor.startProcessing(self, exportItems)
-
-        # restore the monkey patched hiero method
-        self._restore_frame_server_check()
+        # make sure nothing queued by a previous export that didn't get to
+        # finish is lost
+        previous_session = getattr(self.app, "export_session", None)
+        if previous_session is not None and previous_session is not self._session:
+            previous_session.flush()
+
+        # the export runs with the session of this processor. it owns all of
+        # the caches used during the export, including the ones filled while
+        # the paths of the export were resolved, and is handed to the tasks in
+        # processTaskPreQueue. the processor holds on to it until the tasks
+        # have been queued, so that it's closed once the last of them has
+        # finished, or right away if there's nothing to export.
+        session = self._ensureResolveSession()
+        session.acquire()
+        try:
+            # startProcessing()'s signature changed in NukeStudio/Hiero 10.5v1.
+            if self.app.get_nuke_version_tuple() >= (10, 5, 1):
+                FnShotProcessor.ShotProcessor.startProcessing(
+                    self, exportItems, preview
+                )
+            else:
+                FnShotProcessor.ShotProcessor.startProcessing(self, exportItems)
+        finally:
+            session.release()
 
         # get rid of our placeholder
         exportTemplate.pop(0)
         self._exportTemplate.restore(exportTemplate)
 
+    def resumeExport(self, exportItems):
+        """
+        Resumes an export of the supplied items that was interrupted, for
+        instance by a crash. This works like startProcessing(), except that the
+        work the interrupted export finished is skipped and the entities it
+        created in Flow Production Tracking are reused rather than created
+        again.
+
+        Exports started with startProcessing() offer to resume instead,
+        when the last export of the same items was interrupted.
+
+        :param exportItems: The items to export, as for startProcessing().
+        """
+        self._resume = True
+        try:
+            return self.startProcessing(exportItems)
+        finally:
+            self._resume = False
+
     def processTaskPreQueue(self):
         """Process the tasks just before they're queued up for execution."""
 
@@ -439,6 +502,22 @@ class ShotgunShotProcessor(ShotgunHieroObjectBase, FnShotProcessor.ShotProcessor
         # they can use during execution
         cut_related_tasks = []
 
+        # hand the export session to all of our tasks. each task holds on to
+        # the session until it has finished, so the session is closed and its
+        # pending writes flushed once the export is done.
+        for taskGroup in self._submission.children():
+            for task in taskGroup.children():
+                if isinstance(task, ShotgunHieroObjectBase):
+                    task.acquireSession(self.session)
+
+        # work out which shots changed since they were last exported before
+        # any of the tasks start
+        self._applyExportManifest()
+
+        # set up the journal of the export, skipping the work already done if
+        # resuming an interrupted export
+        self._applyExportJournal()
+
         # iterate over the tasks groups to be executed
         for taskGroup in self._submission.children():
 
@@ -478,6 +557,25 @@ class ShotgunShotProcessor(ShotgunHieroObjectBase, FnShotProcessor.ShotProcessor
         # us the cut order.
         cut_related_tasks.sort(key=lambda tasks: tasks[0]._item.timelineIn())
 
+        # resolve all of the shots for the export up front so that the tasks
+        # don't each have to query for their own shot.
+        self.app.engine.show_busy(
+            "Preprocessing Sequence", "Resolving Shots in PTR ..."
+        )
+        try:
+            shot_updater_tasks = [tasks[0] for tasks in cut_related_tasks]
+            shots = self._preflightShots(shot_updater_tasks)
+            self._prefetchTaskTemplates()
+            if shots is not None:
+                self._applyTaskTemplates(shot_updater_tasks, shots)
+
+            # look up the default tasks of all of the shots at once, now that
+            # their templates have been applied. these are shared by all of the
+            # exporters publishing for the shots.
+            self.session.task_resolver.prefetch(self.session.shot_registry.entities())
+        finally:
+            self.app.engine.clear_busy()
+
         # go ahead and populate the shot updater tasks with the cut order. this
         # is used to set the cut order on the Shot as it is created/updated.
         for i in range(0, len(cut_related_tasks)):
@@ -541,6 +639,116 @@ class ShotgunShotProcessor(ShotgunHieroObjectBase, FnShotProcessor.ShotProcessor
         finally:
             self.app.engine.clear_busy()
 
+    def _preflightShots(self, shot_updater_tasks):
+        """
+        Resolves the Shots for all of the supplied shot updater tasks in bulk.
+
+        The get_shot hook's ``get_shots`` method looks up all of the Shots
+        with a single query and creates the missing ones in a single batch
+        request. The results end up in the export's shot registry, which the
+        hook consults before querying for an individual Shot.
+
+        :param list shot_updater_tasks: The shot updater tasks to resolve
+            Shots for.
+
+        :returns: The Shots of the tasks, in the same order, or None if they
+            weren't resolved.
+        :rtype: list
+        """
+        if not shot_updater_tasks:
+            return None
+
+        # if the hook doesn't support batch lookups, the shots will be resolved
+        # one at a time as the tasks are executed.
+        handled, shots = self._execute_batch_hook_method(
+            "hook_get_shot",
+            "get_shots",
+            HieroGetShot,
+            items=[task._item for task in shot_updater_tasks],
+            data=self.session.data,
+            tasks=shot_updater_tasks,
+            fields=self.session.shot_fields,
+            upload_thumbnail=False,
+            session=self.session,
+        )
+        if not handled:
+            return None
+        return shots
+
+    def _applyTaskTemplates(self, shot_updater_tasks, shots):
+        """
+        Applies the task templates of the Shots of all of the supplied shot
+        updater tasks up front, with batches of updates. The Tasks the
+        templates create can then be looked up along with the Tasks of the
+        other Shots, with a single query. Shots which already have their
+        template are left alone.
+
+        :param list shot_updater_tasks: The shot updater tasks.
+        :param list shots: The Shots of the tasks, in the same order.
+        """
+        updates = {}
+        preset_properties = None
+        for task, shot in zip(shot_updater_tasks, shots):
+            if task._export_skipped:
+                continue
+
+            template = task._getShotTaskTemplate(shot["type"])
+            if template is None:
+                continue
+            task._task_template_applied = True
+
+            current = shot.get("task_template")
+            if current is not None and current["id"] == template["id"]:
+                continue
+
+            updates.setdefault(shot["type"], {})[shot["id"]] = {
+                "task_template": template
+            }
+            preset_properties = task._preset.properties()
+
+        batch_size = max(1, self.app.get_setting("batch_size"))
+        for shot_type, entity_updates in updates.items():
+            self.app.log_debug(
+                "Applying task templates to %s %ss..."
+                % (len(entity_updates), shot_type)
+            )
+            entity_updates = list(entity_updates.items())
+            for i in range(0, len(entity_updates), batch_size):
+                self._update_shot_entities(
+                    shot_type, entity_updates[i : i + batch_size], preset_properties
+                )
+            for shot_id, shot_data in entity_updates:
+                self.session.shot_registry.update(shot_type, shot_id, shot_data)
+
+    def _prefetchTaskTemplates(self):
+        """
+        Looks up every TaskTemplate the shot updater tasks may assign to their
+        Shots with a single query and stores them in the export's cache.
+
+        These are the templates mapped to tags in the preset as well as the
+        default task template.
+        """
+        properties = self._preset.properties().get("shotgunShotCreateProperties", {})
+        codes = set(code for (_, code) in properties.get("task_template_map", []))
+        default_template = self.app.get_setting("default_task_template")
+        if default_template:
+            codes.add(default_template)
+
+        if not codes:
+            return
+
+        templates = self.app.shotgun.find(
+            "TaskTemplate",
+            [["entity_type", "is", "Shot"], ["code", "in", list(codes)]],
+            ["code"],
+        )
+
+        # cache the codes that don't match any templates as well so that the
+        # tasks don't look them up again
+        templates_by_code = dict((template["code"], template) for template in templates)
+        for code in codes:
+            self.session.templates.set(("Shot", code), templates_by_code.get(code))
+
     def _getCollateProperties(self):
         """
         Returns tuple with values for collateTracks collateShotNames settings.
@@ -569,8 +777,9 @@ class ShotgunShotProcessor(ShotgunHieroObjectBase, FnShotProcessor.ShotProcessor
                 "hook_get_shot",
                 "get_shot_parent",
                 hiero_sequence=hiero_sequence,
-                data=self.app.preprocess_data,
+                data=self.session.data,
                 upload_thumbnail=False,
+                session=self.session,
                 base_class=HieroGetShot,
             )
         except TankHookMethodDoesNotExistError as e:
@@ -624,68 +833,246 @@ class ShotgunShotProcessor(ShotgunHieroObjectBase, FnShotProcessor.ShotProcessor
             "fps": hiero_sequence.framerate().toFloat(),
         }
 
-    def _override_frame_server_check(self):
+    def _applyExportManifest(self):
+        """
+        Fingerprints the items of the export and records them in the export
+        manifest. When exporting incrementally, the transcode, nuke script and
+        audio tasks of the items that haven't changed since they were last
+        exported, and whose exported files are still on disk, are skipped. The shot updater tasks always run, so Shots and
+        Cuts are kept up to date.
         """
-        This method temporarily monkey patches the hiero method that checks
-        whether or not the frame server is running.
+        incremental = self._preset.properties()["shotgunShotCreateProperties"].get(
+            "incremental_export", False
+        )
+
+        manifest = ExportManifest(
+            self.app, os.path.join(self.app.cache_location, "export_manifest.json")
+        )
+        self.session.manifest = manifest
 
-        We monkey patch this to allow our preview quicktimes created in the
-        transcode task to continue to be uploaded when doing individual frame
-        exports. In previous versions of Hiero, the .nk script was always
-        executed as a LocalNukeRenderTask. As of Hiero 10, a new task type is
-        used for frame exports called FrameServerRenderTask. This task type
-        renders frames in an individual frame context within Nuke and therefore
-        our quicktime write node never runs. Thus no quicktime upload for the
-        PTR Version and no thumbnail.
+        for taskGroup in self._submission.children():
+            tasks = [
+                task
+                for task in taskGroup.children()
+                if isinstance(task, ShotgunHieroObjectBase)
+            ]
+            items = [
+                task._item
+                for task in tasks
+                if isinstance(task._item, hiero.core.TrackItem)
+            ]
+            if not items:
+                continue
 
-        By overriding this method and forcing a value of ``False``, we trick
-        the Hiero shot processor internals into thinking that there is no frame
-        server running and cause it to use the fallback LocalNukeRenderTask
-        which does what we need.
+            key = items[0].guid()
+            fingerprint = manifest.fingerprint(
+                self._getFingerprintData(items[0], tasks)
+            )
+            for task in tasks:
+                task._manifest_key = key
+
+            # collated shots depend on the other items of their group, so
+            # they're always exported
+            collated = [
+                task
+                for task in tasks
+                if getattr(task, "isCollated", None) and task.isCollated()
+            ]
+
+            if incremental and not collated and manifest.unchanged(key, fingerprint):
+                for task in tasks:
+                    if isinstance(
+                        task,
+                        (
+                            ShotgunTranscodeExporter,
+                            ShotgunNukeShotExporter,
+                            ShotgunAudioExporter,
+                        ),
+                    ):
+                        task.skipExport()
+                manifest.skipped += 1
+            else:
+                manifest.update(key, fingerprint, self._getOutputPaths(tasks))
+
+        if incremental:
+            self.app.log_info(
+                "Skipping %s shots that haven't changed since they were last "
+                "exported." % manifest.skipped
+            )
 
-        This fix is a work around and given time we might consider a better
-        solution. That might include separating the preview quicktime
-        generation into a separate .nk script and transcode task.
+    def _applyExportJournal(self):
+        """
+        Starts the journal recording the work done by the export. Each task
+        is keyed by its item and its place in the export template.
+
+        When resuming an interrupted export, the tasks the journal of that
+        export records as done are skipped. The other tasks reuse the entities
+        it records as created. Unless resumeExport() was called, the user is
+        asked whether to resume when the last export of the same items was
+        interrupted.
         """
 
-        try:
-            # import the module containing the method to override
-            import hiero.ui.nuke_bridge.FnNsFrameServer
+        tasks = []
+        for taskGroup in self._submission.children():
+            for task in taskGroup.children():
+                if isinstance(task, ShotgunHieroObjectBase):
+                    task._journal_key = "%s %s %s" % (
+                        task._item.guid(),
+                        task.__class__.__name__,
+                        task._preset.name(),
+                    )
+                    tasks.append(task)
+
+        # an export can only be resumed with the same items and settings.
+        # whether it's incremental doesn't matter though.
+        export_key = ExportManifest.fingerprint(
+            {
+                "properties": _getPresetState(self._preset.properties()),
+                "tasks": sorted(
+                    [
+                        (task._journal_key, _getPresetState(task._preset.properties()))
+                        for task in tasks
+                    ],
+                    key=lambda task: task[0],
+                ),
+            }
+        )
 
-            # keep a handle on the real method
-            self._real_frame_server_check = (
-                hiero.ui.nuke_bridge.FnNsFrameServer.isServerRunning
-            )
+        journal = ExportJournal(
+            self.app, os.path.join(self.app.cache_location, "export_journal.jsonl")
+        )
+        self.session.journal = journal
 
-            # override the real method to always return False. i.e. The frame
-            # server is not running.
-            hiero.ui.nuke_bridge.FnNsFrameServer.isServerRunning = lambda t=1: False
-        except Exception as e:
-            # log a debug message in case something happens.
-            self._app.log_debug(
-                "Unable to override the frame server check. If exporting individual "
-                "frames, this may prevent the upload of a quicktime to PTR."
-            )
+        resume = self._resume
+        if not resume and journal.interrupted(export_key):
+            resume = self._confirmResume()
+        if not journal.begin(export_key, resume=resume):
+            return
+
+        skipped = 0
+        for task in tasks:
+            if journal.is_done(task._journal_key):
+                task.skipExport()
+                skipped += 1
+
+        self.app.log_info(
+            "Skipping %s tasks finished by the interrupted export." % skipped
+        )
 
-    def _restore_frame_server_check(self):
+    def _confirmResume(self):
         """
-        Restoring the original method monkey patched in the method above.
+        Asks the user whether to resume the interrupted export of the items
+        being exported. Nothing is resumed without asking, so exports run
+        without a UI start over.
 
-        See the notes there for more details.
+        :rtype: bool
         """
+        if not self.app.engine.has_ui:
+            self.app.log_warning(
+                "The last export of these items was interrupted. Starting over."
+            )
+            return False
+
+        answer = QtGui.QMessageBox.question(
+            None,
+            "Resume Export",
+            "The last export of these items was interrupted before it "
+            "finished.\n\nResume it, skipping the work it already did and "
+            "reusing the Cut, Cut Items, Versions and Published Files it "
+            "created?",
+            QtGui.QMessageBox.Yes | QtGui.QMessageBox.No,
+            QtGui.QMessageBox.Yes,
+        )
+        return answer == QtGui.QMessageBox.Yes
 
-        try:
-            import hiero.ui.nuke_bridge.FnNsFrameServer
+    def _getFingerprintData(self, item, tasks):
+        """
+        Returns everything the export of an item depends on: its source media
+        and their modification times, its source range and retime, the
+        effects and annotations applied to it, and the preset properties of
+        the processor and of the item's tasks.
 
-            real_fs_check = self._real_frame_server_check
+        :param item: The hiero.core.TrackItem being exported.
+        :param list tasks: The tasks exporting the item.
 
-            # restore the real method
-            hiero.ui.nuke_bridge.FnNsFrameServer.isServerRunning = real_fs_check
-        except Exception as e:
-            # unable to restore. likely associated with a failure to monkey
-            # patch. no need to log another message.
+        :rtype: dict
+        """
+        media = []
+        try:
+            for fileinfo in item.source().mediaSource().fileinfos():
+                media.append((fileinfo.filename(), _getModificationTimes(fileinfo)))
+        except Exception:
+            # no media to compare, the other properties still apply
             pass
 
+        effectIndex = self.session.get_effect_index(item.parentSequence())
+        effects, annotations = effectIndex.effects_and_annotations([item])
+        effects.extend(
+            [
+                linked
+                for linked in item.linkedItems()
+                if isinstance(linked, hiero.core.EffectTrackItem)
+            ]
+        )
+
+        return {
+            "media": media,
+            "source": (item.sourceIn(), item.sourceOut()),
+            "handles": (item.handleInLength(), item.handleOutLength()),
+            "retime": item.playbackSpeed(),
+            "effects": [_getSubTrackItemState(effect) for effect in effects],
+            "annotations": [
+                _getSubTrackItemState(annotation) for annotation in annotations
+            ],
+            "properties": _getPresetState(self._preset.properties()),
+            "tasks": sorted(
+                [
+                    (
+                        task.__class__.__name__,
+                        _getPresetState(task._preset.properties()),
+                    )
+                    for task in tasks
+                ],
+                key=lambda task: task[0],
+            ),
+        }
+
+    def _getOutputPaths(self, tasks):
+        """
+        Returns the paths of the files written by the tasks that are skipped
+        when their item hasn't changed. For image sequences, the paths of the
+        first and last frames are returned.
+
+        :param list tasks: The tasks exporting an item.
+
+        :returns: A list of paths, or None if they couldn't all be resolved.
+        :rtype: list
+        """
+        paths = []
+        for task in tasks:
+            if not isinstance(
+                task,
+                (
+                    ShotgunTranscodeExporter,
+                    ShotgunNukeShotExporter,
+                    ShotgunAudioExporter,
+                ),
+            ):
+                continue
+
+            try:
+                path = task.resolvedExportPath()
+                if _FRAME_PATTERN.search(path):
+                    start, end = task.outputRange()
+                    paths.extend([_getFramePath(path, start), _getFramePath(path, end)])
+                else:
+                    paths.append(path)
+            except Exception as e:
+                self.app.log_debug("Unable to resolve the output of %s: %s" % (task, e))
+                return None
+
+        return paths
+
     def _processCut(self, cut_related_tasks):
         """Collect data and create the Cut and CutItem entries for the tasks.
 
@@ -696,11 +1083,6 @@ class ShotgunShotProcessor(ShotgunHieroObjectBase, FnShotProcessor.ShotProcessor
             (shot_updater_task, transcode_task)
         """
 
-        # make sure the data cache is ready. this code may create entities in
-        # PTR and they'll be stored here for reuse.
-        if not hasattr(self.app, "preprocess_data"):
-            self.app.preprocess_data = {}
-
         # get the hiero sequence from the first updater task's item. this would
         # be the first item in the first tuple of the list of cut related tasks.
         hiero_sequence = cut_related_tasks[0][0]._item.sequence()
@@ -718,11 +1100,22 @@ class ShotgunShotProcessor(ShotgunHieroObjectBase, FnShotProcessor.ShotProcessor
         # we'll also calculate the cut duration while processing the tasks
         cut_duration = 0
 
-        # list of cut item data
+        # list of cut item data, and the journal keys of the tasks they're for
         cut_item_data_list = []
+        cut_item_keys = []
+
+        # get the shots so that we have all we need for the cut items.
+        # this may create the shots if they don't exist already
+        shot_updater_tasks = [tasks[0] for tasks in cut_related_tasks]
+        shots = self._get_shots(
+            shot_updater_tasks,
+            [task._item for task in shot_updater_tasks],
+            self.session.data,
+            upload_thumbnail=False,
+        )
 
         # process the tasks in order
-        for shot_updater_task, transcode_task in cut_related_tasks:
+        for (shot_updater_task, transcode_task), shot in zip(cut_related_tasks, shots):
 
             # cut order was populated by the calling method to update the
             # Shot entity's cut info
@@ -750,17 +1143,6 @@ class ShotgunShotProcessor(ShotgunHieroObjectBase, FnShotProcessor.ShotProcessor
             tc_edit_in = self._timecode(cut_item_data["edit_in"], fps, drop_frame)
             tc_edit_out = self._timecode(cut_item_data["edit_out"], fps, drop_frame)
 
-            # get the shot so that we have all we need for the cut item.
-            # this may create the shot if it doesn't exist already
-            shot = self.app.execute_hook(
-                "hook_get_shot",
-                task=shot_updater_task,
-                item=shot_updater_task._item,
-                data=self.app.preprocess_data,
-                upload_thumbnail=False,
-                base_class=HieroGetShot,
-            )
-
             # update the cut item data with the shot, timecodes and other fields
             # required
             cut_item_data.update(
@@ -801,22 +1183,61 @@ class ShotgunShotProcessor(ShotgunHieroObjectBase, FnShotProcessor.ShotProcessor
                 cut_data["timecode_end_text"] = tc_edit_out
 
             cut_item_data_list.append(cut_item_data)
+            cut_item_keys.append(shot_updater_task._journal_key)
 
         # all tasks processed, add the duration to the cut data
         cut_data["duration"] = cut_duration
 
-        # create the cut to get the id.
-        sg = self.app.shotgun
-        cut = sg.create("Cut", cut_data)
-        self._app.log_debug("Created Cut in Flow Production Tracking: %s" % (cut,))
-        self._app.log_info(
-            "Created Cut '%s' in Flow Production Tracking!" % (cut["code"],)
-        )
+        # create the cut to get the id, unless the export being resumed
+        # already created it
+        journal = self.session.journal
+        cut_key = hiero_sequence.guid()
+        cut = journal.get_entity(cut_key, "Cut")
+        if cut is None:
+            sg = self.app.shotgun
+            cut = sg.create("Cut", cut_data)
+            journal.record_entity(cut_key, "Cut", cut)
+            self._app.log_debug("Created Cut in Flow Production Tracking: %s" % (cut,))
+            self._app.log_info(
+                "Created Cut '%s' in Flow Production Tracking!" % (cut["code"],)
+            )
+        else:
+            self._app.log_info(
+                "Reusing Cut %s created by the interrupted export." % (cut["id"],)
+            )
 
         # make sure the cut item data dicts are updated with the cut info
         for cut_item_data in cut_item_data_list:
             cut_item_data["cut"] = {"id": cut["id"], "type": "Cut"}
 
+        # create the cut items in batches. the cut item data dicts are shared
+        # with the updater and transcode tasks, so updating them with the new
+        # entity info makes the ids available to those tasks.
+        preset_properties = self._preset.properties().get(
+            "shotgunShotCreateProperties", {}
+        )
+        pending = []
+        for cut_item_data, key in zip(cut_item_data_list, cut_item_keys):
+            cut_item = journal.get_entity(key, "CutItem")
+            if cut_item is None:
+                pending.append((cut_item_data, key))
+            else:
+                cut_item_data.update(cut_item)
+
+        batch_size = max(1, self.app.get_setting("batch_size"))
+        for i in range(0, len(pending), batch_size):
+            chunk = pending[i : i + batch_size]
+            cut_items = self._create_cut_items(
+                [cut_item_data for (cut_item_data, _) in chunk], preset_properties
+            )
+
+            for (cut_item_data, key), cut_item in zip(chunk, cut_items):
+                # If a CutItem entity wasn't created by the hook method, then it
+                # will have returned a None.
+                if cut_item is not None:
+                    cut_item_data.update(cut_item)
+                    journal.record_entity(key, "CutItem", cut_item)
+
     def _timecode(self, frame, fps, drop_frame=False):
         """Convenience wrapper to convert a given frame and fps to a timecode.
 
@@ -833,6 +1254,118 @@ class ShotgunShotProcessor(ShotgunHieroObjectBase, FnShotProcessor.ShotProcessor
         return hiero.core.Timecode.timeToString(frame, fps, display_type)
 
 
+# Matches the frame number pattern of an image sequence path, either printf
+# style (%04d) or padded with hashes (####)
+_FRAME_PATTERN = re.compile(r"%(\d*)d|#+")
+
+
+def _getFramePath(path, frame):
+    """
+    Returns the path of a frame of an image sequence.
+
+    :param str path: The path of the image sequence, holding a frame pattern.
+    :param int frame: The frame number.
+
+    :rtype: str
+    """
+
+    def _format(match):
+        if match.group(0).startswith("%"):
+            return match.group(0) % frame
+        return "%0*d" % (len(match.group(0)), frame)
+
+    return _FRAME_PATTERN.sub(_format, path)
+
+
+def _getModificationTimes(fileinfo):
+    """
+    Returns the modification times of a media file. For image sequences, the
+    modification times of their first and last frames are returned.
+
+    :param fileinfo: The hiero.core.MediaSource fileinfo of the media.
+
+    :returns: A list of modification times, holding None for missing files.
+    :rtype: list
+    """
+    path = fileinfo.filename()
+    if _FRAME_PATTERN.search(path):
+        paths = [
+            _getFramePath(path, fileinfo.startFrame()),
+            _getFramePath(path, fileinfo.endFrame()),
+        ]
+    else:
+        paths = [path]
+
+    times = []
+    for candidate in paths:
+        try:
+            times.append(os.path.getmtime(candidate))
+        except OSError:
+            times.append(None)
+    return times
+
+
+# Properties choosing how an export runs rather than what it exports
+_EXPORT_MODE_PROPERTIES = ("incremental_export",)
+
+# Marks a value left out of the state of a preset
+_NOT_PLAIN = object()
+
+
+def _getPresetState(value):
+    """
+    Returns the plain values of preset properties, for fingerprinting.
+
+    Values which aren't plain data, such as the presets of an export template,
+    are left out since their string representations differ from one session to
+    the next. So are the properties choosing how the export runs.
+    """
+    if isinstance(value, dict):
+        state = {}
+        for key, item in value.items():
+            if key in _EXPORT_MODE_PROPERTIES:
+                continue
+            item = _getPresetState(item)
+            if item is not _NOT_PLAIN:
+                state[str(key)] = item
+        return state
+
+    if isinstance(value, (list, tuple)):
+        return [
+            item
+            for item in (_getPresetState(item) for item in value)
+            if item is not _NOT_PLAIN
+        ]
+
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return _NOT_PLAIN
+
+
+def _getSubTrackItemState(subTrackItem):
+    """
+    Returns what a soft effect or annotation looks like, for fingerprinting.
+    This covers its placement and, for soft effects, the knobs of its node.
+    """
+    state = [
+        subTrackItem.name(),
+        subTrackItem.timelineIn(),
+        subTrackItem.timelineOut(),
+    ]
+    try:
+        import nuke
+
+        state.append(
+            subTrackItem.node().writeKnobs(
+                nuke.WRITE_NON_DEFAULT_ONLY | nuke.TO_SCRIPT | nuke.TO_VALUE
+            )
+        )
+    except Exception:
+        # annotations don't have a node
+        pass
+    return state
+
+
 class ShotgunShotProcessorPreset(
     ShotgunHieroObjectBase, CollatedShotPreset, FnShotProcessor.ShotProcessorPreset
 ):
@@ -875,6 +1408,9 @@ class ShotgunShotProcessorPreset(
         # holds the cut type to use when creating Cut entires in PTR
         default_properties["sg_cut_type"] = ""
 
+        # whether to skip the shots that haven't changed since the last export
+        default_properties["incremental_export"] = False
+
         # Handle custom properties from the customize_export_ui hook.
         custom_properties = (
             self._get_custom_properties("get_shot_processor_ui_properties") or []
@@ -888,19 +1424,31 @@ class ShotgunShotProcessorPreset(
         )
         default_properties.update(explicit_constructor_properties)
 
+        # resuming isn't a preset setting, but presets saved by earlier
+        # versions may still hold it
+        default_properties.pop("resume_export", None)
+
     def addUserResolveEntries(self, resolver):
         self.app.log_debug("Adding custom resolver tk_version")
 
         # the following hook can end up pulling shots from the get_shot hook,
-        # so initialize the cache that is used to store the values from that
-        # hook.
-        if not hasattr(self.app, "preprocess_data"):
-            self.app.preprocess_data = {}
-
+        # so make sure there's a session to cache the values from that hook in
+        # when paths are resolved outside of an export.
+        self._ensureResolveSession()
+
+        # hiero resolves paths many times per task and the export dialog
+        # resolves them whenever the preset is edited, so the values are
+        # memoized in the session. the version string doesn't depend on the
+        # item.
         resolver.addResolver(
             "{tk_version}",
             "Version string formatted by Flow Production Tracking.",
-            lambda keyword, task: self._formatTkVersionString(task.versionString()),
+            lambda keyword, task: self._memoizedResolve(
+                None,
+                keyword,
+                task,
+                lambda: self._formatTkVersionString(task.versionString()),
+            ),
         )
 
         custom_template_fields = self.app.get_setting("custom_template_fields")
@@ -912,14 +1460,77 @@ class ShotgunShotProcessorPreset(
             resolver.addResolver(
                 "{%s}" % ctf["keyword"],
                 ctf["description"],
-                lambda keyword, task: self.app.execute_hook(
-                    "hook_resolve_custom_strings",
-                    keyword=keyword,
-                    task=task,
-                    base_class=HieroResolveCustomStrings,
+                lambda keyword, task: self._memoizedResolve(
+                    task._item.guid(),
+                    keyword,
+                    task,
+                    lambda: self.app.execute_hook(
+                        "hook_resolve_custom_strings",
+                        keyword=keyword,
+                        task=task,
+                        session=self._resolveSession(task),
+                        base_class=HieroResolveCustomStrings,
+                    ),
                 ),
             )
 
+    def _ensureResolveSession(self):
+        """
+        Returns the session of this processor, starting a new one if it
+        doesn't have one or if its export has finished. The session is made
+        the app's current session, for hooks resolving paths outside of a task.
+        Sessions of other processors, and of finished exports, are never
+        resolved against, so nothing cached for another export is reused.
+
+        The data dictionary of the session is still exposed as preprocess_data
+        for hooks that reference it.
+
+        :rtype: :class:`ExportSession`
+        """
+        if self._session is None or self._session.closed:
+            self._session = ExportSession(self.app)
+
+        self.app.export_session = self._session
+        self.app.preprocess_data = self._session.data
+        return self._session
+
+    def _memoizedResolve(self, item_guid, keyword, task, resolve):
+        """
+        Returns the value of a resolver token, only resolving it the first
+        time it is asked for during the export.
+
+        :param str item_guid: The guid of the item the value depends on, or
+            None if it doesn't depend on the item.
+        :param str keyword: The token being resolved.
+        :param task: The task the token is being resolved for.
+        :param resolve: A callable taking no arguments that resolves the value.
+
+        :returns: The resolved value.
+        """
+        return self._resolveSession(task).resolved_values.get_or_create(
+            (item_guid, keyword, task.versionString()), resolve
+        )
+
+    def _resolveSession(self, task):
+        """
+        Returns the session a token is resolved in for the supplied task.
+
+        This is the session of the task, or the session of this processor for
+        tasks that don't belong to a Toolkit export. The session of the
+        processor may have been closed since the resolvers were added, if its
+        export has finished.
+
+        :param task: The task the token is being resolved for.
+
+        :rtype: :class:`ExportSession`
+        """
+        session = None
+        if isinstance(task, ShotgunHieroObjectBase):
+            session = task.session
+        if session is None or session.closed:
+            session = self._ensureResolveSession()
+        return session
+
     def isValid(self):
         """
         This method was introduced into the base class in NukeStudio/Hiero
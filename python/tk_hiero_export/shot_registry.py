@@ -0,0 +1,119 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+
+class ShotRegistry(object):
+    """
+    Per-export registry of Shot entities.
+
+    Shots are keyed by their parent entity and code, which is how the
+    get_shot hook identifies them. The registry is populated in bulk by the
+    shot processor before any tasks are queued and is then consulted by the
+    get_shot hook, so resolving a Shot costs a dictionary lookup rather than
+    a round trip to Flow Production Tracking for every task that needs it.
+    """
+
+    def __init__(self, cache):
+        """
+        :param cache: The export session's entity cache, which holds the shots
+            keyed by parent type, parent id and code.
+        """
+        self._shots = cache
+
+        # (shot type, shot id) -> (parent type, parent id, code)
+        self._keys = {}
+
+    def get(self, parent, code, fields=None):
+        """
+        Returns the registered shot with the requested fields, or None if the
+        shot is not registered or does not have all of the requested fields.
+
+        Like a query, the returned dictionary only holds the type, id and
+        requested fields of the shot, no matter what else is registered.
+
+        :param dict parent: The parent entity of the shot. May be None.
+        :param str code: The code of the shot.
+        :param list fields: The fields the caller needs on the shot.
+
+        :returns: A shot entity dictionary or None.
+        :rtype: dict
+        """
+        shot = self._shots.get(self._key(parent, code))
+        if shot is None:
+            return None
+
+        fields = ["type", "id"] + (fields or [])
+        if not all(field in shot for field in fields):
+            # the shot is known but we don't have everything the caller is
+            # asking for. let the caller query for it.
+            return None
+
+        # callers are free to modify what they get back
+        return dict((field, shot[field]) for field in fields)
+
+    def add(self, parent, code, shot):
+        """
+        Registers a shot, merging it into any data already registered for it.
+
+        :param dict parent: The parent entity of the shot. May be None.
+        :param str code: The code of the shot.
+        :param dict shot: The shot entity dictionary.
+        """
+        key = self._key(parent, code)
+        registered = self._shots.peek(key)
+        if registered is None:
+            registered = {}
+            self._shots.set(key, registered)
+        registered.update(shot)
+        self._keys[(shot["type"], shot["id"])] = key
+
+    def update(self, entity_type, entity_id, entity_data):
+        """
+        Merges new field values into a registered shot. This keeps the registry
+        in sync with updates made to the shot during the export.
+
+        :param str entity_type: The entity type of the shot.
+        :param int entity_id: The id of the shot.
+        :param dict entity_data: The field values to merge.
+        """
+        key = self._keys.get((entity_type, entity_id))
+        if key in self._shots:
+            self._shots.peek(key).update(entity_data)
+
+    def missing(self, parent, codes):
+        """
+        Returns the subset of the supplied codes that are not registered.
+
+        :param dict parent: The parent entity of the shots. May be None.
+        :param list codes: A list of shot codes.
+
+        :rtype: list
+        """
+        return [code for code in codes if self._key(parent, code) not in self._shots]
+
+    def entities(self):
+        """
+        Returns links to all of the registered shots.
+
+        :returns: A list of entity dictionaries.
+        :rtype: list
+        """
+        return [
+            {"type": entity_type, "id": entity_id}
+            for ((entity_type, entity_id), key) in self._keys.items()
+            if key in self._shots
+        ]
+
+    def _key(self, parent, code):
+        # shot codes are matched case insensitively, like the queries do
+        code = code.lower()
+        if parent is None:
+            return (None, None, code)
+        return (parent["type"], parent["id"], code)
@@ -33,6 +33,10 @@ class ShotgunShotUpdater(
         CollatingExporter.__init__(self)
         self._cut_order = None
 
+        # set by the shot processor when it has already applied the task
+        # template of the shot
+        self._task_template_applied = False
+
     def get_cut_item_data(self):
         """
         Return some computed values for use when creating cut items.
@@ -121,8 +125,13 @@ class ShotgunShotUpdater(
         }
 
     def finishTask(self):
-        FnShotExporter.ShotTask.finishTask(self)
-        CollatingExporter.finishTask(self)
+        # the session is released even if finishing fails, so that it is still
+        # closed once the export is done
+        try:
+            FnShotExporter.ShotTask.finishTask(self)
+        finally:
+            CollatingExporter.finishTask(self)
+            self.releaseSession()
 
     def taskStep(self):
         """
@@ -132,18 +141,20 @@ class ShotgunShotUpdater(
         if self.isCollated() and not self.isHero():
             return False
 
+        # the export being resumed already updated the shot
+        if self._export_skipped:
+            return False
+
         # execute base class
         FnShotExporter.ShotTask.taskStep(self)
 
         # call the preprocess hook to get extra values
-        if self.app.shot_count == 0:
-            self.app.preprocess_data = {}
-
         sg_shot = self.app.execute_hook(
             "hook_get_shot",
             task=self,
             item=self._item,
-            data=self.app.preprocess_data,
+            data=self.session.data,
+            session=self.session,
             base_class=HieroGetShot,
         )
 
@@ -154,7 +165,7 @@ class ShotgunShotUpdater(
         del sg_shot["type"]
 
         # The cut order may have been set by the processor. Otherwise keep old behavior.
-        cut_order = self.app.shot_count + 1
+        cut_order = self.session.shot_count + 1
         if self._cut_order:
             cut_order = self._cut_order
 
@@ -254,45 +265,40 @@ class ShotgunShotUpdater(
         if status:
             sg_shot["sg_status_list"] = status
 
-        # get task template from the tags
+        # the shot processor usually applies the task templates of all of the
+        # shots up front
         template = None
-        template_map = dict(self._preset.properties()["task_template_map"])
-        for tag in self._item.tags():
-            if tag.name() in template_map:
-                template = self.app.tank.shotgun.find_one(
-                    "TaskTemplate",
-                    [
-                        ["entity_type", "is", shot_type],
-                        ["code", "is", template_map[tag.name()]],
-                    ],
-                )
-                break
+        if not self._task_template_applied:
+            template = self._getShotTaskTemplate(shot_type)
+
+        # commit the changes, either right away or as part of a batch once
+        # enough updates have been queued. applying a task template creates
+        # the Tasks the folders are created for and the exporters publish to,
+        # so the template is applied right away, on its own.
+        deferred = self._holds_session and self.app.get_setting("defer_shot_updates")
+        if template is not None and deferred:
+            self._update_shot_entities(
+                shot_type,
+                [(shot_id, {"task_template": template})],
+                self._preset.properties(),
+            )
+        elif template is not None:
+            sg_shot["task_template"] = template
 
-        # if there are no associated, assign default template...
-        if template is None:
-            default_template = self.app.get_setting("default_task_template")
-            if default_template:
-                template = self.app.tank.shotgun.find_one(
-                    "TaskTemplate",
-                    [
-                        ["entity_type", "is", shot_type],
-                        ["code", "is", default_template],
-                    ],
-                )
+        if deferred:
+            self.session.write_buffer.queue_shot_update(
+                shot_type, shot_id, sg_shot, self._preset.properties()
+            )
+        else:
+            self._update_shot_entities(
+                shot_type, [(shot_id, sg_shot)], self._preset.properties()
+            )
 
+        # keep the export's view of the shot in sync with what was just written
+        self.session.shot_registry.update(shot_type, shot_id, sg_shot)
         if template is not None:
-            sg_shot["task_template"] = template
-
-        # commit the changes and update the thumbnail
-        self.app.execute_hook_method(
-            "hook_update_shot",
-            "update_shotgun_shot_entity",
-            entity_type=shot_type,
-            entity_id=shot_id,
-            entity_data=sg_shot,
-            preset_properties=self._preset.properties(),
-            base_class=HieroUpdateShot,
-        )
+            # the template may have created the Task the exporters publish to
+            self.session.task_resolver.invalidate({"type": shot_type, "id": shot_id})
 
         # create the directory structure
         self.app.execute_hook_method(
@@ -308,28 +314,14 @@ class ShotgunShotUpdater(
         self.app.log_info("Updated %s %s" % (shot_type, self.shotName()))
 
         # keep shot count
-        self.app.shot_count += 1
+        self.session.shot_count += 1
 
-        # create the CutItem with the data populated by the shot processor
+        # the CutItem was created by the shot processor along with the Cut. If
+        # a CutItem entity wasn't created by the hook method, then the cut
+        # item data won't have an id.
         cut = None
-
-        if hasattr(self, "_cut_item_data"):
-            cut_item_data = self._cut_item_data
-            cut_item = self.app.execute_hook_method(
-                "hook_update_cuts",
-                "create_cut_item",
-                cut_item_data=cut_item_data,
-                preset_properties=self._preset.properties(),
-                base_class=HieroUpdateCuts,
-            )
-
-            # If a CutItem entity wasn't created by the hook method, then it
-            # will have returned a None.
-            if cut_item is not None:
-                # update the object's cut item data to include the new info
-                self._cut_item_data.update(cut_item)
-
-                cut = cut_item["cut"]
+        if hasattr(self, "_cut_item_data") and "id" in self._cut_item_data:
+            cut = self._cut_item_data["cut"]
 
         # see if this task has been designated to update the Cut thumbnail
         if cut and hasattr(self, "_create_cut_thumbnail"):
@@ -339,6 +331,7 @@ class ShotgunShotUpdater(
                 cut=cut,
                 task_item=self._item,
                 preset_properties=self._preset.properties(),
+                session=self.session,
                 base_class=HieroUpdateCuts,
             )
 
@@ -346,9 +339,65 @@ class ShotgunShotUpdater(
                 # found one, uplaod to sg for the cut
                 self._upload_thumbnail_to_sg(cut, thumbnail)
 
+        # the shot is done once its update has been written
+        shot = {"type": shot_type, "id": shot_id}
+        if deferred:
+            self._journal_done_deferred(shot, shot=shot)
+        else:
+            self._journal_done(shot=shot)
+
         # return false to indicate success
         return False
 
+    def _getShotTaskTemplate(self, entity_type):
+        """
+        Returns the TaskTemplate to apply to the Shot of this task. This is the
+        template mapped to the first of the item's tags that has one, or the
+        default task template.
+
+        :param str entity_type: The entity type of the Shot.
+
+        :returns: The TaskTemplate entity or None if there is no template to
+            apply.
+        :rtype: dict
+        """
+        # get task template from the tags
+        template_map = dict(self._preset.properties()["task_template_map"])
+        for tag in self._item.tags():
+            if tag.name() in template_map:
+                return self._getTaskTemplate(entity_type, template_map[tag.name()])
+
+        # if there are no associated, assign default template...
+        default_template = self.app.get_setting("default_task_template")
+        if default_template:
+            return self._getTaskTemplate(entity_type, default_template)
+        return None
+
+    def _getTaskTemplate(self, entity_type, code):
+        """
+        Returns the TaskTemplate with the supplied code for the entity type.
+
+        TaskTemplates are prefetched by the shot processor, so this is
+        typically served from the export session's template cache. Templates
+        that aren't cached are looked up and added to the cache.
+
+        :param str entity_type: The entity type the template applies to.
+        :param str code: The code of the template.
+
+        :returns: The TaskTemplate entity or None if there is no such template.
+        :rtype: dict
+        """
+        return self.session.templates.get_or_create(
+            (entity_type, code),
+            lambda: self.app.tank.shotgun.find_one(
+                "TaskTemplate",
+                [
+                    ["entity_type", "is", entity_type],
+                    ["code", "is", code],
+                ],
+            ),
+        )
+
     def is_cut_length_export(self):
         """
         Returns ``True`` if this task has the "Cut Length" option checked.
@@ -0,0 +1,109 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import ast
+
+
+class TaskResolver(object):
+    """
+    Resolves the Task that publishes for an entity are associated with, as
+    determined by the ``default_task_filter`` setting.
+
+    The filter is parsed once and the Tasks for all of the entities of an
+    export can be prefetched with a single query, which every exporter then
+    shares. Only the Tasks found are cached: an entity without a Task may get
+    one during the export, when a task template is applied to it.
+    """
+
+    def __init__(self, app, cache):
+        """
+        :param app: The app instance.
+        :param cache: The export session's task cache, which holds the tasks
+            keyed by entity type and id.
+        """
+        self._app = app
+        self._tasks = cache
+
+        setting = app.get_setting("default_task_filter", "[]")
+        try:
+            self._task_filter = ast.literal_eval(setting)
+        except (ValueError, SyntaxError):
+            # continue without task
+            app.log_error("Invalid value for 'default_task_filter': %s" % setting)
+            self._task_filter = None
+
+    def prefetch(self, entities):
+        """
+        Looks up the Tasks for all of the supplied entities with a single
+        query.
+
+        :param list entities: A list of entity dictionaries.
+        """
+        entities = [
+            entity for entity in entities if self._key(entity) not in self._tasks
+        ]
+        if self._task_filter is None or not entities:
+            return
+
+        task_filter = list(self._task_filter)
+        task_filter.append(["entity", "in", entities])
+        tasks = self._app.shotgun.find("Task", task_filter, ["entity"])
+
+        tasks_by_entity = {}
+        for task in tasks:
+            tasks_by_entity.setdefault(self._key(task["entity"]), []).append(task)
+
+        for entity in entities:
+            task = self._single_task(tasks_by_entity.get(self._key(entity), []))
+            if task is not None:
+                self._tasks.set(self._key(entity), task)
+
+    def get_task(self, entity):
+        """
+        Returns the Task to associate publishes for the supplied entity with.
+
+        :param dict entity: The entity dictionary.
+
+        :returns: The Task entity, or None if the filter doesn't result in a
+            single Task for the entity.
+        :rtype: dict
+        """
+        if self._task_filter is None:
+            return None
+
+        task = self._tasks.get(self._key(entity))
+        if task is not None:
+            return task
+
+        task_filter = list(self._task_filter)
+        task_filter.append(["entity", "is", entity])
+        task = self._single_task(self._app.shotgun.find("Task", task_filter))
+        if task is not None:
+            self._tasks.set(self._key(entity), task)
+        return task
+
+    def invalidate(self, entity):
+        """
+        Forgets the Task of an entity, whose Tasks have changed.
+
+        :param dict entity: The entity dictionary.
+        """
+        self._tasks.pop(self._key(entity))
+
+    def _single_task(self, tasks):
+        """
+        Returns a link to the task if there is exactly one, None otherwise.
+        """
+        if len(tasks) == 1:
+            return {"type": tasks[0]["type"], "id": tasks[0]["id"]}
+        return None
+
+    def _key(self, entity):
+        return (entity["type"], entity["id"])
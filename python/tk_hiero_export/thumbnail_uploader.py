@@ -0,0 +1,334 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import collections
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from tank.platform.qt import QtCore
+
+
+class ThumbnailUploader(object):
+    """
+    Uploads thumbnails to Flow Production Tracking through the export's
+    upload scheduler.
+
+    Thumbnails are encoded in memory on the calling thread, since QImages
+    shouldn't be handed to other threads, and written to a scratch directory
+    shared by the whole export. The upload itself happens on the scheduler's
+    worker threads.
+
+    Uploads are deduplicated by the hash of the encoded image. Within an
+    export, an image is uploaded once and shared with every other entity it
+    is uploaded for. Flow Production Tracking transcodes uploaded thumbnails
+    before they can be shared, so shares wait until the thumbnail they share
+    has finished transcoding. Across exports, a persistent index of the image
+    last uploaded for each entity skips uploads that wouldn't change anything.
+    """
+
+    # the maximum number of entities remembered by the persistent index
+    INDEX_SIZE = 10000
+
+    # how many times to check whether an uploaded thumbnail has finished
+    # transcoding before it is shared, and the number of seconds to wait
+    # before checking again. the delay doubles with every check.
+    TRANSCODE_CHECKS = 6
+    TRANSCODE_CHECK_DELAY = 1.0
+
+    # the image url of an entity whose thumbnail is still being transcoded
+    # points to this placeholder
+    PENDING_THUMBNAIL = "thumbnail_pending"
+
+    # the supported thumbnail_format settings and their file extensions
+    FORMATS = {"PNG": "png", "JPEG": "jpg"}
+
+    def __init__(self, app, uploads, index_path=None):
+        """
+        :param app: The app instance.
+        :param uploads: The :class:`UploadScheduler` to upload with.
+        :param str index_path: The path of the persistent index of uploaded
+            thumbnails. No index is kept if None.
+        """
+        self._app = app
+        self._uploads = uploads
+        self._scratch_dir = None
+
+        # the encoding settings
+        self.width = app.get_setting("thumbnail_width")
+        self._format = app.get_setting("thumbnail_format").upper()
+        if self._format not in self.FORMATS:
+            app.log_error(
+                "Invalid value for 'thumbnail_format': %s. Using PNG." % self._format
+            )
+            self._format = "PNG"
+        self._quality = app.get_setting("thumbnail_quality")
+        if app.get_setting("thumbnail_scaling") == "fast":
+            self._transformation = QtCore.Qt.FastTransformation
+        else:
+            self._transformation = QtCore.Qt.SmoothTransformation
+
+        # what happened to the thumbnails of the export
+        self.uploaded = 0
+        self.uploaded_bytes = 0
+        self.shared = 0
+        self.unchanged = 0
+
+        # image hash -> _ThumbnailSource of the first upload of the image
+        self._sources = {}
+
+        self._index_path = index_path
+        self._index = self._load_index()
+        self._index_lock = threading.Lock()
+
+    def upload(self, sg_entity, thumb_qimage):
+        """
+        Schedules the upload of a thumbnail for an entity.
+
+        :param dict sg_entity: The entity to upload the thumbnail for.
+        :param thumb_qimage: The thumbnail as a QImage.
+
+        :returns: A handle to wait on the upload with.
+        :rtype: :class:`UploadHandle`
+        """
+        data = self.encode(thumb_qimage)
+        digest = hashlib.sha1(data).hexdigest()
+
+        entity = {"type": sg_entity["type"], "id": sg_entity["id"]}
+        entity_key = "%s:%s" % (entity["type"], entity["id"])
+        description = "thumbnail for %s %s" % (entity["type"], entity["id"])
+
+        if self._index.get(entity_key) == digest:
+            self._app.log_debug(
+                "The %s is unchanged since it was last uploaded." % description
+            )
+            self.unchanged += 1
+            return self._uploads.finished(description)
+
+        # identical images are only written once
+        path = os.path.join(
+            self._get_scratch_dir(), "%s.%s" % (digest, self.FORMATS[self._format])
+        )
+        if not os.path.exists(path):
+            with open(path, "wb") as fh:
+                fh.write(data)
+
+        source = self._sources.get(digest)
+
+        def upload(sg):
+            result = None
+            if source is not None:
+                result = self._share(sg, entity, source)
+            shared = result is not None
+            if not shared:
+                result = sg.upload_thumbnail(entity["type"], entity["id"], path)
+
+            with self._index_lock:
+                self._index.pop(entity_key, None)
+                self._index[entity_key] = digest
+                if shared:
+                    self.shared += 1
+                else:
+                    self.uploaded += 1
+                    self.uploaded_bytes += len(data)
+            return result
+
+        handle = self._uploads.submit(
+            upload, description, size=len(data) if source is None else 0
+        )
+        if source is None:
+            self._sources[digest] = _ThumbnailSource(entity, handle)
+        return handle
+
+    def scale(self, thumb_qimage):
+        """
+        Scales a thumbnail down to the upload width.
+
+        :param thumb_qimage: The thumbnail as a QImage.
+
+        :returns: The scaled thumbnail as a QImage.
+        """
+        if thumb_qimage.width() == self.width:
+            # already scaled, typically by the export session's cache
+            return thumb_qimage
+
+        return thumb_qimage.scaledToWidth(self.width, self._transformation)
+
+    def encode(self, thumb_qimage):
+        """
+        Scales a thumbnail down and encodes it with the format and quality
+        configured for the app.
+
+        :param thumb_qimage: The thumbnail as a QImage.
+
+        :returns: The encoded image.
+        :rtype: bytes
+        """
+        thumb_qimage_scaled = self.scale(thumb_qimage)
+
+        buffer = QtCore.QBuffer()
+        buffer.open(QtCore.QIODevice.WriteOnly)
+        try:
+            if not thumb_qimage_scaled.save(buffer, self._format, self._quality):
+                raise Exception("Unable to encode the thumbnail.")
+            return bytes(buffer.data())
+        finally:
+            buffer.close()
+
+    def cleanup(self):
+        """
+        Removes the scratch directory and saves the persistent index. Should
+        only be called once all of the uploads have finished.
+        """
+        if self._scratch_dir is not None:
+            shutil.rmtree(self._scratch_dir, ignore_errors=True)
+            self._scratch_dir = None
+
+        self._save_index()
+
+    def _share(self, sg, entity, source):
+        """
+        Shares the thumbnail of the entity the image was first uploaded for
+        with another entity.
+
+        :returns: The result of sharing the thumbnail, or None if it couldn't
+            be shared and has to be uploaded instead.
+        """
+        source_entity = source.entity
+
+        # the image is uploaded before any of the uploads sharing it, so this
+        # never waits on an upload that hasn't started
+        source.handle.wait()
+        if source.handle.error is not None:
+            return None
+
+        # only the first share of the thumbnail waits for it to be
+        # transcoded, the others reuse the outcome
+        with source.lock:
+            if source.transcoded is None:
+                source.transcoded = self._wait_for_transcode(sg, source_entity)
+        if not source.transcoded:
+            self._app.log_debug(
+                "The thumbnail of %s %s wasn't transcoded in time to be shared. "
+                "Uploading it instead." % (source_entity["type"], source_entity["id"])
+            )
+            return None
+
+        try:
+            return sg.share_thumbnail([entity], source_entity=source_entity)
+        except Exception as e:
+            self._app.log_debug(
+                "Unable to share the thumbnail of %s %s: %s. Uploading it instead."
+                % (source_entity["type"], source_entity["id"], e)
+            )
+            return None
+
+    def _wait_for_transcode(self, sg, source_entity):
+        """
+        Waits for the thumbnail uploaded for an entity to be transcoded, so
+        that it can be shared.
+
+        :returns: Whether the thumbnail was transcoded in time.
+        :rtype: bool
+        """
+        delay = self.TRANSCODE_CHECK_DELAY
+        for check in range(self.TRANSCODE_CHECKS):
+            try:
+                result = sg.find_one(
+                    source_entity["type"],
+                    [["id", "is", source_entity["id"]]],
+                    ["image"],
+                )
+            except Exception as e:
+                self._app.log_debug(
+                    "Unable to check the thumbnail of %s %s: %s"
+                    % (source_entity["type"], source_entity["id"], e)
+                )
+                return False
+
+            image = (result or {}).get("image")
+            if image and self.PENDING_THUMBNAIL not in image:
+                return True
+
+            if check < self.TRANSCODE_CHECKS - 1:
+                time.sleep(delay)
+                delay *= 2
+
+        return False
+
+    def _load_index(self):
+        """
+        Loads the persistent index of uploaded thumbnails.
+
+        :returns: An ordered dictionary of entity keys to image hashes, oldest
+            first.
+        """
+        index = collections.OrderedDict()
+        if self._index_path and os.path.exists(self._index_path):
+            try:
+                with open(self._index_path, "r") as fh:
+                    index.update(json.load(fh))
+            except Exception as e:
+                self._app.log_debug(
+                    "Unable to read the thumbnail index %s: %s" % (self._index_path, e)
+                )
+        return index
+
+    def _save_index(self):
+        """
+        Saves the persistent index of uploaded thumbnails, dropping the oldest
+        entries if it has grown too large.
+        """
+        if not self._index_path:
+            return
+
+        with self._index_lock:
+            while len(self._index) > self.INDEX_SIZE:
+                self._index.popitem(last=False)
+            entries = list(self._index.items())
+
+        try:
+            with open(self._index_path, "w") as fh:
+                json.dump(entries, fh)
+        except Exception as e:
+            self._app.log_debug(
+                "Unable to write the thumbnail index %s: %s" % (self._index_path, e)
+            )
+
+    def _get_scratch_dir(self):
+        """
+        Returns the scratch directory, creating it if necessary.
+        """
+        if self._scratch_dir is None:
+            self._scratch_dir = tempfile.mkdtemp(prefix="hiero_process_thumbnail_")
+        return self._scratch_dir
+
+
+class _ThumbnailSource(object):
+    """
+    The first upload of an image, which the other uploads of the image share.
+    """
+
+    def __init__(self, entity, handle):
+        """
+        :param dict entity: The entity the image was uploaded for.
+        :param handle: The :class:`UploadHandle` of the upload.
+        """
+        self.entity = entity
+        self.handle = handle
+
+        # whether the uploaded thumbnail has been transcoded, None until
+        # it has been checked
+        self.transcoded = None
+        self.lock = threading.Lock()
@@ -0,0 +1,70 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import bisect
+
+
+class TrackIndex(object):
+    """
+    The items of a single video track, sorted by their timeline in point, so
+    that the items overlapping a range can be found without walking the whole
+    track. Shared by the collate and effect indexes of a sequence.
+
+    Items only need ``timelineIn()`` and ``timelineOut()`` methods, so track
+    items and sub-track items are indexed alike.
+    """
+
+    def __init__(self, track_order, items):
+        """
+        :param int track_order: The position of the track in the sequence.
+        :param list items: The track items, in track order.
+        """
+        self.track_order = track_order
+
+        # (timeline in, timeline out, position in track, item), sorted by the
+        # timeline in point
+        self._entries = sorted(
+            [
+                (item.timelineIn(), item.timelineOut(), position, item)
+                for (position, item) in enumerate(items)
+            ],
+            key=lambda entry: (entry[0], entry[2]),
+        )
+        self._ins = [entry[0] for entry in self._entries]
+
+        # the latest timeline out point of the items up to each entry. lets
+        # the search for items spanning a frame stop as soon as no earlier
+        # item can reach it.
+        self._max_outs = []
+        max_out = None
+        for entry in self._entries:
+            max_out = entry[1] if max_out is None else max(max_out, entry[1])
+            self._max_outs.append(max_out)
+
+    def overlapping(self, timeline_in, timeline_out):
+        """
+        Yields the ``(position, item)`` of every item that either spans the
+        supplied in point or starts within the supplied range, which is what
+        the collate tracks option considers overlapping.
+        """
+        start = bisect.bisect_right(self._ins, timeline_in)
+
+        # items starting at or before the in point that finish after it
+        index = start - 1
+        while index >= 0 and self._max_outs[index] >= timeline_in:
+            entry = self._entries[index]
+            if entry[1] >= timeline_in:
+                yield (entry[2], entry[3])
+            index -= 1
+
+        # items starting after the in point and before the out point
+        end = bisect.bisect_left(self._ins, timeline_out)
+        for entry in self._entries[start:end]:
+            yield (entry[2], entry[3])
@@ -0,0 +1,331 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import collections
+import os
+import threading
+import time
+
+import sgtk
+
+
+class UploadHandle(object):
+    """
+    Handle to an upload submitted to the :class:`UploadScheduler`.
+    """
+
+    def __init__(self, description):
+        """
+        :param str description: A description of the upload, used when
+            reporting.
+        """
+        self.description = description
+        self.result = None
+        self.error = None
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        """True once the upload has either succeeded or failed."""
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Blocks until the upload has finished.
+
+        :param float timeout: The maximum number of seconds to wait for.
+
+        :returns: True if the upload has finished, False if it timed out.
+        :rtype: bool
+        """
+        return self._done.wait(timeout)
+
+    def _finish(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self._done.set()
+
+
+class UploadScheduler(object):
+    """
+    Uploads files to Flow Production Tracking in the background.
+
+    Uploads are executed by a bounded pool of worker threads, each with its
+    own connection, so the export can keep rendering while media uploads.
+    Failed uploads are retried with an exponential backoff, and the overall
+    upload rate can be capped. The number of uploads still pending is logged
+    as each upload finishes, so their progress shows while the export runs.
+
+    Worker threads are started as uploads are submitted and stopped once
+    :meth:`wait` has seen all of the uploads through. With no worker threads,
+    uploads are executed right away on the calling thread.
+    """
+
+    def __init__(self, app, max_workers, max_rate=0, max_retries=3, retry_delay=2.0):
+        """
+        :param app: The app instance.
+        :param int max_workers: The maximum number of concurrent uploads.
+        :param int max_rate: The maximum average upload rate in bytes per
+            second. 0 means unlimited.
+        :param int max_retries: The number of times a failed upload is retried.
+        :param float retry_delay: The number of seconds to wait before the
+            first retry. The delay doubles with every retry.
+        """
+        self._app = app
+        self._max_workers = max(0, max_workers)
+        self._max_rate = max(0, max_rate)
+        self._max_retries = max(0, max_retries)
+        self._retry_delay = retry_delay
+
+        self._condition = threading.Condition()
+        self._jobs = collections.deque()
+        self._workers = []
+        self._handles = []
+
+        # the time at which the rate limit allows the next upload to start
+        self._next_slot = 0.0
+
+        self.bytes_uploaded = 0
+
+    @property
+    def pending(self):
+        """The number of uploads that haven't finished yet."""
+        return len([handle for handle in self._handles if not handle.done])
+
+    @property
+    def failures(self):
+        """A list of the handles of the uploads that failed."""
+        return [handle for handle in self._handles if handle.error is not None]
+
+    def submit(self, upload, description, size=0, cleanup=None):
+        """
+        Schedules an upload.
+
+        :param upload: A callable that takes a Shotgun connection and performs
+            the upload, returning its result.
+        :param str description: A description of the upload, used when
+            reporting.
+        :param int size: The number of bytes being uploaded, used to honour
+            the rate limit.
+        :param cleanup: An optional callable taking no arguments, called once
+            the upload has finished, whether it succeeded or not.
+
+        :returns: A handle to wait on the upload with.
+        :rtype: :class:`UploadHandle`
+        """
+        handle = UploadHandle(description)
+        self._handles.append(handle)
+
+        job = (upload, size, cleanup, handle)
+        if not self._max_workers:
+            self._run(job, self._app.shotgun)
+            return handle
+
+        with self._condition:
+            self._jobs.append(job)
+            if len(self._workers) < self._max_workers:
+                worker = threading.Thread(
+                    target=self._work, name="PTR upload %s" % len(self._workers)
+                )
+                worker.daemon = True
+                self._workers.append(worker)
+                worker.start()
+            self._condition.notify()
+
+        return handle
+
+    def finished(self, description):
+        """
+        Returns a handle for an upload that turned out to be unnecessary.
+
+        :param str description: A description of the upload, used when
+            reporting.
+
+        :rtype: :class:`UploadHandle`
+        """
+        handle = UploadHandle(description)
+        handle._finish()
+        self._handles.append(handle)
+        return handle
+
+    def upload(self, entity_type, entity_id, path, field_name=None, cleanup=None):
+        """
+        Schedules the upload of a file to an entity.
+
+        :param str entity_type: The type of the entity to upload to.
+        :param int entity_id: The id of the entity to upload to.
+        :param str path: The path of the file to upload.
+        :param str field_name: The field to upload the file to.
+        :param cleanup: An optional callable taking no arguments, called once
+            the upload has finished, whether it succeeded or not.
+
+        :returns: A handle to wait on the upload with.
+        :rtype: :class:`UploadHandle`
+        """
+        return self.submit(
+            lambda sg: sg.upload(entity_type, entity_id, path, field_name),
+            "%s for %s %s" % (os.path.basename(path), entity_type, entity_id),
+            size=os.path.getsize(path),
+            cleanup=cleanup,
+        )
+
+    def wait(self, progress_callback=None):
+        """
+        Blocks until all of the submitted uploads have finished, then stops
+        the worker threads.
+
+        :param progress_callback: An optional callable taking the number of
+            finished uploads and the total number of uploads, called whenever
+            an upload finishes.
+        """
+        handles = list(self._handles)
+        pending = [handle for handle in handles if not handle.done]
+        finished = len(handles) - len(pending)
+        for handle in pending:
+            handle.wait()
+            finished += 1
+            if progress_callback:
+                progress_callback(finished, len(handles))
+
+        with self._condition:
+            workers = self._workers
+            self._workers = []
+            for worker in workers:
+                self._jobs.append(None)
+            self._condition.notify_all()
+
+        for worker in workers:
+            worker.join()
+
+    def _work(self):
+        """
+        Executes uploads until told to stop.
+        """
+        sg = None
+        while True:
+            with self._condition:
+                while not self._jobs:
+                    self._condition.wait()
+                job = self._jobs.popleft()
+
+            if job is None:
+                return
+
+            if sg is None:
+                # connections can't be shared between threads
+                try:
+                    sg = sgtk.util.shotgun.create_sg_connection()
+                except Exception as e:
+                    # fail this upload rather than leave it unfinished. the
+                    # connection is attempted again for the next one.
+                    self._fail(job, e)
+                    continue
+
+            self._run(job, sg)
+
+    def _fail(self, job, error):
+        """
+        Finishes an upload that couldn't be attempted.
+        """
+        upload, size, cleanup, handle = job
+        self._app.log_error(
+            "Unable to upload %s to Flow Production Tracking: %s"
+            % (handle.description, error)
+        )
+        handle._finish(error=error)
+        self._log_pending()
+        if cleanup:
+            try:
+                cleanup()
+            except Exception as e:
+                self._app.log_debug(
+                    "Unable to clean up after uploading %s: %s"
+                    % (handle.description, e)
+                )
+
+    def _run(self, job, sg):
+        """
+        Executes an upload, retrying it if it fails.
+        """
+        upload, size, cleanup, handle = job
+
+        self._wait_for_slot(size)
+
+        try:
+            attempt = 0
+            while True:
+                try:
+                    self._app.log_debug("Uploading %s..." % handle.description)
+                    result = upload(sg)
+                except Exception as e:
+                    if attempt >= self._max_retries:
+                        self._app.log_error(
+                            "Unable to upload %s to Flow Production Tracking: %s"
+                            % (handle.description, e)
+                        )
+                        handle._finish(error=e)
+                        self._log_pending()
+                        break
+
+                    delay = self._retry_delay * (2**attempt)
+                    attempt += 1
+                    self._app.log_debug(
+                        "Upload of %s failed: %s. Retrying in %s seconds..."
+                        % (handle.description, e, delay)
+                    )
+                    time.sleep(delay)
+                else:
+                    with self._condition:
+                        self.bytes_uploaded += size
+                    handle._finish(result=result)
+                    self._log_pending()
+                    break
+        finally:
+            if cleanup:
+                try:
+                    cleanup()
+                except Exception as e:
+                    self._app.log_debug(
+                        "Unable to clean up after uploading %s: %s"
+                        % (handle.description, e)
+                    )
+
+    def _log_pending(self):
+        """
+        Logs how many uploads are left, once an upload has finished in the
+        background.
+        """
+        if not self._max_workers:
+            return
+
+        pending = self.pending
+        if pending:
+            self._app.log_info(
+                "%s uploads to Flow Production Tracking pending ..." % pending
+            )
+        else:
+            self._app.log_info("All uploads to Flow Production Tracking finished.")
+
+    def _wait_for_slot(self, size):
+        """
+        Blocks until the rate limit allows an upload of the supplied size to
+        start. Uploads are spaced out so that the average rate stays within
+        the limit.
+        """
+        if not self._max_rate or not size:
+            return
+
+        with self._condition:
+            start = max(time.time(), self._next_slot)
+            self._next_slot = start + float(size) / self._max_rate
+
+        delay = start - time.time()
+        if delay > 0:
+            time.sleep(delay)
@@ -9,7 +9,6 @@
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
 import os
-import ast
 import sys
 import shutil
 import tempfile
@@ -58,6 +57,9 @@ class ShotgunTranscodeExporterUI(
         create_version = state == QtCore.Qt.Checked
         self._preset._properties["create_version"] = create_version
 
+    def preview_width_changed(self, value):
+        self._preset._properties["preview_width"] = value
+
     def populateUI(self, widget, exportTemplate):
 
         # prior to 10.5v1, this method created the layout. in 10.5v1 and later,
@@ -88,6 +90,25 @@ class ShotgunTranscodeExporterUI(
         create_version_checkbox.stateChanged.connect(self.create_version_changed)
         top_layout.addWidget(create_version_checkbox)
 
+        preview_width_layout = QtGui.QHBoxLayout()
+        preview_width_label = QtGui.QLabel("PTR Preview Width:", widget)
+        preview_width_spinbox = QtGui.QSpinBox(widget)
+        preview_width_spinbox.setRange(0, 8192)
+        preview_width_spinbox.setSingleStep(2)
+        preview_width_spinbox.setSpecialValueText("Full Resolution")
+        preview_width_spinbox.setToolTip(
+            "The maximum width of the quicktime uploaded to PTR\n"
+            "as Screening Room media. Larger frames are scaled\n"
+            "down to this width before being encoded. By default,\n"
+            "the quicktime is encoded at full resolution."
+        )
+        preview_width_spinbox.setValue(self._preset._properties.get("preview_width", 0))
+        preview_width_spinbox.valueChanged.connect(self.preview_width_changed)
+        preview_width_layout.addWidget(preview_width_label)
+        preview_width_layout.addWidget(preview_width_spinbox)
+        preview_width_layout.addStretch()
+        top_layout.addLayout(preview_width_layout)
+
         top.setLayout(top_layout)
 
         middle = QtGui.QWidget()
@@ -125,10 +146,6 @@ class ShotgunTranscodeExporter(
     Create Transcode object and send to Shotgun
     """
 
-    # This is an arbitrarily named label we will use as a SetNode id,
-    # which can then be later used to connect a PushNode to
-    _write_set_node_label = "SG_Write_Attachment"
-
     def __init__(self, initDict):
         """Constructor"""
         FnTranscodeExporter.TranscodeExporter.__init__(self, initDict)
@@ -139,24 +156,13 @@ class ShotgunTranscodeExporter(
         self._thumbnail = None
         self._quicktime_path = None
         self._temp_quicktime = None
-
-    def addWriteNodeToScript(self, script, rootNode, framerate):
-        """
-        Override the default addWriteNodeToScript functionality so that we can add a SetNode before
-        the default writenodes get added to the script. The SetNode will allow us to later push our mov writenode
-        to this point so that it get parented correctly.
-        """
-        self.app.log_debug("Adding SetNode before base write node gets added")
-        # Add the SetNode before the write nodes are added.
-        set_command = nuke.SetNode(self._write_set_node_label, 0)
-        script.addNode(set_command)
-
-        super().addWriteNodeToScript(script, rootNode, framerate)
+        self._preview_task = None
+        self._initDict = initDict
 
     def buildScript(self):
         """
-        Override the default buildScript functionality to also output a temp movie
-        file if needed for uploading to Shotgun
+        Override the default buildScript functionality to also set up a temp
+        movie file if needed for uploading to Shotgun
         """
 
         # This is a bit of a hack to account for some changes to the
@@ -185,9 +191,81 @@ class ShotgunTranscodeExporter(
             self._temp_quicktime = False
             return
 
+        # the preview quicktime is rendered from the frames written by this
+        # task, by a render job of its own once they're done. this leaves the
+        # main render free to run on the frame server.
         self._quicktime_path = os.path.join(tempfile.mkdtemp(), "preview.mov")
         self._temp_quicktime = True
-        nodeName = "PTR Screening Room Media"
+
+    def outputRange(self, *args, **kwargs):
+        """
+        Override the default outputRange to move the range of a task sharing
+        the collated sequence of the whole sequence by the frame offset of its
+        item. See :meth:`CollatingExporter.collatedFrameOffset`.
+        """
+        start, end = FnTranscodeExporter.TranscodeExporter.outputRange(
+            self, *args, **kwargs
+        )
+        offset = self.collatedFrameOffset()
+        return start + offset, end + offset
+
+    def addWriteNodeToScript(self, script, rootNode, framerate):
+        """
+        Override the default addWriteNodeToScript to renumber the frames read
+        from a shared collated sequence to the output range of this task,
+        before they're written.
+        """
+        offset = self.collatedFrameOffset()
+        if offset:
+            script.addNode(nuke.Node("TimeOffset", time_offset=offset))
+
+        FnTranscodeExporter.TranscodeExporter.addWriteNodeToScript(
+            self, script, rootNode, framerate
+        )
+
+    def taskStep(self):
+        """
+        Run Task. Once the frames have been rendered, renders the preview
+        quicktime from them if needed.
+        """
+        if self._export_skipped:
+            return False
+
+        if self._preview_task is None:
+            if FnTranscodeExporter.TranscodeExporter.taskStep(self):
+                return True
+
+            if not self._temp_quicktime:
+                return False
+
+            self._preview_task = self._startPreviewRender()
+            if self._preview_task is None:
+                return False
+
+        if self._preview_task.taskStep():
+            return True
+
+        self._preview_task.finishTask()
+        if self._preview_task.error():
+            self.app.log_warning(
+                "Unable to render the preview quicktime %s: %s"
+                % (self._quicktime_path, self._preview_task.error())
+            )
+        return False
+
+    def _startPreviewRender(self):
+        """
+        Writes the script rendering the preview quicktime from the frames
+        written by this task, and submits it as a render job.
+
+        :returns: The render task, or None if it couldn't be submitted.
+        """
+        from hiero.exporters.FnSubmission import Submission
+
+        if self.isCollated():
+            start, end = self.collatedOutputRange()
+        else:
+            start, end = self.outputRange()
 
         framerate = None
         if self._sequence:
@@ -195,6 +273,95 @@ class ShotgunTranscodeExporter(
         if self._clip.framerate().isValid():
             framerate = self._clip.framerate()
 
+        script = nuke.ScriptWriter()
+        script.addNode(nuke.RootNode(start, end, framerate))
+        script.addNode(
+            nuke.Node(
+                "Read",
+                file=self._resolved_export_path.replace(os.path.sep, "/"),
+                first=start,
+                last=end,
+                origfirst=start,
+                origlast=end,
+            )
+        )
+
+        # previews are watched in a web player, so they don't need to be any
+        # larger than the preview width. smaller sources aren't scaled up.
+        preview_width = self._preset.properties().get("preview_width", 0)
+        rendered_width = self._renderedWidth()
+        if preview_width and rendered_width and rendered_width > preview_width:
+            script.addNode(
+                nuke.Node(
+                    "Reformat",
+                    type="to box",
+                    box_width=preview_width,
+                    resize="width",
+                )
+            )
+        else:
+            preview_width = 0
+
+        script.addNode(self._createPreviewWriteNode(framerate, preview_width))
+
+        script_path = os.path.join(os.path.dirname(self._quicktime_path), "preview.nk")
+        script.writeToDisk(script_path)
+
+        self.app.log_debug("Rendering preview quicktime with %s" % script_path)
+        try:
+            task = self._submission.addJob(
+                Submission.kNukeRender, self._initDict, script_path
+            )
+            task.startTask()
+        except Exception as e:
+            self.app.log_warning(
+                "Unable to render the preview quicktime %s: %s"
+                % (self._quicktime_path, e)
+            )
+            return None
+        return task
+
+    def _renderedWidth(self):
+        """
+        Returns the width of the frames written by this task, which depends
+        on the reformat settings of the preset rather than on the clip alone.
+
+        :returns: The width in pixels, or None if it can't be told.
+        """
+        reformat = self._preset.properties().get("reformat", {})
+        to_type = reformat.get("to_type", nuke.ReformatNode.kDisabled)
+        try:
+            if to_type == nuke.ReformatNode.kToFormat:
+                # the format is written as "width height x y r t pixelAspect name"
+                return int(reformat["format"].split()[0])
+            if to_type == nuke.ReformatNode.kCompReformatToSequence:
+                return self._sequence.format().width()
+
+            if self.isCollated() or not isinstance(self._item, hiero.core.TrackItem):
+                # collated shots and sequences are written at the sequence
+                # format, unless some of their shots aren't reformatted
+                source_format = (
+                    self._collatedSequenceOutputFormat or self._sequence.format()
+                )
+            else:
+                source_format = self._clip.format()
+
+            if to_type == nuke.ReformatNode.kToScale:
+                return int(source_format.width() * float(reformat.get("scale", 1.0)))
+            return source_format.width()
+        except Exception:
+            return None
+
+    def _createPreviewWriteNode(self, framerate, preview_width=0):
+        """
+        Creates the write node of the preview quicktime.
+
+        :param framerate: The framerate of the quicktime.
+        :param int preview_width: The width the preview has been reformatted
+            to, 0 if it is at full resolution.
+        """
+        nodeName = "PTR Screening Room Media"
+
         preset = FnTranscodeExporter.TranscodePreset(
             "Qt Write", self._preset.properties()
         )
@@ -203,6 +370,7 @@ class ShotgunTranscodeExporter(
         file_type, properties = self.app.execute_hook(
             "hook_get_quicktime_settings",
             for_shotgun=True,
+            preview_width=preview_width,
             base_class=HieroGetQuicktimeSettings,
         )
         self.app.log_info("Transcode quicktime settings: %s" % (properties,))
@@ -243,14 +411,7 @@ class ShotgunTranscodeExporter(
                 framerate=framerate,
                 project=self._project,
             )
-        mov_write_node = FnExternalRender.createWriteNode(**kwargs)
-
-        # We create a push node and connect it to the set node we created just before the base write node was created
-        # This means that our write node will parent to the same node the base write node gets parented to.
-        push_command = nuke.PushNode(self._write_set_node_label)
-        self._script.addNode(push_command)
-
-        self._script.addNode(mov_write_node)
+        return FnExternalRender.createWriteNode(**kwargs)
 
     def sequenceName(self):
         """override default sequenceName() to handle collated shots"""
@@ -282,6 +443,9 @@ class ShotgunTranscodeExporter(
 
     def startTask(self):
         """Run Task"""
+        if self._export_skipped:
+            return
+
         if self._resolved_export_path is None:
             self._resolved_export_path = self.resolvedExportPath()
             self._tk_version = self._formatTkVersionString(self.versionString())
@@ -294,9 +458,6 @@ class ShotgunTranscodeExporter(
 
         # call the get_shot hook
         ########################
-        if self.app.shot_count == 0:
-            self.app.preprocess_data = {}
-
         # associate publishes with correct shot, which will be the hero item
         # if we are collating
         if self.isCollated() and not self.isHero():
@@ -311,7 +472,8 @@ class ShotgunTranscodeExporter(
             "hook_get_shot",
             task=self,
             item=item,
-            data=self.app.preprocess_data,
+            data=self.session.data,
+            session=self.session,
             fields=["sg_head_in", "sg_tail_out"],
             base_class=HieroGetShot,
         )
@@ -319,18 +481,7 @@ class ShotgunTranscodeExporter(
         # populate the data dictionary for our Version while the item is still valid
         ##############################
         # see if we get a task to use
-        self._sg_task = None
-        try:
-            task_filter = self.app.get_setting("default_task_filter", "[]")
-            task_filter = ast.literal_eval(task_filter)
-            task_filter.append(["entity", "is", self._sg_shot])
-            tasks = self.app.shotgun.find("Task", task_filter)
-            if len(tasks) == 1:
-                self._sg_task = tasks[0]
-        except ValueError:
-            # continue without task
-            setting = self.app.get_setting("default_task_filter", "[]")
-            self.app.log_error("Invalid value for 'default_task_filter': %s" % setting)
+        self._sg_task = self._get_default_task(self._sg_shot)
 
         if self._preset.properties()["create_version"]:
             # lookup current login
@@ -384,95 +535,178 @@ class ShotgunTranscodeExporter(
         # anything to work with, which will result in the same result
         # as if the thumbnail failed to upload.
         try:
-            self._thumbnail = source.thumbnail(self._item.sourceIn())
+            self._thumbnail = self.session.get_thumbnail(source, self._item.sourceIn())
         except Exception:
             pass
 
         return FnTranscodeExporter.TranscodeExporter.startTask(self)
 
+    def progress(self):
+        """Report the progress of the task"""
+        if self._export_skipped:
+            return 1.0
+        return FnTranscodeExporter.TranscodeExporter.progress(self)
+
     def finishTask(self):
         """Finish Task"""
-        # run base class implementation
-        FnTranscodeExporter.TranscodeExporter.finishTask(self)
-
-        # create publish
-        ################
-        # by using entity instead of export path to get context, this ensures
-        # collated plates get linked to the hero shot
-        ctx = self.app.tank.context_from_entity("Shot", self._sg_shot["id"])
-        published_file_type = self.app.get_setting("plate_published_file_type")
-
-        args = {
-            "tk": self.app.tank,
-            "context": ctx,
-            "path": self._resolved_export_path,
-            "name": os.path.basename(self._resolved_export_path),
-            "version_number": int(self._tk_version),
-            "published_file_type": published_file_type,
-        }
-
-        if self._sg_task is not None:
-            args["task"] = self._sg_task
-
-        published_file_entity_type = sgtk.util.get_published_file_entity_type(
-            self.app.sgtk
-        )
+        # the session is released even if finishing fails, so that it is still
+        # closed once the export is done
+        try:
+            if self._export_skipped:
+                # the item hasn't changed since it was last exported, or the export
+                # being resumed already exported it. link the cut item to the
+                # Version created back then.
+                vers = self._get_journaled_entity("Version")
+                if vers is None:
+                    vers = self.session.manifest.get_version(self._manifest_key)
+                else:
+                    self.session.manifest.set_version(self._manifest_key, vers)
+                self._update_cut_item(vers)
+                return
+
+            # run base class implementation
+            FnTranscodeExporter.TranscodeExporter.finishTask(self)
+
+            # create publish
+            ################
+            # by using entity instead of export path to get context, this ensures
+            # collated plates get linked to the hero shot
+            ctx = self.app.tank.context_from_entity("Shot", self._sg_shot["id"])
+            published_file_type = self.app.get_setting("plate_published_file_type")
+
+            args = {
+                "tk": self.app.tank,
+                "context": ctx,
+                "path": self._resolved_export_path,
+                "name": os.path.basename(self._resolved_export_path),
+                "version_number": int(self._tk_version),
+                "published_file_type": published_file_type,
+            }
 
-        # register publish
-        self.app.log_debug("Register publish in shotgun: %s" % str(args))
-        pub_data = tank.util.register_publish(**args)
-        if self._extra_publish_data is not None:
-            self.app.log_debug(
-                "Updating PTR %s %s"
-                % (published_file_entity_type, str(self._extra_publish_data))
-            )
-            self.app.shotgun.update(
-                pub_data["type"], pub_data["id"], self._extra_publish_data
+            if self._sg_task is not None:
+                args["task"] = self._sg_task
+
+            published_file_entity_type = sgtk.util.get_published_file_entity_type(
+                self.app.sgtk
             )
 
+            # create version
+            ################
+            # the Version is created ahead of the publish. the publish is linked
+            # to it once it is created along with the other publishes of the export.
+            vers = None
+            created_version = False
+            if self._preset.properties()["create_version"]:
+                vers = self._get_journaled_entity("Version")
+                if vers is None:
+                    self.app.log_debug(
+                        "Creating PTR Version %s" % str(self._version_data)
+                    )
+                    vers = self.app.shotgun.create("Version", self._version_data)
+                    self._journal_entity("Version", vers)
+                    created_version = True
+                if self.session.manifest is not None:
+                    self.session.manifest.set_version(self._manifest_key, vers)
+
+                if os.path.exists(self._quicktime_path):
+                    # the quicktime is uploaded in the background while the export
+                    # carries on. the export session waits for it once all of the
+                    # tasks have finished.
+                    self.app.log_debug(
+                        "Queueing quicktime upload to Flow Production Tracking... (%s)"
+                        % self._quicktime_path
+                    )
+                    cleanup = None
+                    if self._temp_quicktime:
+                        quicktime_dir = os.path.dirname(self._quicktime_path)
+                        cleanup = lambda: shutil.rmtree(quicktime_dir)
+                    self.session.uploads.upload(
+                        "Version",
+                        vers["id"],
+                        self._quicktime_path,
+                        "sg_uploaded_movie",
+                        cleanup=cleanup,
+                    )
+
+            # Post creation hook
+            ####################
+            if created_version:
+                self.app.execute_hook(
+                    "hook_post_version_creation",
+                    version_data=vers,
+                    base_class=HieroPostVersionCreation,
+                )
+
+            self._update_cut_item(vers)
+
+            # register publish
+            ##################
+            pub_data = self._get_journaled_entity("PublishedFile")
+            if pub_data is not None:
+                # the export being resumed already registered it
+                self._finish_publish(pub_data, vers)
+            else:
+                if vers and published_file_entity_type == "PublishedFile":
+                    args["version_entity"] = vers
+                self._register_publish(
+                    args,
+                    self._extra_publish_data,
+                    lambda pub_data: self._finish_publish(pub_data, vers),
+                )
+
+            # Log usage metrics
+            try:
+                self.app.log_metric("Transcode & Publish", log_version=True)
+            except:
+                # ingore any errors. ex: metrics logging not supported
+                pass
+
+            self._update_manifest()
+        except Exception:
+            # export the item again in the next incremental export
+            self._update_manifest(failed=True)
+            raise
+        finally:
+            CollatingExporter.finishTask(self)
+            self.releaseSession()
+
+    def _finish_publish(self, pub_data, vers):
+        """
+        Finishes publishing once the publish of this task has been created:
+        uploads its thumbnail, links it to the Version on sites using
+        TankPublishedFiles and records that the task's work is done.
+
+        :param dict pub_data: The publish entity.
+        :param dict vers: The Version created for the publish, or None.
+        """
+        self._journal_entity("PublishedFile", pub_data)
+
         # upload thumbnail for publish
         if self._thumbnail:
             self._upload_thumbnail_to_sg(pub_data, self._thumbnail)
         else:
             self.app.log_debug(
                 "There was no thumbnail available for %s %s"
-                % (published_file_entity_type, str(self._extra_publish_data))
+                % (pub_data["type"], str(self._extra_publish_data))
             )
 
-        # create version
-        ################
-        vers = None
-        if self._preset.properties()["create_version"]:
-            if published_file_entity_type == "PublishedFile":
-                self._version_data["published_files"] = [pub_data]
-            else:  # == "TankPublishedFile
-                self._version_data["tank_published_file"] = pub_data
-
-            self.app.log_debug("Creating PTR Version %s" % str(self._version_data))
-            vers = self.app.shotgun.create("Version", self._version_data)
-
-            if os.path.exists(self._quicktime_path):
-                self.app.log_debug(
-                    "Uploading quicktime to Flow Production Tracking... (%s)"
-                    % self._quicktime_path
-                )
-                self.app.shotgun.upload(
-                    "Version", vers["id"], self._quicktime_path, "sg_uploaded_movie"
-                )
-                if self._temp_quicktime:
-                    shutil.rmtree(os.path.dirname(self._quicktime_path))
+        # TankPublishedFiles are linked from the Version rather than to it
+        if vers and pub_data["type"] == "TankPublishedFile":
+            data = {"tank_published_file": pub_data}
+            if self._holds_session:
+                self.session.write_buffer.queue_update("Version", vers["id"], data)
+            else:
+                self.app.shotgun.update("Version", vers["id"], data)
 
-        # Post creation hook
-        ####################
-        if vers:
-            self.app.execute_hook(
-                "hook_post_version_creation",
-                version_data=vers,
-                base_class=HieroPostVersionCreation,
-            )
+        self._journal_done(path=self._resolved_export_path)
 
-        # Update the cut item if possible
-        #################################
+    def _update_cut_item(self, vers):
+        """
+        Links the cut item of this task's shot to a Version, if there is a
+        cut item.
+
+        :param dict vers: The Version to link to, or None.
+        """
         if vers and hasattr(self, "_cut_item_data"):
 
             # a version was created and we have a cut item to update.
@@ -482,8 +716,14 @@ class ShotgunTranscodeExporter(
             if "id" in self._cut_item_data:
                 cut_item_id = self._cut_item_data["id"]
 
-                # update the Cut item with the newly uploaded version
-                self.app.shotgun.update("CutItem", cut_item_id, {"version": vers})
+                # link the Cut item with the newly uploaded version. this is
+                # written along with the other links once the export is done
+                if self._holds_session:
+                    self.session.write_buffer.queue_update(
+                        "CutItem", cut_item_id, {"version": vers}
+                    )
+                else:
+                    self.app.shotgun.update("CutItem", cut_item_id, {"version": vers})
                 self.app.log_debug("Attached version to cut item.")
 
                 # upload a thumbnail for the cut item as well
@@ -492,13 +732,6 @@ class ShotgunTranscodeExporter(
                         {"type": "CutItem", "id": cut_item_id}, self._thumbnail
                     )
 
-        # Log usage metrics
-        try:
-            self.app.log_metric("Transcode & Publish", log_version=True)
-        except:
-            # ingore any errors. ex: metrics logging not supported
-            pass
-
 
 class ShotgunTranscodePreset(
     ShotgunHieroObjectBase, CollatedShotPreset, FnTranscodeExporter.TranscodePreset
@@ -512,6 +745,8 @@ class ShotgunTranscodePreset(
 
         # set default values
         self._properties["create_version"] = True
+        # previews are encoded at full resolution unless a width is set
+        self._properties["preview_width"] = 0
 
         # Handle custom properties from the customize_export_ui hook.
         custom_properties = (
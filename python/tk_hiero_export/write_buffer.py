@@ -0,0 +1,229 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import collections
+
+from .batch_hooks import update_shot_entities
+
+
+class ShotgunWriteBuffer(object):
+    """
+    Export-wide buffer of pending entity updates.
+
+    Rather than each task writing to Flow Production Tracking as it executes,
+    updates are queued here and written in chunks. Shot updates go through
+    the update_shot hook's batch method, other updates are sent as plain
+    batch requests. The buffer is flushed whenever it holds a full chunk, and
+    when the export session owning it is closed.
+    """
+
+    def __init__(self, app, batch_size):
+        """
+        :param app: The app instance.
+        :param int batch_size: The maximum number of updates to send in a
+            single request.
+        """
+        self._app = app
+        self._batch_size = max(1, batch_size)
+
+        # (entity type, entity id) -> (entity data, preset properties)
+        self._pending_shot_updates = collections.OrderedDict()
+
+        # (entity type, entity id) -> entity data
+        self._pending_updates = collections.OrderedDict()
+
+        # (entity type, entity id, error) for every update that failed
+        self._failures = []
+
+    def queue_shot_update(self, entity_type, entity_id, entity_data, preset_properties):
+        """
+        Queues an update of a Shot entity.
+
+        Multiple updates of the same entity are merged into a single update.
+
+        :param str entity_type: The entity type to update.
+        :param int entity_id: The id of the entity to update.
+        :param dict entity_data: The new data to update the entity with.
+        :param dict preset_properties: The export preset's properties.
+        """
+        key = (entity_type, entity_id)
+        if key in self._pending_shot_updates:
+            self._pending_shot_updates[key][0].update(entity_data)
+        else:
+            self._pending_shot_updates[key] = (dict(entity_data), preset_properties)
+
+        if len(self._pending_shot_updates) >= self._batch_size:
+            self.flush()
+
+    def queue_update(self, entity_type, entity_id, entity_data):
+        """
+        Queues an update of an arbitrary entity. Unlike Shot updates, these
+        don't go through any hook.
+
+        Multiple updates of the same entity are merged into a single update.
+
+        :param str entity_type: The entity type to update.
+        :param int entity_id: The id of the entity to update.
+        :param dict entity_data: The new data to update the entity with.
+        """
+        self._pending_updates.setdefault((entity_type, entity_id), {}).update(
+            entity_data
+        )
+
+        if len(self._pending_updates) >= self._batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes all of the pending updates to Flow Production Tracking.
+
+        Updates are sent in chunks of at most the buffer's batch size. If a
+        chunk fails, its updates are retried individually so that failures
+        can be reported for the entities they apply to.
+        """
+        failures = self._flush_shot_updates()
+        failures.extend(self._flush_updates())
+
+        if failures:
+            self._failures.extend(failures)
+            self._app.log_error(
+                "%s entities could not be updated in Flow Production Tracking: %s"
+                % (
+                    len(failures),
+                    ", ".join(
+                        "%s %s" % (entity_type, entity_id)
+                        for (entity_type, entity_id, _) in failures
+                    ),
+                )
+            )
+
+    @property
+    def failures(self):
+        """
+        A list of ``(entity_type, entity_id, error)`` tuples, one for each
+        update that could not be written.
+        """
+        return list(self._failures)
+
+    def _flush_shot_updates(self):
+        """
+        Writes the pending Shot updates via the update_shot hook.
+
+        :returns: A list of ``(entity_type, entity_id, error)`` tuples for the
+            updates that failed.
+        :rtype: list
+        """
+        pending = list(self._pending_shot_updates.items())
+        self._pending_shot_updates.clear()
+
+        # updates can only be sent together when they share the entity type
+        # and the preset properties the hook is called with
+        chunks = []
+        for (entity_type, entity_id), (entity_data, preset_properties) in pending:
+            if (
+                not chunks
+                or chunks[-1][0] != entity_type
+                or chunks[-1][1] is not preset_properties
+                or len(chunks[-1][2]) >= self._batch_size
+            ):
+                chunks.append((entity_type, preset_properties, []))
+            chunks[-1][2].append((entity_id, entity_data))
+
+        failures = []
+        for entity_type, preset_properties, entity_updates in chunks:
+            self._app.log_debug(
+                "Writing %s pending %s updates to Flow Production Tracking..."
+                % (len(entity_updates), entity_type)
+            )
+            try:
+                update_shot_entities(
+                    self._app, entity_type, entity_updates, preset_properties
+                )
+            except Exception:
+                self._app.log_debug(
+                    "Batched %s update failed. Retrying individually..." % entity_type
+                )
+                failures.extend(
+                    self._retry_shot_updates(
+                        entity_type, entity_updates, preset_properties
+                    )
+                )
+
+        return failures
+
+    def _flush_updates(self):
+        """
+        Writes the pending non-Shot updates as batch requests.
+
+        :returns: A list of ``(entity_type, entity_id, error)`` tuples for the
+            updates that failed.
+        :rtype: list
+        """
+        pending = list(self._pending_updates.items())
+        self._pending_updates.clear()
+
+        sg = self._app.shotgun
+        failures = []
+        for i in range(0, len(pending), self._batch_size):
+            chunk = pending[i : i + self._batch_size]
+            self._app.log_debug(
+                "Writing %s pending updates to Flow Production Tracking..." % len(chunk)
+            )
+            try:
+                sg.batch(
+                    [
+                        {
+                            "request_type": "update",
+                            "entity_type": entity_type,
+                            "entity_id": entity_id,
+                            "data": entity_data,
+                        }
+                        for ((entity_type, entity_id), entity_data) in chunk
+                    ]
+                )
+            except Exception:
+                self._app.log_debug("Batched update failed. Retrying individually...")
+                for (entity_type, entity_id), entity_data in chunk:
+                    try:
+                        sg.update(entity_type, entity_id, entity_data)
+                    except Exception as e:
+                        self._app.log_error(
+                            "Unable to update %s %s in Flow Production Tracking: %s"
+                            % (entity_type, entity_id, e)
+                        )
+                        failures.append((entity_type, entity_id, e))
+
+        return failures
+
+    def _retry_shot_updates(self, entity_type, entity_updates, preset_properties):
+        """
+        Writes each of the supplied Shot updates on its own.
+
+        :returns: A list of ``(entity_type, entity_id, error)`` tuples for the
+            updates that failed.
+        :rtype: list
+        """
+        failures = []
+        for entity_id, entity_data in entity_updates:
+            try:
+                update_shot_entities(
+                    self._app,
+                    entity_type,
+                    [(entity_id, entity_data)],
+                    preset_properties,
+                )
+            except Exception as e:
+                self._app.log_error(
+                    "Unable to update %s %s in Flow Production Tracking: %s"
+                    % (entity_type, entity_id, e)
+                )
+                failures.append((entity_type, entity_id, e))
+
+        return failures
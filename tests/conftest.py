@@ -0,0 +1,134 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Unit tests of the modules of the app that don't need Hiero.
+
+The tk_hiero_export package imports the Hiero API as soon as it is imported,
+so the modules under test are loaded from a bare package holding only the
+hook base classes they reference. Toolkit is replaced by minimal stand-ins
+when it isn't installed.
+"""
+
+import os
+import sys
+import types
+
+import pytest
+
+PYTHON_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "python"
+)
+
+
+def _install_package():
+    package = types.ModuleType("tk_hiero_export")
+    package.__path__ = [os.path.join(PYTHON_DIR, "tk_hiero_export")]
+    package.HieroUpdateShot = type("HieroUpdateShot", (object,), {})
+    sys.modules["tk_hiero_export"] = package
+
+
+def _install_toolkit():
+    try:
+        import sgtk  # noqa: F401
+        import tank.errors  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        return
+
+    def create_sg_connection():
+        raise RuntimeError("No Flow Production Tracking connection in tests.")
+
+    sgtk = types.ModuleType("sgtk")
+    sgtk.util = types.ModuleType("sgtk.util")
+    sgtk.util.shotgun = types.ModuleType("sgtk.util.shotgun")
+    sgtk.util.shotgun.create_sg_connection = create_sg_connection
+
+    tank = types.ModuleType("tank")
+    tank.errors = types.ModuleType("tank.errors")
+    tank.errors.TankHookMethodDoesNotExistError = type(
+        "TankHookMethodDoesNotExistError", (Exception,), {}
+    )
+
+    sys.modules.update(
+        {
+            "sgtk": sgtk,
+            "sgtk.util": sgtk.util,
+            "sgtk.util.shotgun": sgtk.util.shotgun,
+            "tank": tank,
+            "tank.errors": tank.errors,
+        }
+    )
+
+
+_install_package()
+_install_toolkit()
+
+
+class FakeShotgun(object):
+    """
+    Records the requests made to Flow Production Tracking.
+    """
+
+    def __init__(self):
+        self.requests = []
+
+        # whether batch requests fail, and the ids of the entities whose
+        # updates fail
+        self.fail_batch = False
+        self.fail_ids = set()
+
+    def batch(self, requests):
+        self.requests.append(("batch", requests))
+        if self.fail_batch:
+            raise RuntimeError("Batch failed.")
+        return [dict(request.get("data", {}), id=1) for request in requests]
+
+    def update(self, entity_type, entity_id, data):
+        self.requests.append(("update", entity_type, entity_id, data))
+        if entity_id in self.fail_ids:
+            raise RuntimeError("Update of %s %s failed." % (entity_type, entity_id))
+        return dict(data, type=entity_type, id=entity_id)
+
+
+class FakeApp(object):
+    """
+    Stands in for the app, recording its log messages and hook calls.
+    """
+
+    def __init__(self):
+        self.shotgun = FakeShotgun()
+        self.messages = []
+
+        # (hook name, method name) -> callable handling calls to the method
+        self.hook_methods = {}
+        self.hook_calls = []
+
+    def execute_hook_method(self, hook_name, method_name, base_class=None, **kwargs):
+        self.hook_calls.append((hook_name, method_name, kwargs))
+        return self.hook_methods[(hook_name, method_name)](**kwargs)
+
+    def log_debug(self, message):
+        self.messages.append(("debug", message))
+
+    def log_info(self, message):
+        self.messages.append(("info", message))
+
+    def log_warning(self, message):
+        self.messages.append(("warning", message))
+
+    def log_error(self, message):
+        self.messages.append(("error", message))
+
+
+@pytest.fixture
+def app():
+    return FakeApp()
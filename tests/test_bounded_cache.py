@@ -0,0 +1,76 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from tk_hiero_export.bounded_cache import BoundedCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = BoundedCache("test", 2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    # refreshes a, so b is the least recently used
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.keys() == ["a", "c"]
+    assert cache.evictions == 1
+
+
+def test_cost_is_accounted_for():
+    cache = BoundedCache("test", 10, max_cost=10)
+    cache.set("a", "a", cost=4)
+    cache.set("b", "b", cost=4)
+    assert cache.cost == 8
+
+    # exceeds the cost, so the least recently used entry goes
+    cache.set("c", "c", cost=4)
+    assert cache.keys() == ["b", "c"]
+    assert cache.cost == 8
+
+    # replacing an entry replaces its cost
+    cache.set("b", "b", cost=1)
+    assert cache.cost == 5
+
+    assert cache.pop("c") == "c"
+    assert cache.cost == 1
+
+    cache.clear()
+    assert cache.cost == 0
+    assert len(cache) == 0
+
+
+def test_newest_entry_is_kept_even_if_too_costly():
+    cache = BoundedCache("test", 10, max_cost=10)
+    cache.set("a", "a", cost=4)
+    cache.set("b", "b", cost=20)
+
+    assert cache.keys() == ["b"]
+    assert cache.cost == 20
+
+
+def test_hits_and_misses_are_counted():
+    cache = BoundedCache("test", 2)
+    created = []
+
+    def create():
+        created.append(True)
+        return "value"
+
+    assert cache.get_or_create("a", create) == "value"
+    assert cache.get_or_create("a", create) == "value"
+    assert cache.get("b") is None
+
+    # peeking doesn't count
+    assert cache.peek("a") == "value"
+
+    assert len(created) == 1
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert "a" in cache
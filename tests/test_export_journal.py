@@ -0,0 +1,103 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+
+from tk_hiero_export.export_journal import ExportJournal
+
+
+def _journal(app, tmpdir):
+    return ExportJournal(app, os.path.join(str(tmpdir), "cache", "journal.jsonl"))
+
+
+def _interrupt(app, tmpdir, export_key="export"):
+    """
+    Journals some work of an export which is left unfinished.
+    """
+    journal = _journal(app, tmpdir)
+    journal.begin(export_key)
+    journal.record_entity("shot 1", "Version", {"type": "Version", "id": 7, "x": 0})
+    journal.record_done("shot 1", path="/renders/shot1.exr")
+    journal.record_entity("shot 2", "Version", {"type": "Version", "id": 8})
+    journal.close()
+    return journal
+
+
+def test_interrupted_export_is_replayed(app, tmpdir):
+    _interrupt(app, tmpdir)
+
+    journal = _journal(app, tmpdir)
+    assert journal.interrupted("export")
+    assert journal.begin("export", resume=True)
+
+    assert journal.is_done("shot 1")
+    assert not journal.is_done("shot 2")
+    assert journal.get_entity("shot 2", "Version") == {"type": "Version", "id": 8}
+    assert journal.get_entity("shot 1", "Version") == {"type": "Version", "id": 7}
+
+
+def test_only_an_export_with_the_same_key_is_resumed(app, tmpdir):
+    _interrupt(app, tmpdir)
+
+    journal = _journal(app, tmpdir)
+    assert not journal.interrupted("other export")
+    assert not journal.begin("other export", resume=True)
+    assert not journal.is_done("shot 1")
+    assert journal.get_entity("shot 2", "Version") is None
+    journal.close()
+
+    # the journal has been started over for the other export
+    assert not _journal(app, tmpdir).interrupted("export")
+    assert _journal(app, tmpdir).interrupted("other export")
+
+
+def test_export_started_over_without_resuming(app, tmpdir):
+    _interrupt(app, tmpdir)
+
+    journal = _journal(app, tmpdir)
+    assert not journal.begin("export")
+    assert not journal.is_done("shot 1")
+
+
+def test_cut_short_entry_is_ignored(app, tmpdir):
+    journal = _interrupt(app, tmpdir)
+    with open(journal._path, "a") as fh:
+        fh.write('{"kind": "done", "key": "sho')
+
+    journal = _journal(app, tmpdir)
+    assert journal.begin("export", resume=True)
+    assert journal.is_done("shot 1")
+    assert not journal.is_done("shot 2")
+
+
+def test_deferred_work_is_done_unless_its_update_failed(app, tmpdir):
+    journal = _journal(app, tmpdir)
+    journal.begin("export")
+    journal.record_done_deferred("shot 1", {"type": "Shot", "id": 1})
+    journal.record_done_deferred("shot 2", {"type": "Shot", "id": 2})
+    assert not journal.is_done("shot 1")
+
+    journal.commit_deferred([("Shot", 2, RuntimeError("failed"))])
+    journal.close()
+
+    journal = _journal(app, tmpdir)
+    journal.begin("export", resume=True)
+    assert journal.is_done("shot 1")
+    assert not journal.is_done("shot 2")
+
+
+def test_complete_export_removes_its_journal(app, tmpdir):
+    journal = _journal(app, tmpdir)
+    journal.begin("export")
+    journal.record_done("shot 1")
+    journal.close(complete=True)
+
+    assert not os.path.exists(journal._path)
+    assert not _journal(app, tmpdir).interrupted("export")
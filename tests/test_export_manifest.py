@@ -0,0 +1,83 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+
+import pytest
+
+from tk_hiero_export.export_manifest import ExportManifest
+
+
+def _output(tmpdir, name):
+    path = os.path.join(str(tmpdir), name)
+    with open(path, "w") as fh:
+        fh.write("frame")
+    return path
+
+
+def _manifest(app, tmpdir):
+    return ExportManifest(app, os.path.join(str(tmpdir), "cache", "manifest.json"))
+
+
+def test_fingerprint_is_stable():
+    assert ExportManifest.fingerprint({"a": 1, "b": [1, 2]}) == (
+        ExportManifest.fingerprint({"b": [1, 2], "a": 1})
+    )
+    assert ExportManifest.fingerprint({"a": 1}) != ExportManifest.fingerprint({"a": 2})
+
+    with pytest.raises(TypeError):
+        ExportManifest.fingerprint({"a": object()})
+
+
+def test_entries_are_committed_on_save(app, tmpdir):
+    output = _output(tmpdir, "shot.0001.exr")
+    manifest = _manifest(app, tmpdir)
+
+    manifest.update("item", "fingerprint", [output])
+    manifest.set_version("item", {"type": "Version", "id": 3, "code": "v001"})
+    assert not manifest.unchanged("item", "fingerprint")
+    assert manifest.get_version("item") == {"type": "Version", "id": 3}
+
+    manifest.save()
+    assert manifest.unchanged("item", "fingerprint")
+    assert not manifest.unchanged("item", "other fingerprint")
+
+    # and saved to disk
+    manifest = _manifest(app, tmpdir)
+    assert manifest.unchanged("item", "fingerprint")
+    assert manifest.get_version("item") == {"type": "Version", "id": 3}
+
+
+def test_discarded_entries_are_dropped(app, tmpdir):
+    output = _output(tmpdir, "shot.0001.exr")
+    manifest = _manifest(app, tmpdir)
+    manifest.update("item", "fingerprint", [output])
+    manifest.save()
+
+    # the export of the item failed this time
+    manifest.update("item", "fingerprint", [output])
+    manifest.discard("item")
+    manifest.save()
+
+    assert not manifest.unchanged("item", "fingerprint")
+    assert not _manifest(app, tmpdir).unchanged("item", "fingerprint")
+
+
+def test_missing_outputs_are_changed(app, tmpdir):
+    output = _output(tmpdir, "shot.0001.exr")
+    manifest = _manifest(app, tmpdir)
+    manifest.update("item", "fingerprint", [output])
+    manifest.update("unknown outputs", "fingerprint", None)
+    manifest.save()
+
+    assert not manifest.unchanged("unknown outputs", "fingerprint")
+
+    os.remove(output)
+    assert not manifest.unchanged("item", "fingerprint")
@@ -0,0 +1,67 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from tk_hiero_export.track_index import TrackIndex
+
+
+class Item(object):
+    def __init__(self, timeline_in, timeline_out):
+        self._in = timeline_in
+        self._out = timeline_out
+
+    def timelineIn(self):
+        return self._in
+
+    def timelineOut(self):
+        return self._out
+
+
+def _overlapping(index, timeline_in, timeline_out):
+    return sorted(
+        position for (position, _) in index.overlapping(timeline_in, timeline_out)
+    )
+
+
+def test_overlapping_spans_and_starts_within():
+    items = [Item(0, 9), Item(10, 19), Item(20, 29), Item(30, 39)]
+    index = TrackIndex(0, items)
+
+    # the item spanning the in point and the items starting before the out point
+    assert _overlapping(index, 15, 30) == [1, 2]
+
+    # an item starting on the out point isn't overlapping
+    assert _overlapping(index, 10, 20) == [1]
+
+    # an item finishing on the in point is
+    assert _overlapping(index, 9, 10) == [0]
+
+
+def test_overlapping_finds_long_items_starting_early():
+    # the long first item reaches past the shorter ones that follow it
+    items = [Item(0, 100), Item(10, 12), Item(20, 22)]
+    index = TrackIndex(3, items)
+
+    assert index.track_order == 3
+    assert _overlapping(index, 50, 60) == [0]
+    assert _overlapping(index, 11, 21) == [0, 1, 2]
+
+
+def test_overlapping_keeps_track_positions_of_unsorted_items():
+    items = [Item(20, 29), Item(0, 9), Item(10, 19)]
+    index = TrackIndex(0, items)
+
+    found = dict(index.overlapping(5, 15))
+    assert sorted(found) == [1, 2]
+    assert found[1] is items[1]
+    assert found[2] is items[2]
+
+
+def test_overlapping_empty_track():
+    assert _overlapping(TrackIndex(0, []), 0, 10) == []
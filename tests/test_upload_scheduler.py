@@ -0,0 +1,107 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import threading
+
+import pytest
+
+from tk_hiero_export import upload_scheduler
+from tk_hiero_export.upload_scheduler import UploadScheduler
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    """
+    The delays waited for between retries, without waiting for them.
+    """
+    delays = []
+    monkeypatch.setattr(upload_scheduler.time, "sleep", delays.append)
+    return delays
+
+
+def _flaky_upload(failures):
+    """
+    Returns an upload failing the supplied number of times before succeeding.
+    """
+    attempts = []
+
+    def upload(sg):
+        attempts.append(sg)
+        if len(attempts) <= failures:
+            raise RuntimeError("Upload failed.")
+        return "uploaded"
+
+    return upload, attempts
+
+
+def test_failed_upload_is_retried_with_backoff(app, delays):
+    scheduler = UploadScheduler(app, 0, max_retries=3, retry_delay=2.0)
+    upload, attempts = _flaky_upload(2)
+    cleaned = []
+
+    handle = scheduler.submit(upload, "test", cleanup=lambda: cleaned.append(True))
+
+    assert handle.done
+    assert handle.result == "uploaded"
+    assert handle.error is None
+    assert len(attempts) == 3
+    assert delays == [2.0, 4.0]
+    assert cleaned == [True]
+    assert scheduler.pending == 0
+    assert scheduler.failures == []
+
+
+def test_upload_fails_once_out_of_retries(app, delays):
+    scheduler = UploadScheduler(app, 0, max_retries=2, retry_delay=1.0)
+    upload, attempts = _flaky_upload(5)
+    cleaned = []
+
+    handle = scheduler.submit(upload, "test", cleanup=lambda: cleaned.append(True))
+
+    assert handle.done
+    assert isinstance(handle.error, RuntimeError)
+    assert len(attempts) == 3
+    assert delays == [1.0, 2.0]
+    assert cleaned == [True]
+    assert scheduler.failures == [handle]
+
+
+def test_uploads_run_in_the_background(app, monkeypatch):
+    connection = object()
+    monkeypatch.setattr(
+        upload_scheduler.sgtk.util.shotgun,
+        "create_sg_connection",
+        lambda: connection,
+        raising=False,
+    )
+    scheduler = UploadScheduler(app, 2)
+
+    release = threading.Event()
+    connections = []
+
+    def upload(sg):
+        release.wait(5)
+        connections.append(sg)
+        return "uploaded"
+
+    handles = [scheduler.submit(upload, "test %s" % i) for i in range(3)]
+    assert scheduler.pending == 3
+
+    release.set()
+    progress = []
+    scheduler.wait(lambda finished, total: progress.append((finished, total)))
+
+    assert all(handle.result == "uploaded" for handle in handles)
+    assert connections == [connection] * 3
+    assert scheduler.pending == 0
+    assert progress[-1] == (3, 3)
+    assert ("info", "All uploads to Flow Production Tracking finished.") in (
+        app.messages
+    )
@@ -0,0 +1,138 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from tk_hiero_export.write_buffer import ShotgunWriteBuffer
+
+
+def _batch_sizes(app):
+    return [
+        len(request[1]) for request in app.shotgun.requests if request[0] == "batch"
+    ]
+
+
+def test_updates_are_merged_and_written_together(app):
+    buffer = ShotgunWriteBuffer(app, 3)
+    buffer.queue_update("Version", 1, {"a": 1})
+    buffer.queue_update("Version", 2, {"a": 2})
+    buffer.queue_update("Version", 1, {"b": 1})
+    assert app.shotgun.requests == []
+
+    buffer.flush()
+    assert app.shotgun.requests == [
+        (
+            "batch",
+            [
+                {
+                    "request_type": "update",
+                    "entity_type": "Version",
+                    "entity_id": 1,
+                    "data": {"a": 1, "b": 1},
+                },
+                {
+                    "request_type": "update",
+                    "entity_type": "Version",
+                    "entity_id": 2,
+                    "data": {"a": 2},
+                },
+            ],
+        )
+    ]
+
+
+def test_full_buffer_is_written_in_chunks(app):
+    buffer = ShotgunWriteBuffer(app, 2)
+    for entity_id in range(5):
+        buffer.queue_update("Version", entity_id, {"a": entity_id})
+    buffer.flush()
+
+    assert _batch_sizes(app) == [2, 2, 1]
+
+
+def test_failed_chunk_is_retried_per_item(app):
+    app.shotgun.fail_batch = True
+    app.shotgun.fail_ids = set([2])
+
+    buffer = ShotgunWriteBuffer(app, 10)
+    for entity_id in range(1, 4):
+        buffer.queue_update("Version", entity_id, {"a": entity_id})
+    buffer.flush()
+
+    updates = [request[2] for request in app.shotgun.requests if request[0] == "update"]
+    assert updates == [1, 2, 3]
+    assert [
+        (entity_type, entity_id) for (entity_type, entity_id, _) in buffer.failures
+    ] == [("Version", 2)]
+
+
+def test_shot_updates_are_chunked_by_preset(app):
+    calls = []
+    app.hook_methods[("hook_update_shot", "update_shot_entities")] = (
+        lambda entity_type, entity_updates, preset_properties: calls.append(
+            (entity_type, [entity_id for (entity_id, _) in entity_updates])
+        )
+    )
+
+    preset = {}
+    other_preset = {}
+    buffer = ShotgunWriteBuffer(app, 10)
+    buffer.queue_shot_update("Shot", 1, {"code": "a"}, preset)
+    buffer.queue_shot_update("Shot", 2, {"code": "b"}, preset)
+    buffer.queue_shot_update("Shot", 3, {"code": "c"}, other_preset)
+    buffer.queue_shot_update("Shot", 1, {"sg_head_in": 1}, preset)
+    buffer.flush()
+
+    assert calls == [("Shot", [1, 2]), ("Shot", [3])]
+    assert app.hook_calls[0][2]["entity_updates"][0] == (
+        1,
+        {"code": "a", "sg_head_in": 1},
+    )
+
+
+def test_failed_shot_chunk_is_retried_per_item(app):
+    def update_shot_entities(entity_type, entity_updates, preset_properties):
+        if len(entity_updates) > 1 or entity_updates[0][0] == 2:
+            raise RuntimeError("Update failed.")
+
+    app.hook_methods[("hook_update_shot", "update_shot_entities")] = (
+        update_shot_entities
+    )
+
+    preset = {}
+    buffer = ShotgunWriteBuffer(app, 10)
+    for entity_id in range(1, 4):
+        buffer.queue_shot_update("Shot", entity_id, {"code": str(entity_id)}, preset)
+    buffer.flush()
+
+    retried = [call[2]["entity_updates"] for call in app.hook_calls[1:]]
+    assert [updates[0][0] for updates in retried] == [1, 2, 3]
+    assert [entity_id for (_, entity_id, _) in buffer.failures] == [2]
+
+
+def test_shot_updates_fall_back_to_the_single_hook_method(app):
+    def update_shot_entities(**kwargs):
+        raise NotImplementedError
+
+    updated = []
+    app.hook_methods[("hook_update_shot", "update_shot_entities")] = (
+        update_shot_entities
+    )
+    app.hook_methods[("hook_update_shot", "update_shotgun_shot_entity")] = (
+        lambda entity_type, entity_id, entity_data, preset_properties: updated.append(
+            entity_id
+        )
+    )
+
+    buffer = ShotgunWriteBuffer(app, 10)
+    buffer.queue_shot_update("Shot", 1, {"code": "a"}, {})
+    buffer.queue_shot_update("Shot", 2, {"code": "b"}, {})
+    buffer.flush()
+
+    assert updated == [1, 2]
+    assert buffer.failures == []